@@ -0,0 +1,165 @@
+"""
+Moves transactions of closed years out of the hot Sale / Purchase / Expense
+tables. Raw rows go to the Archived* tables and per-product per-day totals
+are added to the *DailySummary tables, which the reports read alongside the
+hot tables so totals stay the same.
+
+Archived COGS is frozen at quantity * buying_price as of archiving, which is
+what the reports showed for those sales at that time.
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+
+from . import business_time
+from .models import (
+    ArchivedExpense, ArchivedPurchase, ArchivedSale, Expense, ExpenseDailySummary,
+    Purchase, PurchaseDailySummary, Sale, SalesDailySummary,
+)
+
+
+def archive_cutoff(through_year):
+    """First moment (in BUSINESS_TIME_ZONE) that stays in the hot tables."""
+    return business_time.midnight(date(through_year + 1, 1, 1))
+
+
+def _chunks(queryset, batch_size):
+    """Yield lists of rows ordered by pk without loading the whole table."""
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk).order_by('pk')[:batch_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1].pk
+
+
+def _merge_product_summaries(model, deltas, fields):
+    """
+    Add {(product_id, day): {field: value}} onto existing summary rows,
+    creating the missing ones. Chunks are in pk order, which is roughly date
+    order, so the day range of one chunk is narrow.
+    """
+    days = [day for _, day in deltas]
+    existing = {
+        (row.product_id, row.day): row
+        for row in model.objects.filter(day__range=(min(days), max(days)))
+    }
+    to_update, to_create = [], []
+    for key, values in deltas.items():
+        row = existing.get(key)
+        if row is None:
+            to_create.append(model(product_id=key[0], day=key[1], **values))
+            continue
+        for field in fields:
+            setattr(row, field, getattr(row, field) + values[field])
+        to_update.append(row)
+    model.objects.bulk_create(to_create)
+    if to_update:
+        model.objects.bulk_update(to_update, fields)
+
+
+def _archive_sales(cutoff, batch_size):
+    moved = 0
+    queryset = Sale.objects.filter(date__lt=cutoff).select_related('product')
+    for chunk in _chunks(queryset, batch_size):
+        deltas = defaultdict(lambda: {
+            'quantity': 0, 'revenue': Decimal('0'), 'cogs': Decimal('0'), 'revenue_cents': 0, 'cogs_cents': 0,
+        })
+        with transaction.atomic():
+            for sale in chunk:
+                if sale.voided:
+                    # Kept in ArchivedSale for the record, left out of the totals
+                    continue
+                totals = deltas[(sale.product_id, business_time.localdate(sale.date))]
+                totals['quantity'] += sale.quantity
+                totals['revenue'] += sale.total_price
+                totals['cogs'] += sale.quantity * sale.product.buying_price
+                totals['revenue_cents'] += sale.total_price_cents
+                totals['cogs_cents'] += sale.quantity * sale.product.buying_price_cents
+            ArchivedSale.objects.bulk_create([
+                ArchivedSale(original_id=s.pk, product_id=s.product_id, quantity=s.quantity,
+                             total_price=s.total_price, date=s.date, voided=s.voided)
+                for s in chunk
+            ])
+            if deltas:
+                _merge_product_summaries(
+                    SalesDailySummary, deltas, ['quantity', 'revenue', 'cogs', 'revenue_cents', 'cogs_cents'],
+                )
+            # Exactly the rows of this chunk. Queryset delete skips
+            # Sale.delete(), so stock is left alone.
+            Sale.objects.filter(date__lt=cutoff, pk__range=(chunk[0].pk, chunk[-1].pk)).delete()
+        moved += len(chunk)
+    return moved
+
+
+def _archive_purchases(cutoff, batch_size):
+    moved = 0
+    for chunk in _chunks(Purchase.objects.filter(date__lt=cutoff), batch_size):
+        deltas = defaultdict(lambda: {'quantity': 0, 'total_cost': Decimal('0'), 'total_cost_cents': 0})
+        with transaction.atomic():
+            for purchase in chunk:
+                totals = deltas[(purchase.product_id, business_time.localdate(purchase.date))]
+                totals['quantity'] += purchase.quantity
+                totals['total_cost'] += purchase.total_cost
+                totals['total_cost_cents'] += purchase.total_cost_cents
+            ArchivedPurchase.objects.bulk_create([
+                ArchivedPurchase(original_id=p.pk, product_id=p.product_id, quantity=p.quantity,
+                                 total_cost=p.total_cost, date=p.date)
+                for p in chunk
+            ])
+            _merge_product_summaries(PurchaseDailySummary, deltas, ['quantity', 'total_cost', 'total_cost_cents'])
+            Purchase.objects.filter(date__lt=cutoff, pk__range=(chunk[0].pk, chunk[-1].pk)).delete()
+        moved += len(chunk)
+    return moved
+
+
+def _archive_expenses(cutoff, batch_size):
+    moved = 0
+    for chunk in _chunks(Expense.objects.filter(date__lt=cutoff), batch_size):
+        deltas = defaultdict(lambda: {'amount': Decimal('0'), 'amount_cents': 0})
+        with transaction.atomic():
+            for expense in chunk:
+                totals = deltas[(business_time.localdate(expense.date), expense.category_id)]
+                totals['amount'] += expense.amount
+                totals['amount_cents'] += expense.amount_cents
+            ArchivedExpense.objects.bulk_create([
+                ArchivedExpense(original_id=e.pk, title=e.title, amount=e.amount, date=e.date,
+                                category_id=e.category_id)
+                for e in chunk
+            ])
+            days = [day for day, _ in deltas]
+            existing = {
+                (row.day, row.category_id): row
+                for row in ExpenseDailySummary.objects.filter(day__range=(min(days), max(days)))
+                if (row.day, row.category_id) in deltas
+            }
+            for key, row in existing.items():
+                row.amount += deltas[key]['amount']
+                row.amount_cents += deltas[key]['amount_cents']
+            ExpenseDailySummary.objects.bulk_update(list(existing.values()), ['amount', 'amount_cents'])
+            ExpenseDailySummary.objects.bulk_create([
+                ExpenseDailySummary(day=day, category_id=category_id, **totals)
+                for (day, category_id), totals in deltas.items() if (day, category_id) not in existing
+            ])
+            Expense.objects.filter(date__lt=cutoff, pk__range=(chunk[0].pk, chunk[-1].pk)).delete()
+        moved += len(chunk)
+    return moved
+
+
+def archive_transactions(through_year, batch_size=10_000):
+    """
+    Archive every sale, purchase and expense dated up to the end of
+    `through_year`. Each chunk is its own transaction, so the job can be
+    interrupted and simply run again.
+    """
+    if through_year >= business_time.localdate().year:
+        raise ValueError("Only closed years can be archived.")
+    cutoff = archive_cutoff(through_year)
+    return {
+        'sales': _archive_sales(cutoff, batch_size),
+        'purchases': _archive_purchases(cutoff, batch_size),
+        'expenses': _archive_expenses(cutoff, batch_size),
+    }
@@ -0,0 +1,206 @@
+"""
+Audit trail of financial writes: who created, changed, voided or deleted
+a sale, purchase or expense, or changed a product's name or prices.
+
+Nothing is written inside the transaction being audited. Model signals
+compare an instance with the values it was loaded with (snapshotted in
+post_init, so no extra query) and record() queues the diff. The entry is
+handed on only when that transaction commits, so rolled back writes leave
+no trace.
+
+Server processes call enable_background_flush() (see wsgi.py). Entries
+then go to an in-process buffer, written with one bulk_create:
+- every AUDIT_FLUSH_INTERVAL_SECONDS by a background thread,
+- by the committing request as soon as the buffer holds
+  AUDIT_BUFFER_SIZE entries,
+- at interpreter exit.
+Entries still buffered when a process is killed are lost. That is the
+price of keeping the audit off the POS write path. Everywhere else
+(management commands, shells, tests) entries are written on commit.
+
+Queryset writes skip model signals; the bulk paths (product_bulk.py,
+voids.py) call record() themselves.
+"""
+import atexit
+import contextvars
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CREATE, UPDATE, DELETE, VOID = 'create', 'update', 'delete', 'void'
+
+# Audited models and the fields whose changes are kept
+TRACKED_FIELDS = {
+    'Sale': ['product_id', 'quantity', 'total_price'],
+    'Purchase': ['product_id', 'quantity', 'total_cost'],
+    'Expense': ['title', 'amount', 'category_id'],
+    'Product': ['name', 'brand', 'buying_price', 'selling_price'],
+}
+
+# The request being served, set by middleware.AuditContextMiddleware.
+# Its .user is read when an entry is recorded, after DRF has authenticated it.
+current_request = contextvars.ContextVar('audit_request', default=None)
+
+_buffer = []
+_lock = threading.Lock()
+_flusher = None  # (pid, thread)
+_background = False
+
+
+def acting_user_id():
+    request = current_request.get()
+    user = getattr(request, 'user', None)
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+def record(object_type, object_id, action, changes):
+    """
+    Queue one entry. `changes` is {field: [before, after]}. The entry is
+    buffered when the current transaction commits, or now in autocommit.
+    """
+    record_many(object_type, action, [(object_id, changes)])
+
+
+def record_many(object_type, action, items):
+    """record() for [(object_id, changes), ...] with a single commit hook."""
+    from .models import AuditLog
+
+    now, user_id = timezone.now(), acting_user_id()
+    entries = [
+        AuditLog(created_at=now, user_id=user_id, object_type=object_type,
+                 object_id=object_id, action=action, changes=changes)
+        for object_id, changes in items
+    ]
+    if entries:
+        transaction.on_commit(lambda: _enqueue(entries))
+
+
+def record_changes(instance, created=False):
+    """
+    Record what changed on a tracked instance since it was loaded (or last
+    recorded) and reset its snapshot. For writes that bypass save(), such
+    as bulk_update.
+    """
+    name = type(instance).__name__
+    after = _values(instance, TRACKED_FIELDS[name])
+    before = {} if created else getattr(instance, '_audit_values', {})
+    changes = {
+        field: [before.get(field), value]
+        for field, value in after.items()
+        if created or (field in before and before[field] != value)
+    }
+    if changes:
+        record(name.lower(), instance.pk, CREATE if created else UPDATE, changes)
+    instance._audit_values = after
+
+
+def _enqueue(entries):
+    if not _background:
+        _write(entries)
+        return
+    with _lock:
+        _buffer.extend(entries)
+        full = len(_buffer) >= settings.AUDIT_BUFFER_SIZE
+    if full:
+        flush()
+    else:
+        _ensure_flusher()
+
+
+def _write(entries):
+    from .models import AuditLog
+
+    AuditLog.objects.bulk_create(entries, batch_size=1_000)
+
+
+def flush():
+    """Write out everything buffered. Returns the number of entries written."""
+    with _lock:
+        entries = _buffer[:]
+        del _buffer[:]
+    if not entries:
+        return 0
+    try:
+        _write(entries)
+    except Exception:
+        logger.exception("Could not write %d audit entries, keeping them for the next flush", len(entries))
+        with _lock:
+            _buffer[:0] = entries
+        return 0
+    return len(entries)
+
+
+def enable_background_flush():
+    """Buffer entries from now on, flushed by a timer thread that starts with the first entry."""
+    global _background
+    if settings.AUDIT_FLUSH_INTERVAL_SECONDS > 0 and not _background:
+        _background = True
+        atexit.register(flush)
+
+
+def disable_background_flush():
+    """Write entries on commit again, after flushing what is buffered."""
+    global _background
+    if _background:
+        _background = False
+        atexit.unregister(flush)
+        flush()
+
+
+def _ensure_flusher():
+    global _flusher
+    # A forked worker (gunicorn --preload) does not inherit the parent's thread
+    if _flusher is not None and _flusher[0] == os.getpid() and _flusher[1].is_alive():
+        return
+    with _lock:
+        if _flusher is None or _flusher[0] != os.getpid() or not _flusher[1].is_alive():
+            thread = threading.Thread(target=_flush_loop, name='audit-flush', daemon=True)
+            _flusher = (os.getpid(), thread)
+            thread.start()
+
+
+def _flush_loop():
+    while _background:
+        time.sleep(settings.AUDIT_FLUSH_INTERVAL_SECONDS)
+        flush()
+        # The thread has its own connection; do not hold it open between flushes
+        close_old_connections()
+
+
+# ---- model signals ------------------------------------------------------------
+
+def _values(instance, fields):
+    # Only what is loaded: reading a deferred field would cost a query
+    return {field: instance.__dict__[field] for field in fields if field in instance.__dict__}
+
+
+def _snapshot(sender, instance, **kwargs):
+    instance._audit_values = _values(instance, TRACKED_FIELDS[sender.__name__])
+
+
+def _saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        record_changes(instance, created)
+
+
+def _deleted(sender, instance, **kwargs):
+    before = _values(instance, TRACKED_FIELDS[sender.__name__])
+    record(sender.__name__.lower(), instance.pk, DELETE, {field: [value, None] for field, value in before.items()})
+
+
+def connect_signals():
+    from . import models
+
+    for name in TRACKED_FIELDS:
+        model = getattr(models, name)
+        post_init.connect(_snapshot, sender=model, dispatch_uid=f'audit-init-{name}')
+        post_save.connect(_saved, sender=model, dispatch_uid=f'audit-save-{name}')
+        post_delete.connect(_deleted, sender=model, dispatch_uid=f'audit-delete-{name}')
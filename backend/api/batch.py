@@ -0,0 +1,166 @@
+"""
+Several API calls in one HTTP round trip (POST /api/batch/).
+
+    {"requests": [{"method": "GET", "path": "/api/products/?fields=id,name"},
+                  {"method": "POST", "path": "/api/sales/", "body": {"product": 1, "quantity": 2},
+                   "headers": {"Idempotency-Key": "..."}}],
+     "atomic": false}
+
+Each sub-request is resolved and dispatched in-process to the view its
+path names, with the caller's headers (so the same user and the same
+throttle buckets), and the answers come back in order as
+{"responses": [{"status", "headers", "body"}, ...]}. Sub-requests skip the
+middleware: the batch request itself went through it. A sub-request whose
+view raises answers 500 (and is logged); the others still run.
+
+- A batch with a POST runs in order on the request's DB connection.
+  "atomic": true also runs it in one transaction, which stops and rolls
+  everything back at the first answer that is not 2xx.
+- A batch of GETs runs concurrently on up to BATCH_MAX_WORKERS threads.
+  Django connections are per thread, so each worker has its own, kept
+  between batches under CONN_MAX_AGE as a request's would be. Their
+  queries are not in the batch request's Server-Timing figures.
+"""
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import close_old_connections, transaction
+from django.urls import Resolver404, resolve
+
+MAX_REQUESTS = 20
+METHODS = ('GET', 'POST')
+URL_NAME = 'batch'
+
+_executor = None  # (pid, executor)
+_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def parse(data):
+    """Validate a batch body. Returns ([(method, path, body, headers)], atomic); raises ValueError."""
+    if not isinstance(data, dict) or not isinstance(data.get('requests'), list) or not data['requests']:
+        raise ValueError("requests must be a non-empty list")
+    if len(data['requests']) > MAX_REQUESTS:
+        raise ValueError(f"At most {MAX_REQUESTS} requests per batch")
+    atomic = data.get('atomic', False)
+    if not isinstance(atomic, bool):
+        raise ValueError("atomic must be true or false")
+
+    entries = []
+    for index, entry in enumerate(data['requests']):
+        if not isinstance(entry, dict):
+            raise ValueError(f"Request {index} must be an object")
+        method = str(entry.get('method', 'GET')).upper()
+        path = entry.get('path')
+        headers = entry.get('headers', {})
+        if method not in METHODS:
+            raise ValueError(f"Request {index}: method must be one of {', '.join(METHODS)}")
+        if not isinstance(path, str) or not path.startswith('/'):
+            raise ValueError(f"Request {index}: path must start with /")
+        if not isinstance(headers, dict) or not all(isinstance(value, str) for value in headers.values()):
+            raise ValueError(f"Request {index}: headers must map names to strings")
+        if method == 'GET' and entry.get('body') is not None:
+            raise ValueError(f"Request {index}: a GET has no body")
+        entries.append((method, path, entry.get('body'), headers))
+    return entries, atomic
+
+
+def _environ(outer, method, path, body, headers):
+    url = urlsplit(path)
+    payload = json.dumps(body).encode() if body is not None else b''
+    # The caller's headers, except what describes the batch itself: one
+    # Idempotency-Key cannot stand for several creates
+    environ = {
+        key: value for key, value in outer.META.items()
+        if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH', 'HTTP_IDEMPOTENCY_KEY')
+    }
+    environ.update({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(payload)),
+        'HTTP_ACCEPT': 'application/json',
+        'wsgi.input': BytesIO(payload),
+    })
+    for name, value in headers.items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = value
+    return environ
+
+
+def _answer(response):
+    if hasattr(response, 'data'):
+        # DRF response: hand the data over as is, the batch renders it once
+        body = response.data
+    elif response.streaming:
+        body = None
+    else:
+        body = response.content.decode(response.charset or 'utf-8', errors='replace')
+    return {'status': response.status_code, 'headers': dict(response.items()), 'body': body}
+
+
+def dispatch(outer, method, path, body=None, headers=None):
+    """Run one sub-request of `outer` through the URL resolver."""
+    request = WSGIRequest(_environ(outer, method, path, body, headers or {}))
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return {'status': 404, 'headers': {}, 'body': {'error': 'Not found'}}
+    if match.url_name == URL_NAME:
+        return {'status': 400, 'headers': {}, 'body': {'error': 'Batches cannot be nested'}}
+    request.resolver_match = match
+    try:
+        return _answer(match.func(request, *match.args, **match.kwargs))
+    except Exception:
+        # What Django's handler would answer for this request on its own,
+        # without failing the sub-requests around it
+        logger.exception("Batch sub-request %s %s failed", method, path)
+        return {'status': 500, 'headers': {}, 'body': {'error': 'Internal server error'}}
+
+
+def _pool():
+    global _executor
+    with _lock:
+        if _executor is None or _executor[0] != os.getpid():
+            _executor = (os.getpid(), ThreadPoolExecutor(max_workers=settings.BATCH_MAX_WORKERS,
+                                                         thread_name_prefix='batch'))
+        return _executor[1]
+
+
+def _dispatch_in_worker(outer, entry):
+    # What request_started / request_finished do for a request's connection
+    close_old_connections()
+    try:
+        return dispatch(outer, *entry)
+    finally:
+        close_old_connections()
+
+
+def run(outer, entries, atomic=False):
+    """
+    Dispatch `entries` (from parse()). Returns (answers, failed), `failed`
+    being the index an atomic batch stopped and rolled back at, else None.
+    """
+    if (not atomic and len(entries) > 1 and settings.BATCH_MAX_WORKERS > 1
+            and all(method == 'GET' for method, *_ in entries)):
+        return list(_pool().map(partial(_dispatch_in_worker, outer), entries)), None
+    if not atomic:
+        return [dispatch(outer, *entry) for entry in entries], None
+
+    answers = []
+    with transaction.atomic():
+        for index, entry in enumerate(entries):
+            answers.append(dispatch(outer, *entry))
+            if not 200 <= answers[-1]['status'] < 300:
+                transaction.set_rollback(True)
+                return answers, index
+    return answers, None
@@ -0,0 +1,52 @@
+"""
+The shop's calendar: which day, week, month and year a transaction falls
+in. Reports, rollups, the month-end close, the archive and the forecasts
+all count them in BUSINESS_TIME_ZONE through these helpers, whatever
+TIME_ZONE the server runs in, so a sale made just before midnight lands on
+the same day everywhere and their totals reconcile.
+"""
+from datetime import datetime, time
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db.models import DateTimeField
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+
+def tz():
+    return ZoneInfo(settings.BUSINESS_TIME_ZONE)
+
+
+def localtime(value=None):
+    """`value` (default: now) in business time."""
+    return timezone.localtime(value, tz())
+
+
+def localdate(value=None):
+    """The business day `value` (default: now) falls on."""
+    return localtime(value).date()
+
+
+def month_of(value):
+    """First day of the business month `value` falls in."""
+    return localdate(value).replace(day=1)
+
+
+def midnight(day):
+    """The moment the business day `day` starts."""
+    return timezone.make_aware(datetime.combine(day, time()), tz())
+
+
+class BusinessTrunc(Trunc):
+    """
+    Trunc(field, kind) with datetimes truncated in business time. Date
+    fields (the daily summaries' `day`) already are business days and are
+    truncated as they are.
+    """
+
+    def resolve_expression(self, *args, **kwargs):
+        copy = super().resolve_expression(*args, **kwargs)
+        if isinstance(copy.lhs.output_field, DateTimeField):
+            copy.tzinfo = tz()
+        return copy
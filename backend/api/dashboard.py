@@ -0,0 +1,195 @@
+"""
+The admin dashboard in one response (GET /api/dashboard/summary/).
+
+Today's sales, the week / month / year profit, stock value and low-stock
+count, the month's top products and the latest expenses, computed with
+one conditional aggregate per table rather than one query per figure:
+about seven statements on a cold cache.
+
+The result is cached under a data version that every write to the
+underlying tables bumps on commit (model signals, plus the queryset paths
+in voids.py and product_bulk.py), so a cached summary is never served
+after a change. The version lives in the DASHBOARD_CACHE cache: with
+several workers it has to be a shared one (Redis, Memcached) for writes
+in one worker to reach the others; DASHBOARD_CACHE_SECONDS bounds the
+staleness if it is not.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.signals import post_delete, post_save
+
+from . import business_time
+from .models import (
+    ClosedPeriod, Expense, ExpenseCategory, ExpenseDailySummary, PeriodDaySnapshot, Product, ProductMonthlySales,
+    Purchase, Sale, SalesDailySummary,
+)
+from .money import from_cents
+from .periods import open_only
+
+VERSION_KEY = 'dashboard:data-version'
+TOP_PRODUCTS = 5
+RECENT_EXPENSES = 5
+# Writes to these change some figure of the summary
+WATCHED_MODELS = [Sale, Purchase, Expense, ExpenseCategory, Product, ClosedPeriod]
+
+
+def _cache():
+    return caches[settings.DASHBOARD_CACHE]
+
+
+def data_version():
+    cache = _cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Start from the clock, not 1: if the key was evicted, the new
+        # version must not match summaries cached under an old one
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_data_version():
+    try:
+        _cache().incr(VERSION_KEY)
+    except ValueError:  # not set yet
+        data_version()
+
+
+def changed():
+    """Call after writing dashboard data without model signals (bulk paths)."""
+    transaction.on_commit(bump_data_version)
+
+
+def _changed(sender, **kwargs):
+    changed()
+
+
+def connect_signals():
+    for model in WATCHED_MODELS:
+        uid = f'dashboard-{model.__name__}'
+        post_save.connect(_changed, sender=model, dispatch_uid=f'{uid}-save')
+        post_delete.connect(_changed, sender=model, dispatch_uid=f'{uid}-delete')
+
+
+def get_summary():
+    """The dashboard summary, from the cache when nothing changed since it was built."""
+    today = business_time.localdate()
+    key = f'dashboard:summary:{data_version()}:{today}'
+    cache = _cache()
+    summary = cache.get(key)
+    if summary is None:
+        summary = build_summary(today)
+        cache.set(key, summary, settings.DASHBOARD_CACHE_SECONDS)
+    return summary
+
+
+def _window_sums(queryset, field, starts, sums, extra=None):
+    """
+    One statement summing every expression in `sums` over each window
+    {name: first day}, all windows running up to now.
+    """
+    aggregates = dict(extra or {})
+    for window, start in starts.items():
+        bound = business_time.midnight(start) if field == 'date' else start
+        condition = Q(**{f'{field}__gte': bound})
+        for name, expression in sums.items():
+            aggregates[f'{window}_{name}'] = Sum(expression, filter=condition)
+    return {key: value or 0 for key, value in queryset.aggregate(**aggregates).items()}
+
+
+def build_summary(today):
+    starts = {
+        'week': today - timedelta(days=today.weekday()),
+        'month': today.replace(day=1),
+        'year': today.replace(month=1, day=1),
+    }
+    first = min(starts.values())
+    open_day = ClosedPeriod.open_from()
+
+    sales = _window_sums(
+        open_only(Sale.objects.filter(voided=False, date__gte=business_time.midnight(first)), open_day), 'date',
+        {'today': today, **starts},
+        {'units': F('quantity'), 'revenue': F('total_price_cents'),
+         'cogs': F('quantity') * F('product__buying_price_cents')},
+        extra={'today_count': Count('id', filter=Q(date__gte=business_time.midnight(today)))},
+    )
+    expenses = _window_sums(
+        open_only(Expense.objects.filter(date__gte=business_time.midnight(first)), open_day), 'date',
+        starts, {'expenses': F('amount_cents')},
+    )
+    totals = [sales, expenses]
+    # Closed months of this year (or of the week) come from the snapshots
+    if open_day is not None and open_day > first:
+        totals.append(_window_sums(
+            PeriodDaySnapshot.objects.filter(day__gte=first), 'day', starts,
+            {'revenue': F('revenue_cents'), 'cogs': F('cogs_cents'), 'expenses': F('expenses_cents')},
+        ))
+    # Archived years only reach into a week that started last year
+    if first.year < today.year:
+        totals.append(_window_sums(
+            open_only(SalesDailySummary.objects.filter(day__gte=first), open_day, 'day'), 'day', starts,
+            {'revenue': F('revenue_cents'), 'cogs': F('cogs_cents')},
+        ))
+        totals.append(_window_sums(
+            open_only(ExpenseDailySummary.objects.filter(day__gte=first), open_day, 'day'), 'day', starts,
+            {'expenses': F('amount_cents')},
+        ))
+
+    profit = {}
+    for window, start in starts.items():
+        revenue, cogs, expenses_total = (
+            sum(part.get(f'{window}_{name}', 0) for part in totals) for name in ('revenue', 'cogs', 'expenses')
+        )
+        profit[window] = {
+            'start': start,
+            'revenue': from_cents(revenue),
+            'cogs': from_cents(cogs),
+            'expenses': from_cents(expenses_total),
+            'profit': from_cents(revenue - cogs - expenses_total),
+        }
+
+    stock = Product.objects.aggregate(
+        products=Count('id'),
+        value=Sum(F('stock') * F('buying_price_cents')),
+        out_of_stock=Count('id', filter=Q(stock=0)),
+        # Runs out within the supplier lead time, by the stored cover (see
+        # /api/inventory/reorder/ for the exact list)
+        low_stock=Count('id', filter=Q(days_of_cover__lte=settings.REORDER_LEAD_TIME_DAYS)),
+    )
+
+    top_products = [
+        {'id': row['product_id'], 'name': row['product__name'], 'brand': row['product__brand'],
+         'quantity': row['quantity'], 'revenue': row['revenue']}
+        for row in ProductMonthlySales.objects.filter(month=starts['month'], quantity__gt=0)
+        .order_by('-revenue', 'product_id')
+        .values('product_id', 'product__name', 'product__brand', 'quantity', 'revenue')[:TOP_PRODUCTS]
+    ]
+    recent_expenses = [
+        {'id': row['id'], 'title': row['title'], 'amount': row['amount'], 'category': row['category__name'],
+         'date': row['date']}
+        for row in Expense.objects.order_by('-date', '-id')
+        .values('id', 'title', 'amount', 'category__name', 'date')[:RECENT_EXPENSES]
+    ]
+
+    return {
+        'date': today,
+        'today': {
+            'sales_count': sales['today_count'],
+            'units': sales['today_units'],
+            'revenue': from_cents(sales['today_revenue']),
+        },
+        'profit': profit,
+        'stock': {
+            'products': stock['products'],
+            'value': from_cents(stock['value'] or 0),
+            'out_of_stock': stock['out_of_stock'],
+            'low_stock': stock['low_stock'],
+        },
+        'top_products': top_products,
+        'recent_expenses': recent_expenses,
+    }
@@ -0,0 +1,123 @@
+"""
+Sparse fieldsets and nested expansion for list and retrieve.
+
+- ?fields=id,quantity,total_price keeps only those fields in the response,
+  and the query only loads the columns behind them (.only()).
+- ?expand=product renders the product itself instead of its id, joined in
+  the same query (select_related) rather than fetched one request per row.
+
+Requests without either parameter, and all writes, get the full
+serializer exactly as before.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+ACTIONS = ('list', 'retrieve')
+
+
+def _names(value):
+    return [name for name in (part.strip() for part in value.split(',')) if name] if value else []
+
+
+def _column(model, attrs):
+    """
+    The ORM path of the column behind a field's source attrs, following
+    foreign keys ('product__name'), or None if it is not a plain column.
+    """
+    path = []
+    for index, attr in enumerate(attrs):
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if not field.concrete or field.many_to_many:
+            return None
+        path.append(attr)
+        if index < len(attrs) - 1:
+            if not field.many_to_one:
+                return None
+            model = field.related_model
+    return '__'.join(path) or None
+
+
+class SparseFieldsMixin:
+    """
+    Mix into a ModelViewSet (before it) for ?fields= and ?expand= on list
+    and retrieve. `expandable_fields` maps a foreign key field to the
+    serializer class that renders it expanded.
+
+    A serializer can list extra columns a field reads when rendered in
+    `sparse_columns` ({field: [column, ...]}), e.g. a flag checked in
+    to_representation, so they are not loaded one row at a time.
+    """
+    expandable_fields = {}
+
+    def get_fieldset(self):
+        """(fields or None, expand) asked for in the query string, validated."""
+        if not hasattr(self, '_fieldset'):
+            fields, expand = None, []
+            if getattr(self, 'action', None) in ACTIONS:
+                params = self.request.query_params
+                fields = _names(params.get(FIELDS_PARAM)) or None
+                expand = _names(params.get(EXPAND_PARAM))
+                unknown = sorted(set(expand) - set(self.expandable_fields))
+                if unknown:
+                    raise serializers.ValidationError({EXPAND_PARAM: f"Cannot expand: {', '.join(unknown)}"})
+            self._fieldset = fields, expand
+        return self._fieldset
+
+    def sparse_fields(self, serializer):
+        """Drop and expand `serializer.fields` in place. Returns the fields."""
+        wanted, expand = self.get_fieldset()
+        fields = serializer.fields
+        if wanted is not None:
+            unknown = sorted(set(wanted) - set(fields))
+            if unknown:
+                raise serializers.ValidationError({FIELDS_PARAM: f"Unknown fields: {', '.join(unknown)}"})
+            for name in list(fields):
+                if name not in wanted:
+                    fields.pop(name)
+        for name in expand:
+            if name in fields:
+                source = fields[name].source
+                kwargs = {} if source == name else {'source': source}
+                fields[name] = self.expandable_fields[name](read_only=True, **kwargs)
+        return fields
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if self.get_fieldset() != (None, []):
+            self.sparse_fields(getattr(serializer, 'child', serializer))
+        return serializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        wanted, expand = self.get_fieldset()
+        if (wanted, expand) == (None, []):
+            return queryset
+
+        serializer = self.get_serializer_class()(context=self.get_serializer_context())
+        fields = self.sparse_fields(serializer)
+        expanded = {fields[name].source for name in expand if name in fields}
+        columns, related = set(), set(expanded)
+        for name, field in fields.items():
+            column = _column(queryset.model, field.source_attrs)
+            if column is None:
+                # Rendered from something other than a column: load whole rows
+                columns = None
+                break
+            columns.add(column)
+            columns.update(getattr(serializer, 'sparse_columns', {}).get(name, []))
+            if '__' in column:
+                related.add(column.rsplit('__', 1)[0])
+
+        if columns is not None and wanted is not None:
+            # Expanded objects are rendered whole, so load all of their columns
+            queryset = queryset.only(*{
+                column for column in columns if column in expanded or column.split('__', 1)[0] not in expanded
+            })
+            # Joins the trimmed fields no longer need would clash with .only()
+            queryset = queryset.select_related(None)
+        return queryset.select_related(*related) if related else queryset
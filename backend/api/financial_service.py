@@ -2,7 +2,13 @@ from django.db.models import Sum, Q
 from django.utils import timezone
 from datetime import datetime, timedelta
 from calendar import monthrange
+from . import business_time
 from .models import Purchase, Expense, Sale  # Assuming you have a Sale model
+from .models import PurchaseDailySummary, ExpenseDailySummary, SalesDailySummary
+from .models import ClosedPeriod, PeriodDaySnapshot, PeriodExpenseSnapshot
+from .reports import UNCATEGORIZED
+from .money import from_cents
+from .periods import open_only
 
 
 class FinancialService:
@@ -10,8 +16,8 @@ class FinancialService:
     
     @staticmethod
     def get_date_ranges(period_type, year=None, month=None, week=None):
-        """Get start and end dates for different periods"""
-        now = timezone.now()
+        """Get start and end dates for different periods, in business time"""
+        now = business_time.localtime()
         
         if period_type == 'weekly':
             if week:
@@ -41,35 +47,78 @@ class FinancialService:
             year = year or now.year
             start_date = datetime(year, 1, 1)
             end_date = datetime(year, 12, 31, 23, 59, 59)
-            
-        return start_date, end_date
+
+        # Bounds built from numbers are naive: they are business time too
+        return tuple(
+            value if timezone.is_aware(value) else timezone.make_aware(value, business_time.tz())
+            for value in (start_date, end_date)
+        )
 
     @staticmethod
     def calculate_purchases_cost(start_date, end_date):
         """Calculate total purchase costs for a period"""
-        purchases = Purchase.objects.filter(
+        # Closed months come from their snapshots
+        open_day = ClosedPeriod.open_from()
+        purchases = open_only(Purchase.objects.filter(
             date__range=[start_date, end_date]
-        ).aggregate(
-            total_cost=Sum('total_cost'),
+        ), open_day).aggregate(
+            total_cost=Sum('total_cost_cents'),
             total_quantity=Sum('quantity')
         )
+        archived = open_only(PurchaseDailySummary.objects.filter(
+            day__range=[start_date.date(), end_date.date()]
+        ), open_day, 'day').aggregate(
+            total_cost=Sum('total_cost_cents'),
+            total_quantity=Sum('quantity')
+        )
+        closed = PeriodDaySnapshot.objects.filter(
+            day__range=[start_date.date(), end_date.date()]
+        ).aggregate(
+            total_cost=Sum('purchases_cents'),
+            total_quantity=Sum('purchase_quantity')
+        )
         
         return {
-            'total_cost': purchases['total_cost'] or 0,
-            'total_quantity': purchases['total_quantity'] or 0
+            'total_cost': from_cents(sum(agg['total_cost'] or 0 for agg in (purchases, archived, closed))),
+            'total_quantity': sum(agg['total_quantity'] or 0 for agg in (purchases, archived, closed))
         }
 
     @staticmethod
     def calculate_expenses(start_date, end_date):
-        """Calculate total expenses for a period"""
-        expenses = Expense.objects.filter(
+        """Calculate total expenses for a period, with a per-category breakdown"""
+        open_day = ClosedPeriod.open_from()
+        expenses = open_only(Expense.objects.filter(
             date__range=[start_date, end_date]
-        ).aggregate(
-            total_amount=Sum('amount')
-        )
-        
+        ), open_day).values('category_id', 'category__name').annotate(
+            total_amount=Sum('amount_cents')
+        ).order_by()
+        archived = open_only(ExpenseDailySummary.objects.filter(
+            day__range=[start_date.date(), end_date.date()]
+        ), open_day, 'day').values('category_id', 'category__name').annotate(
+            total_amount=Sum('amount_cents')
+        ).order_by()
+        closed = PeriodExpenseSnapshot.objects.filter(
+            day__range=[start_date.date(), end_date.date()]
+        ).values('category_id', 'category_name').annotate(
+            total_amount=Sum('amount_cents')
+        ).order_by()
+
+        by_category = {}
+        # Snapshots keep the category name as it was at the close
+        closed = [{**row, 'category__name': row['category_name']} for row in closed]
+        for row in list(expenses) + list(archived) + closed:
+            entry = by_category.setdefault(row['category_id'], {
+                'category_id': row['category_id'],
+                'category': row['category__name'] or UNCATEGORIZED,
+                'amount': 0,
+            })
+            entry['amount'] += row['total_amount'] or 0
+        for entry in by_category.values():
+            entry['amount'] = from_cents(entry['amount'])
+
         return {
-            'total_expenses': expenses['total_amount'] or 0
+            'total_expenses': sum(entry['amount'] for entry in by_category.values()),
+            'by_category': sorted(by_category.values(), key=lambda entry: -entry['amount']),
         }
 
     @staticmethod
@@ -87,15 +136,26 @@ class FinancialService:
         #     date = models.DateTimeField(auto_now_add=True)
         
         try:
-            sales = Sale.objects.filter(
-                date__range=[start_date, end_date]
-            ).aggregate(
-                total_price=Sum('total_price'),
+            open_day = ClosedPeriod.open_from()
+            sales = open_only(Sale.objects.filter(
+                date__range=[start_date, end_date], voided=False
+            ), open_day).aggregate(
+                total_price=Sum('total_price_cents'),
                 #total_quantity=Sum('quantity')
             )
+            archived = open_only(SalesDailySummary.objects.filter(
+                day__range=[start_date.date(), end_date.date()]
+            ), open_day, 'day').aggregate(
+                total_price=Sum('revenue_cents'),
+            )
+            closed = PeriodDaySnapshot.objects.filter(
+                day__range=[start_date.date(), end_date.date()]
+            ).aggregate(
+                total_price=Sum('revenue_cents'),
+            )
             
             return {
-                'total_price': sales['total_price'] or 0,
+                'total_price': from_cents(sum(agg['total_price'] or 0 for agg in (sales, archived, closed))),
                 #'total_quantity_sold': sales['total_quantity'] or 0
             }
         except:
@@ -149,7 +209,10 @@ class FinancialService:
                 'cost_of_goods_sold': float(cogs),
                 'total_purchases': float(total_purchases),
                 'purchase_quantity': purchases_data['total_quantity'],
-                'operating_expenses': float(operating_expenses)
+                'operating_expenses': float(operating_expenses),
+                'operating_expenses_by_category': [
+                    {**entry, 'amount': float(entry['amount'])} for entry in expenses_data['by_category']
+                ]
             },
             'profitability': {
                 'gross_profit': float(gross_profit),
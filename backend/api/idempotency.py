@@ -0,0 +1,101 @@
+"""
+Idempotency-Key support for create endpoints.
+
+The first request with a given key runs normally and its response is stored
+in the same transaction as the write. Retries with the same key by the same
+client (user, or address when anonymous) on the same path get the stored
+response back from one indexed lookup, without running the create again.
+Failed requests (validation errors, exceptions) are rolled back together
+with the key, so the client can fix the request and reuse it.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.throttling import BaseThrottle
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+
+
+def key_ttl():
+    return timedelta(hours=getattr(settings, 'IDEMPOTENCY_KEY_TTL_HOURS', 24))
+
+
+def purge_expired_keys(now=None):
+    """Delete stored responses older than the TTL. Returns how many went."""
+    cutoff = (now or timezone.now()) - key_ttl()
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+def client_of(request):
+    """Whose keys these are: the user, or for anonymous callers their address."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    return f"ip:{BaseThrottle().get_ident(request)}"
+
+
+def _stored(client, scope, key):
+    record = IdempotencyKey.objects.filter(client=client, scope=scope, key=key).first()
+    if record is not None and record.created_at < timezone.now() - key_ttl():
+        # Expired but not purged yet: free the key for this request
+        record.delete()
+        return None
+    return record
+
+
+def _replay(record, fingerprint):
+    if record.fingerprint != fingerprint:
+        return Response(
+            {"error": f"{HEADER} was already used with a different request body"},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(record.response_body, status=record.status_code, headers={'Idempotent-Replayed': 'true'})
+
+
+class IdempotentCreateMixin:
+    """
+    Mix into a ModelViewSet (before it) to honour the Idempotency-Key header
+    on create. Requests without the header behave exactly as before.
+    """
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return super().create(request, *args, **kwargs)
+        if not key or len(key) > 255:
+            return Response({"error": f"{HEADER} must be 1 to 255 characters"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Keys are the client's own: another client's identical key is a different request
+        client = client_of(request)
+        scope = f"{request.method} {request.path}"
+        fingerprint = hashlib.sha256(request.body).hexdigest()
+        record = _stored(client, scope, key)
+        if record is not None:
+            return _replay(record, fingerprint)
+
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    key=key, client=client, scope=scope, fingerprint=fingerprint,
+                    status_code=status.HTTP_202_ACCEPTED,
+                )
+                response = super().create(request, *args, **kwargs)
+                record.status_code = response.status_code
+                record.response_body = response.data
+                record.save(update_fields=['status_code', 'response_body'])
+        except IntegrityError:
+            # A concurrent request with the same key committed first; on
+            # PostgreSQL our insert waited for it, so its response is there.
+            record = _stored(client, scope, key)
+            if record is None:
+                raise
+            return _replay(record, fingerprint)
+        return response
@@ -0,0 +1,245 @@
+"""
+Sales velocity and reorder points.
+
+Velocity is an exponentially weighted rate of units sold per day with a
+configurable half-life (SALES_VELOCITY_HALF_LIFE_DAYS). Each sale updates
+it in O(1): decay the stored rate to the sale time, then add quantity / tau.
+Product.days_of_cover (stock / velocity) is stored and indexed, so the
+reorder list is an index range scan instead of a scan over all sales.
+
+Hot products can have their stock striped over StockShard rows
+(Product.stock_shards > 0). Sales then decrement a random shard instead of
+rewriting the Product row, and Product.stock, velocity and days of cover
+become a snapshot refreshed by sync_sharded_stock().
+"""
+import math
+import random
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BigIntegerField, Case, F, OuterRef, Subquery, Sum, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import business_time
+from .business_time import BusinessTrunc
+
+SECONDS_PER_DAY = 86400
+
+
+def velocity_tau():
+    """Time constant in days: half-life / ln 2."""
+    half_life = getattr(settings, 'SALES_VELOCITY_HALF_LIFE_DAYS', 14)
+    return half_life / math.log(2)
+
+
+def decayed_velocity(velocity, updated_at, when):
+    if not velocity or updated_at is None:
+        return 0.0
+    elapsed_days = max((when - updated_at).total_seconds(), 0) / SECONDS_PER_DAY
+    return velocity * math.exp(-elapsed_days / velocity_tau())
+
+
+def days_of_cover(stock, velocity):
+    """None means nothing is selling, i.e. the stock lasts forever."""
+    if velocity <= 0:
+        return None
+    return stock / velocity
+
+
+def record_units_sold(product, quantity, when=None):
+    """
+    Fold `quantity` units sold at `when` into product.sales_velocity.
+    Negative quantities (a sale edited down) are allowed; the rate never
+    goes below zero. The caller saves the product.
+    """
+    when = when or timezone.now()
+    velocity = decayed_velocity(product.sales_velocity, product.velocity_updated_at, when)
+    product.sales_velocity = max(velocity + quantity / velocity_tau(), 0.0)
+    product.velocity_updated_at = when
+
+
+def rebuild_velocities(batch_size=2_000, product_ids=None):
+    """
+    Recompute every product's velocity from the sales history, e.g. after
+    seed_dataset. Uses one grouped query over daily unit totals.
+    `product_ids` limits the work to those products.
+    """
+    from .models import Product, Sale, SalesDailySummary
+
+    now = timezone.now()
+    tau = velocity_tau()
+    totals = defaultdict(float)
+    sales = Sale.objects.filter(voided=False)
+    summaries = SalesDailySummary.objects.all()
+    products = Product.objects.only('id', 'stock')
+    if product_ids is not None:
+        sales = sales.filter(product_id__in=product_ids)
+        summaries = summaries.filter(product_id__in=product_ids)
+        products = products.filter(pk__in=product_ids)
+    daily = (
+        sales.annotate(day=BusinessTrunc('date', 'day'))
+        .values('product_id', 'day')
+        .annotate(units=Sum('quantity'))
+    )
+    for row in daily:
+        age_days = max((now - row['day']).total_seconds(), 0) / SECONDS_PER_DAY
+        totals[row['product_id']] += row['units'] * math.exp(-age_days / tau) / tau
+    # Archived days older than 20 tau weigh less than 1e-8, skip them
+    archived = summaries.values('product_id', 'day', 'quantity')
+    today = business_time.localdate(now)
+    for row in archived.filter(day__gte=today - timedelta(days=tau * 20)):
+        age_days = (today - row['day']).days
+        totals[row['product_id']] += row['quantity'] * math.exp(-age_days / tau) / tau
+
+    products = list(products)
+    for product in products:
+        product.sales_velocity = totals.get(product.pk, 0.0)
+        product.velocity_updated_at = now
+        product.days_of_cover = days_of_cover(product.stock, product.sales_velocity)
+    Product.objects.bulk_update(
+        products, ['sales_velocity', 'velocity_updated_at', 'days_of_cover'], batch_size=batch_size
+    )
+    return len(products)
+
+
+def available_stock(product):
+    """Live stock: the Product row, or the sum of its shards."""
+    if hasattr(product, 'available_stock'):  # annotated by with_available_stock()
+        return product.available_stock
+    if not product.stock_shards:
+        return product.stock
+    return product.shards.aggregate(total=Sum('quantity'))['total'] or 0
+
+
+def with_available_stock(products):
+    """
+    Annotate `available_stock` (see available_stock()) on a Product queryset,
+    so listing sharded products sums their shards in the same query.
+    """
+    from .models import StockShard
+
+    shard_total = (
+        StockShard.objects.filter(product=OuterRef('pk')).order_by()
+        .values('product').annotate(total=Sum('quantity')).values('total')
+    )
+    return products.annotate(available_stock=Case(
+        When(stock_shards=0, then=F('stock')),
+        default=Coalesce(Subquery(shard_total), 0),
+        output_field=BigIntegerField(),
+    ))
+
+
+def take_stock(product, quantity):
+    """
+    Remove `quantity` units from a sharded product. Shards are tried in
+    random order with a conditional UPDATE, so concurrent sales mostly hit
+    different rows. If no single shard holds enough, all shards are locked
+    and drained in order. Raises ValueError when the total is too small.
+    """
+    from .models import StockShard
+
+    shards = StockShard.objects.filter(product_id=product.pk)
+    for index in random.sample(range(product.stock_shards), product.stock_shards):
+        if shards.filter(index=index, quantity__gte=quantity).update(quantity=F('quantity') - quantity):
+            return
+    locked = list(shards.select_for_update().order_by('index'))
+    if sum(shard.quantity for shard in locked) < quantity:
+        raise ValueError("Insufficient stock")
+    remaining = quantity
+    for shard in locked:
+        taken = min(shard.quantity, remaining)
+        shard.quantity -= taken
+        remaining -= taken
+    StockShard.objects.bulk_update(locked, ['quantity'])
+
+
+def return_stock(product, quantity):
+    """Add `quantity` units to a random shard of a sharded product."""
+    from .models import StockShard
+
+    StockShard.objects.filter(
+        product_id=product.pk, index=random.randrange(product.stock_shards)
+    ).update(quantity=F('quantity') + quantity)
+
+
+def shard_stock(product, shards, stock=None):
+    """
+    Spread the product's stock (or `stock`, when setting a new level) evenly
+    over `shards` StockShard rows. shards=0 moves it back into Product.stock.
+    Resharding an already sharded product keeps its live total.
+    """
+    from .models import Product, StockShard
+
+    with transaction.atomic():
+        product = Product.objects.select_for_update().get(pk=product.pk)
+        if stock is None and product.stock_shards:
+            # Lock the shards too so no sale slips in between
+            stock = sum(shard.quantity for shard in product.shards.select_for_update())
+        elif stock is None:
+            stock = product.stock
+        StockShard.objects.filter(product=product).delete()
+        per_shard, extra = divmod(stock, shards) if shards else (0, 0)
+        StockShard.objects.bulk_create([
+            StockShard(product=product, index=index, quantity=per_shard + (1 if index < extra else 0))
+            for index in range(shards)
+        ])
+        product.stock_shards = shards
+        product.stock = stock
+        product.save(update_fields=['stock_shards', 'stock'])
+    return product
+
+
+def sync_sharded_stock():
+    """
+    Refresh the Product.stock snapshot, velocity and days of cover of every
+    sharded product from its shards and sales. Run it periodically
+    (`manage.py shard_stock --sync`). Returns the number of products synced.
+    """
+    from .models import Product
+
+    products = list(Product.objects.filter(stock_shards__gt=0).annotate(live=Sum('shards__quantity')))
+    for product in products:
+        product.stock = product.live or 0
+    Product.objects.bulk_update(products, ['stock'])
+    if products:
+        rebuild_velocities(product_ids=[product.pk for product in products])
+    return len(products)
+
+
+def reorder_candidates(lead_time_days, target_days, now=None):
+    """
+    Products whose stock runs out within `lead_time_days`, most urgent first,
+    with a suggested order quantity covering `target_days` of demand.
+
+    The stored days_of_cover is as of the last sale, and velocity only decays
+    afterwards, so it never overstates cover: the index scan finds every real
+    candidate and the current figures are rechecked here.
+    """
+    from .models import Product
+
+    now = now or timezone.now()
+    candidates = (
+        Product.objects.filter(days_of_cover__lte=lead_time_days)
+        .order_by('days_of_cover', 'id')
+        .only('id', 'name', 'brand', 'stock', 'sales_velocity', 'velocity_updated_at', 'days_of_cover')
+    )
+    results = []
+    for product in candidates:
+        velocity = decayed_velocity(product.sales_velocity, product.velocity_updated_at, now)
+        cover = days_of_cover(product.stock, velocity)
+        if cover is None or cover > lead_time_days:
+            continue
+        results.append({
+            'id': product.id,
+            'name': product.name,
+            'brand': product.brand,
+            'stock': product.stock,
+            'daily_velocity': round(velocity, 3),
+            'days_of_cover': round(cover, 1),
+            'reorder_quantity': max(math.ceil(velocity * target_days - product.stock), 0),
+        })
+    results.sort(key=lambda row: row['days_of_cover'])
+    return results
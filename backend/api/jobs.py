@@ -0,0 +1,315 @@
+"""
+Database-backed background jobs.
+
+The API enqueues Job rows; `manage.py run_workers` processes claim them one
+at a time and run the handler registered for the job's kind. On databases
+that support it (PostgreSQL) the claim is SELECT ... FOR UPDATE SKIP LOCKED,
+so workers never wait on each other. On SQLite, which has no row locks,
+a job is claimed with a conditional UPDATE (status still 'queued'), and the
+worker that loses the race just tries the next one.
+
+A running job's worker touches heartbeat_at every JOB_HEARTBEAT_SECONDS.
+Jobs whose heartbeat stopped for JOB_STALE_AFTER_MINUTES are put back in
+the queue; a worker only stores a result while the job is still its own.
+Finished jobs and their files go after JOB_RESULT_TTL_DAYS.
+"""
+import csv
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import parquet_export
+from .financial_service import FinancialService
+from .models import Job, Sale
+from .reports import write_profit_csv
+
+# Handlers return either JSON-serialisable data or a FileResult: a file
+# they wrote under JOB_FILES_DIR with result_file(), served as `filename`
+FileResult = namedtuple('FileResult', ['path', 'filename', 'content_type'])
+
+Handler = namedtuple('Handler', ['run', 'validate'])
+HANDLERS = {}
+
+
+def register(kind, validate=None):
+    """
+    Register `fn(params)` as the handler for `kind`. `validate(params)` runs
+    when the job is enqueued and raises ValueError for bad parameters.
+    """
+    def decorator(fn):
+        HANDLERS[kind] = Handler(fn, validate)
+        return fn
+    return decorator
+
+
+def enqueue(kind, params=None, user=None):
+    handler = HANDLERS.get(kind)
+    if handler is None:
+        raise ValueError(f"Unknown job kind '{kind}'. Choose from {', '.join(sorted(HANDLERS))}.")
+    params = params or {}
+    if handler.validate is not None:
+        handler.validate(params)
+    return Job.objects.create(kind=kind, params=params, created_by=user)
+
+
+def files_dir():
+    return Path(settings.JOB_FILES_DIR)
+
+
+@contextmanager
+def result_file(filename):
+    """
+    Open a new file under JOB_FILES_DIR for a handler's result and yield
+    (file, path). It is written under a temporary name and only appears
+    once complete; a handler that fails leaves nothing behind.
+    """
+    directory = files_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{uuid.uuid4().hex}-{filename}"
+    partial = path.with_name(path.name + '.tmp')
+    try:
+        with open(partial, 'w', newline='', encoding='utf-8') as out:
+            yield out, path
+        os.replace(partial, path)
+    finally:
+        if partial.exists():
+            partial.unlink()
+
+
+def result_path(job):
+    """Absolute path of a job's result file."""
+    return files_dir() / job.result_path
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_next(worker=None):
+    """Mark the oldest queued job as running for this worker and return it, or None."""
+    worker = worker or worker_name()
+    queued = Job.objects.filter(status=Job.QUEUED).order_by('created_at', 'pk')
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = queued.select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            _mark_running(job, worker)
+            job.save(update_fields=['status', 'started_at', 'heartbeat_at', 'worker', 'attempts'])
+            return job
+
+    while True:
+        job = queued.first()
+        if job is None:
+            return None
+        _mark_running(job, worker)
+        claimed = Job.objects.filter(pk=job.pk, status=Job.QUEUED).update(
+            status=job.status, started_at=job.started_at, heartbeat_at=job.heartbeat_at, worker=worker,
+            attempts=job.attempts,
+        )
+        if claimed:
+            return job
+
+
+def _mark_running(job, worker):
+    job.status = Job.RUNNING
+    job.started_at = job.heartbeat_at = timezone.now()
+    job.worker = worker
+    job.attempts += 1
+
+
+def _owned(job):
+    """The job's row, as long as it is still this run of it (not requeued since)."""
+    return Job.objects.filter(pk=job.pk, status=Job.RUNNING, worker=job.worker, attempts=job.attempts)
+
+
+def touch(job):
+    """Refresh a running job's heartbeat. False once the job is no longer ours."""
+    return bool(_owned(job).update(heartbeat_at=timezone.now()))
+
+
+@contextmanager
+def heartbeat(job, interval=None):
+    """Touch `job` from a thread every `interval` seconds while the block runs."""
+    interval = settings.JOB_HEARTBEAT_SECONDS if interval is None else interval
+    stopped = threading.Event()
+
+    def beat():
+        try:
+            while not stopped.wait(interval) and touch(job):
+                pass
+        finally:
+            connection.close()  # this thread's own connection
+
+    thread = threading.Thread(target=beat, name=f'job-{job.pk}-heartbeat', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def run_job(job):
+    """
+    Run a claimed job and store its result or the error. Returns False, and
+    drops the result, when the job was requeued meanwhile.
+    """
+    output = None
+    with heartbeat(job):
+        try:
+            output = HANDLERS[job.kind].run(job.params)
+        except Exception:
+            job.status = Job.FAILED
+            job.error = traceback.format_exc()
+        else:
+            job.status = Job.DONE
+            if isinstance(output, FileResult):
+                job.result_path = Path(output.path).name
+                job.result_filename = output.filename
+                job.result_content_type = output.content_type
+            else:
+                job.result = output
+    job.finished_at = timezone.now()
+    stored = _owned(job).update(
+        status=job.status, error=job.error, result=job.result, result_path=job.result_path,
+        result_filename=job.result_filename, result_content_type=job.result_content_type,
+        finished_at=job.finished_at,
+    )
+    if not stored and isinstance(output, FileResult):
+        Path(output.path).unlink(missing_ok=True)
+    return bool(stored)
+
+
+def requeue_stale(now=None):
+    """
+    Put back jobs whose worker stopped sending heartbeats (it died). A job
+    that has used up JOB_MAX_ATTEMPTS is failed instead, so a job that kills
+    its worker cannot loop forever.
+    """
+    cutoff = (now or timezone.now()) - timedelta(minutes=settings.JOB_STALE_AFTER_MINUTES)
+    stale = Job.objects.filter(status=Job.RUNNING, heartbeat_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=settings.JOB_MAX_ATTEMPTS).update(
+        status=Job.FAILED, finished_at=timezone.now(), error="Worker stopped before the job finished.",
+    )
+    requeued = stale.update(status=Job.QUEUED, started_at=None, heartbeat_at=None, worker='')
+    return requeued, failed
+
+
+def purge_expired(now=None):
+    """Delete jobs finished more than JOB_RESULT_TTL_DAYS ago, and their files. Returns how many went."""
+    cutoff = (now or timezone.now()) - timedelta(days=settings.JOB_RESULT_TTL_DAYS)
+    expired = Job.objects.filter(status__in=[Job.DONE, Job.FAILED], finished_at__lt=cutoff)
+    for job in expired.exclude(result_path='').only('pk', 'result_path'):
+        result_path(job).unlink(missing_ok=True)
+    deleted, _ = expired.delete()
+    return deleted
+
+
+def work(worker=None, once=False, poll_interval=None, stop=None):
+    """
+    Worker loop: claim and run jobs until `stop()` is true, sleeping
+    `poll_interval` seconds when the queue is empty. With once=True it
+    returns as soon as the queue is empty. Returns the number of jobs run.
+    """
+    worker = worker or worker_name()
+    poll_interval = settings.JOB_POLL_INTERVAL_SECONDS if poll_interval is None else poll_interval
+    processed = 0
+    while not (stop and stop()):
+        job = claim_next(worker)
+        if job is None:
+            if once:
+                break
+            requeue_stale()
+            purge_expired()
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+        processed += 1
+    return processed
+
+
+# ---- handlers -------------------------------------------------------------
+
+REPORT_PERIODS = ['weekly', 'monthly', 'yearly']
+CSV_PERIODS = ['daily', 'weekly', 'monthly', 'yearly', 'overall']
+
+
+def _int_params(params, *names):
+    values = {}
+    for name in names:
+        value = params.get(name)
+        if value is not None:
+            try:
+                values[name] = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{name} must be an integer")
+    return values
+
+
+def _validate_financial_report(params):
+    if params.get('period') not in REPORT_PERIODS:
+        raise ValueError(f"period must be one of {', '.join(REPORT_PERIODS)}")
+    _int_params(params, 'year', 'month', 'week')
+
+
+@register('financial_report', validate=_validate_financial_report)
+def financial_report(params):
+    return FinancialService.generate_financial_report(params['period'], **_int_params(params, 'year', 'month', 'week'))
+
+
+def _validate_profit_csv(params):
+    if params.get('period', 'daily') not in CSV_PERIODS:
+        raise ValueError(f"period must be one of {', '.join(CSV_PERIODS)}")
+
+
+@register('profit_csv', validate=_validate_profit_csv)
+def profit_csv(params):
+    period = params.get('period', 'daily')
+    filename = f"{period}_profits.csv"
+    with result_file(filename) as (out, path):
+        write_profit_csv(out, period)
+    return FileResult(path, filename, 'text/csv')
+
+
+@register('sales_csv')
+def sales_csv(params):
+    """Every sale in the hot table, streamed from the database to the file in chunks."""
+    with result_file('sales.csv') as (out, path):
+        writer = csv.writer(out)
+        writer.writerow(['ID', 'Date', 'Product', 'Brand', 'Quantity', 'Total Price', 'Voided'])
+        rows = (
+            Sale.objects.order_by('pk')
+            .values_list('pk', 'date', 'product__name', 'product__brand', 'quantity', 'total_price', 'voided')
+        )
+        for row in rows.iterator(chunk_size=5_000):
+            writer.writerow(row)
+    return FileResult(path, 'sales.csv', 'text/csv')
+
+
+def _validate_parquet_export(params):
+    tables = params.get('tables')
+    if tables is not None:
+        if not isinstance(tables, list) or not set(tables) <= set(parquet_export.TABLES):
+            raise ValueError(f"tables must be a list drawn from {', '.join(parquet_export.TABLES)}")
+    if not isinstance(params.get('full', False), bool):
+        raise ValueError("full must be true or false")
+    parquet_export.require_pyarrow()
+
+
+@register('parquet_export', validate=_validate_parquet_export)
+def parquet_export_job(params):
+    """Append new rows to the Parquet files in PARQUET_EXPORT_DIR."""
+    return parquet_export.export_all(params.get('tables'), full=params.get('full', False))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import business_time
+from api.archive import archive_transactions
+
+
+class Command(BaseCommand):
+    help = "Move sales, purchases and expenses of closed years into the archive tables and daily summaries"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--through-year', type=int,
+                            help="Archive everything dated up to the end of this year (default: last year)")
+        parser.add_argument('--batch-size', type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        through_year = options['through_year'] or business_time.localdate().year - 1
+        try:
+            moved = archive_transactions(through_year, batch_size=options['batch_size'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(
+            f"Archived through {through_year}: {moved['sales']} sales, "
+            f"{moved['purchases']} purchases, {moved['expenses']} expenses"
+        )
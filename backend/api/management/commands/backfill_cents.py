@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.money import backfill_cents
+
+
+class Command(BaseCommand):
+    help = "Recompute every *_cents money column from its decimal column"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100_000, help="Rows per UPDATE statement")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        backfill_cents(batch_size=options['batch_size'], log=self.stdout.write)
@@ -0,0 +1,307 @@
+import asyncio
+import json
+import math
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from itertools import count
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import AsyncClient, Client, override_settings
+from django.utils import timezone
+
+from api.models import Expense, Product, Purchase, Sale
+
+
+# Everything the benchmark creates hangs off products of this brand
+BENCH_BRAND = "__bench__"
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class Scenario:
+    """
+    One endpoint call. `prepare` runs untimed before each request and returns
+    the URL (so delete/update calls get a fresh row to work on).
+    """
+
+    def __init__(self, name, method, prepare, payload=None):
+        self.name = name
+        self.method = method
+        self.prepare = prepare
+        self.payload = payload
+
+
+class Command(BaseCommand):
+    help = "Drive every API endpoint in-process and report latency, throughput and query counts as JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help="Timed requests per endpoint")
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--warmup', type=int, default=2, help="Untimed requests per endpoint")
+        parser.add_argument('--client', choices=['wsgi', 'asgi'], default='wsgi')
+        parser.add_argument('--only', action='append', default=[],
+                            help="Only run endpoints whose name contains this text (repeatable)")
+        parser.add_argument('--live-db', action='store_true',
+                            help="Run against the configured database instead of a throwaway test database")
+        parser.add_argument('--output', help="Also write the JSON report to this file")
+        parser.add_argument('--compare', help="Previous JSON report to print p50/p95 deltas against")
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['requests'] < 1:
+            raise CommandError("--requests and --concurrency must be at least 1")
+
+        old_name = None
+        if not options['live_db']:
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.fixtures = self.create_fixtures()
+            try:
+                # Measure the endpoints themselves, not the report throttle
+                with override_settings(REPORT_THROTTLE_CAPACITY=0):
+                    report = self.run(options)
+            finally:
+                self.cleanup()
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        output = json.dumps(report, indent=2)
+        self.stdout.write(output)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output)
+        if options['compare']:
+            self.print_comparison(options['compare'], report)
+
+    # ---- fixtures -------------------------------------------------------
+
+    def create_fixtures(self):
+        started = timezone.now()
+        product = Product.objects.create(
+            name="Bench product", brand=BENCH_BRAND, stock=900_000,
+            buying_price=Decimal('1000.00'), selling_price=Decimal('1500.00'),
+        )
+        return {
+            'product': product,
+            'sale': Sale.objects.create(product=product, quantity=1),
+            'purchase': Purchase.objects.create(product=product, quantity=1),
+            'expense': Expense.objects.create(title="Bench expense", amount=Decimal('10.00')),
+            'started': started,
+        }
+
+    def cleanup(self):
+        started = self.fixtures['started']
+        Product.objects.filter(brand=BENCH_BRAND).delete()
+        Expense.objects.filter(title__startswith="Bench", date__gte=started).delete()
+
+    def scenarios(self):
+        product = self.fixtures['product']
+        seq = count()
+        now = timezone.now()
+
+        def fixed(url):
+            return lambda: url
+
+        def new_product():
+            return Product.objects.create(
+                name=f"Bench product {next(seq)}", brand=BENCH_BRAND, stock=10,
+                buying_price=Decimal('1000.00'), selling_price=Decimal('1500.00'),
+            ).pk
+
+        def new_expense():
+            return Expense.objects.create(title=f"Bench expense {next(seq)}", amount=Decimal('10.00')).pk
+
+        product_payload = {
+            'name': "Bench product", 'brand': BENCH_BRAND, 'stock': 10,
+            'buying_price': '1000.00', 'selling_price': '1500.00',
+        }
+        sale_payload = {'product': product.pk, 'quantity': 1}
+        expense_payload = {'title': "Bench expense", 'amount': '10.00'}
+
+        items = [
+            Scenario('products:list', 'get', fixed('/api/products/')),
+            Scenario('products:retrieve', 'get', fixed(f'/api/products/{product.pk}/')),
+            Scenario('products:create', 'post', fixed('/api/products/'), product_payload),
+            Scenario('products:update', 'put', lambda: f'/api/products/{new_product()}/', product_payload),
+            Scenario('products:delete', 'delete', lambda: f'/api/products/{new_product()}/'),
+
+            Scenario('sales:list', 'get', fixed('/api/sales/')),
+            Scenario('sales:retrieve', 'get', fixed(f'/api/sales/{self.fixtures["sale"].pk}/')),
+            Scenario('sales:create', 'post', fixed('/api/sales/'), sale_payload),
+            Scenario('sales:update', 'put',
+                     lambda: f'/api/sales/{Sale.objects.create(product=product, quantity=2).pk}/', sale_payload),
+            Scenario('sales:delete', 'delete',
+                     lambda: f'/api/sales/{Sale.objects.create(product=product, quantity=1).pk}/'),
+
+            Scenario('purchases:list', 'get', fixed('/api/purchases/')),
+            Scenario('purchases:retrieve', 'get', fixed(f'/api/purchases/{self.fixtures["purchase"].pk}/')),
+            Scenario('purchases:create', 'post', fixed('/api/purchases/'), sale_payload),
+            Scenario('purchases:update', 'put',
+                     lambda: f'/api/purchases/{Purchase.objects.create(product=product, quantity=2).pk}/',
+                     sale_payload),
+            Scenario('purchases:delete', 'delete',
+                     lambda: f'/api/purchases/{Purchase.objects.create(product=product, quantity=1).pk}/'),
+
+            Scenario('expenses:list', 'get', fixed('/api/expenses/')),
+            Scenario('expenses:retrieve', 'get', fixed(f'/api/expenses/{self.fixtures["expense"].pk}/')),
+            Scenario('expenses:create', 'post', fixed('/api/expenses/'), expense_payload),
+            Scenario('expenses:update', 'put', lambda: f'/api/expenses/{new_expense()}/', expense_payload),
+            Scenario('expenses:delete', 'delete', lambda: f'/api/expenses/{new_expense()}/'),
+        ]
+        for period in ['daily', 'weekly', 'monthly', 'yearly', 'overall']:
+            items.append(Scenario(f'profits:{period}', 'get', fixed(f'/api/profits/?period={period}')))
+            items.append(Scenario(f'profits-csv:{period}', 'get', fixed(f'/api/profits/csv/?period={period}')))
+        items += [
+            Scenario('monthly-sales', 'get', fixed('/api/monthly-sales/')),
+            Scenario('financial-reports:weekly_report', 'get',
+                     fixed('/api/financial-reports/weekly_report/')),
+            Scenario('financial-reports:monthly_report', 'get',
+                     fixed(f'/api/financial-reports/monthly_report/?month={now.month}&year={now.year}')),
+            Scenario('financial-reports:yearly_report', 'get',
+                     fixed(f'/api/financial-reports/yearly_report/?year={now.year}')),
+            Scenario('financial-reports:current_period', 'get',
+                     fixed('/api/financial-reports/current_period/')),
+        ]
+        return items
+
+    # ---- running --------------------------------------------------------
+
+    def run(self, options):
+        scenarios = self.scenarios()
+        if options['only']:
+            scenarios = [s for s in scenarios if any(text in s.name for text in options['only'])]
+            if not scenarios:
+                raise CommandError("No endpoint matches --only")
+
+        results = {}
+        for scenario in scenarios:
+            for _ in range(options['warmup']):
+                self.call_sync(Client(raise_request_exception=False), scenario, scenario.prepare())
+            # Untimed, and outside the event loop since it uses the ORM
+            urls = [scenario.prepare() for _ in range(options['requests'])]
+            if options['client'] == 'asgi':
+                results[scenario.name] = asyncio.run(self.run_asgi(scenario, urls, options))
+            else:
+                results[scenario.name] = self.run_wsgi(scenario, urls, options)
+            self.stderr.write(f"{scenario.name}: p50 {results[scenario.name]['p50_ms']} ms")
+
+        return {
+            'meta': {
+                'commit': self.git_commit(),
+                'timestamp': timezone.now().isoformat(),
+                'client': options['client'],
+                'concurrency': options['concurrency'],
+                'requests': options['requests'],
+                'database': connection.vendor,
+            },
+            'endpoints': results,
+        }
+
+    def run_wsgi(self, scenario, urls, options):
+        def worker(chunk):
+            client = Client(raise_request_exception=False)
+            try:
+                return [self.call_sync(client, scenario, url) for url in chunk]
+            finally:
+                connections.close_all()
+
+        chunks = [urls[i::options['concurrency']] for i in range(options['concurrency'])]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            samples = [sample for chunk in pool.map(worker, chunks) for sample in chunk]
+        wall = time.perf_counter() - started
+        return self.summarise(samples, wall)
+
+    async def run_asgi(self, scenario, urls, options):
+        client = AsyncClient(raise_request_exception=False)
+        limit = asyncio.Semaphore(options['concurrency'])
+
+        async def call(url):
+            async with limit:
+                started = time.perf_counter()
+                method = getattr(client, scenario.method)
+                if scenario.payload is not None:
+                    response = await method(url, data=scenario.payload, content_type='application/json')
+                else:
+                    response = await method(url)
+                return self.sample(response, started)
+
+        started = time.perf_counter()
+        samples = await asyncio.gather(*(call(url) for url in urls))
+        wall = time.perf_counter() - started
+        return self.summarise(samples, wall)
+
+    def call_sync(self, client, scenario, url):
+        started = time.perf_counter()
+        method = getattr(client, scenario.method)
+        if scenario.payload is not None:
+            response = method(url, data=scenario.payload, content_type='application/json')
+        else:
+            response = method(url)
+        return self.sample(response, started)
+
+    @staticmethod
+    def sample(response, started):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        # Filled in by QueryInstrumentationMiddleware
+        stats = getattr(getattr(response, 'wsgi_request', None), 'query_stats', None)
+        if stats is None:
+            stats = getattr(getattr(response, 'asgi_request', None), 'query_stats', None)
+        return {
+            'ms': elapsed_ms,
+            'ok': response.status_code < 400,
+            'queries': stats.count if stats is not None else None,
+        }
+
+    @staticmethod
+    def summarise(samples, wall):
+        latencies = sorted(s['ms'] for s in samples)
+        queries = [s['queries'] for s in samples if s['queries'] is not None]
+        return {
+            'requests': len(samples),
+            'errors': sum(1 for s in samples if not s['ok']),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'mean_ms': round(sum(latencies) / len(latencies), 2),
+            'throughput_rps': round(len(samples) / wall, 1) if wall else None,
+            'queries_mean': round(sum(queries) / len(queries), 1) if queries else None,
+            'queries_max': max(queries) if queries else None,
+        }
+
+    # ---- reporting ------------------------------------------------------
+
+    @staticmethod
+    def git_commit():
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def print_comparison(self, path, report):
+        with open(path) as fh:
+            baseline = json.load(fh)
+        self.stderr.write(f"\nCompared with {path} ({baseline['meta'].get('commit')}):")
+        for name, current in report['endpoints'].items():
+            previous = baseline['endpoints'].get(name)
+            if not previous:
+                continue
+            deltas = []
+            for key in ('p50_ms', 'p95_ms', 'queries_mean'):
+                if previous.get(key) and current.get(key) is not None:
+                    change = (current[key] - previous[key]) / previous[key] * 100
+                    deltas.append(f"{key} {previous[key]} -> {current[key]} ({change:+.0f}%)")
+            self.stderr.write(f"  {name}: " + ", ".join(deltas))
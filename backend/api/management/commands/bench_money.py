@@ -0,0 +1,84 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncMonth
+
+from api.models import Expense, Purchase, Sale
+from api.money import from_cents
+
+
+def _decimal_cases():
+    cogs = ExpressionWrapper(F('quantity') * F('product__buying_price'), output_field=DecimalField())
+    return {
+        'sales_overall': lambda: Sale.objects.aggregate(revenue=Sum('total_price'), cogs=Sum(cogs)),
+        'sales_monthly': lambda: list(
+            Sale.objects.annotate(period=TruncMonth('date')).values('period')
+            .annotate(revenue=Sum('total_price'), cogs=Sum(cogs)).order_by('period')
+        ),
+        'purchases_overall': lambda: Purchase.objects.aggregate(total=Sum('total_cost')),
+        'expenses_overall': lambda: Expense.objects.aggregate(total=Sum('amount')),
+    }
+
+
+def _cents_cases():
+    cogs = F('quantity') * F('product__buying_price_cents')
+
+    def convert(row):
+        return {key: value if key == 'period' else from_cents(value) for key, value in row.items()}
+
+    return {
+        'sales_overall': lambda: convert(Sale.objects.aggregate(revenue=Sum('total_price_cents'), cogs=Sum(cogs))),
+        'sales_monthly': lambda: [
+            convert(row) for row in
+            Sale.objects.annotate(period=TruncMonth('date')).values('period')
+            .annotate(revenue=Sum('total_price_cents'), cogs=Sum(cogs)).order_by('period')
+        ],
+        'purchases_overall': lambda: convert(Purchase.objects.aggregate(total=Sum('total_cost_cents'))),
+        'expenses_overall': lambda: convert(Expense.objects.aggregate(total=Sum('amount_cents'))),
+    }
+
+
+class Command(BaseCommand):
+    help = "Time report aggregates over DecimalField columns against the integer *_cents columns"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per query; the best one is reported")
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be at least 1")
+
+        decimal_cases, cents_cases = _decimal_cases(), _cents_cases()
+        report = {'rows': {'sales': Sale.objects.count(), 'purchases': Purchase.objects.count(),
+                           'expenses': Expense.objects.count()}}
+        for name in decimal_cases:
+            decimal_ms, decimal_result = self.best(decimal_cases[name], options['repeat'])
+            cents_ms, cents_result = self.best(cents_cases[name], options['repeat'])
+            report[name] = {
+                'decimal_ms': decimal_ms,
+                'cents_ms': cents_ms,
+                'speedup': round(decimal_ms / cents_ms, 2) if cents_ms else None,
+                # Float-backed decimal sums can drift; the cents are exact
+                'same_result': self.same(decimal_result, cents_result),
+            }
+        self.stdout.write(json.dumps(report, indent=2))
+
+    @staticmethod
+    def best(fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = fn()
+            timings.append((time.perf_counter() - started) * 1000)
+        return round(min(timings), 2), result
+
+    @staticmethod
+    def same(decimal_result, cents_result):
+        rows_a = decimal_result if isinstance(decimal_result, list) else [decimal_result]
+        rows_b = cents_result if isinstance(cents_result, list) else [cents_result]
+        return all(
+            (a[key] or 0) == (b[key] or 0) if key == 'period' else round(a[key] or 0, 2) == b[key]
+            for a, b in zip(rows_a, rows_b) for key in a
+        ) and len(rows_a) == len(rows_b)
@@ -0,0 +1,85 @@
+import gzip
+import json
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class Command(BaseCommand):
+    help = "Benchmark JSON rendering and response compression on a large list payload"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=3, help="Best of N runs is reported")
+
+    def handle(self, *args, **options):
+        rows = self.build_rows(options['rows'])
+        repeat = options['repeat']
+        results = {'rows': len(rows)}
+
+        results['drf_json'] = self.time_render(JSONRenderer(), rows, repeat)
+        results['fast_json'] = self.time_render(FastJSONRenderer(), rows, repeat)
+        with override_settings(FAST_JSON_DECIMALS='string'):
+            results['fast_json_decimal_strings'] = self.time_render(FastJSONRenderer(), rows, repeat)
+
+        body = FastJSONRenderer().render(rows)
+        results['compression'] = {'raw_bytes': len(body)}
+        results['compression']['gzip'] = self.time_compress(
+            lambda data: gzip.compress(data, compresslevel=6, mtime=0), body, repeat
+        )
+        if brotli is not None:
+            results['compression']['br'] = self.time_compress(
+                lambda data: brotli.compress(data, quality=4), body, repeat
+            )
+
+        self.stdout.write(json.dumps(results, indent=2))
+
+    @staticmethod
+    def build_rows(count):
+        # Same shape as a serialized sale joined with its product
+        start = timezone.now()
+        return [
+            {
+                'id': i,
+                'product': i % 500,
+                'product_name': f"Product {i % 500}",
+                'quantity': i % 17 + 1,
+                'total_price': Decimal(i % 9973) + Decimal('0.35'),
+                'date': start - timedelta(minutes=i),
+            }
+            for i in range(count)
+        ]
+
+    @staticmethod
+    def time_render(renderer, rows, repeat):
+        best = None
+        size = 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            size = len(renderer.render(rows))
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return {'seconds': round(best, 4), 'bytes': size}
+
+    @staticmethod
+    def time_compress(compress, body, repeat):
+        best = None
+        size = 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            size = len(compress(body))
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return {'seconds': round(best, 4), 'bytes': size, 'ratio': round(size / len(body), 3)}
@@ -0,0 +1,90 @@
+import json
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+
+from api.inventory import available_stock, shard_stock
+from api.models import Product, Sale
+
+
+class Command(BaseCommand):
+    help = "Many concurrent sales of one product: single stock row vs sharded stock"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--sales', type=int, default=200, help="Sales per thread")
+        parser.add_argument('--shards', type=int, default=16)
+        parser.add_argument('--live-db', action='store_true',
+                            help="Run against the configured database instead of a throwaway test database")
+
+    def handle(self, *args, **options):
+        if min(options['threads'], options['sales'], options['shards']) < 1:
+            raise CommandError("--threads, --sales and --shards must be at least 1")
+
+        old_name = None
+        if not options['live_db']:
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            report = {
+                'database': connection.vendor,
+                'threads': options['threads'],
+                'sales_per_thread': options['sales'],
+                'single_row': self.run(options, shards=0),
+                'sharded': self.run(options, shards=options['shards']),
+            }
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def run(self, options, shards):
+        total = options['threads'] * options['sales']
+        product = Product.objects.create(
+            name=f"Contention {shards}", brand="__bench__", stock=total * 2,
+            buying_price=Decimal('10.00'), selling_price=Decimal('15.00'),
+        )
+        if shards:
+            product = shard_stock(product, shards)
+
+        errors = []
+
+        def cashier():
+            try:
+                for _ in range(options['sales']):
+                    # Fresh product per sale, like the API's serializer lookup
+                    for attempt in range(20):
+                        try:
+                            Sale.objects.create(product=Product.objects.get(pk=product.pk), quantity=1)
+                            break
+                        except OperationalError:
+                            # SQLite: database is locked
+                            time.sleep(0.001 * (attempt + 1))
+                    else:
+                        errors.append('gave up')
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=cashier) for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        product.refresh_from_db()
+        sold = Sale.objects.filter(product=product).count()
+        result = {
+            'shards': shards,
+            'seconds': round(elapsed, 2),
+            'sales_per_second': round(sold / elapsed, 1),
+            'failed_sales': len(errors),
+            # Every recorded sale must have taken exactly one unit
+            'stock_consistent': available_stock(product) == total * 2 - sold,
+        }
+        self.stderr.write(f"shards={shards}: {result['sales_per_second']} sales/s")
+        return result
@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import business_time, periods
+from api.models import CustomUser
+from api.money import from_cents
+from api.permissions import is_admin
+
+
+class Command(BaseCommand):
+    help = "Close every open month up to the given one (default: last month) and freeze its report figures"
+
+    def add_arguments(self, parser):
+        parser.add_argument('month', nargs='?', help="Last month to close, YYYY-MM")
+        parser.add_argument('--user', required=True, help="Username of the admin closing the books")
+
+    def handle(self, *args, **options):
+        if options['month']:
+            try:
+                month = datetime.strptime(options['month'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError("month must be YYYY-MM")
+        else:
+            month = business_time.localdate().replace(day=1) - timedelta(days=1)
+        user = CustomUser.objects.filter(username=options['user']).first()
+        if not is_admin(user):
+            raise CommandError(f"{options['user']} is not an admin")
+        try:
+            closed = periods.close_through(month, user)
+        except ValueError as e:
+            raise CommandError(str(e))
+        for period in closed:
+            self.stdout.write(f"Closed {period}: revenue {from_cents(period.revenue_cents)}, "
+                              f"{period.products.count()} products")
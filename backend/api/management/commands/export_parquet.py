@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import parquet_export
+
+
+class Command(BaseCommand):
+    help = "Append new sales, purchases and expenses to year/month partitioned Parquet files"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tables', nargs='+', choices=list(parquet_export.TABLES),
+                            help="Tables to export (default: all)")
+        parser.add_argument('--out', help="Output directory (default: PARQUET_EXPORT_DIR)")
+        parser.add_argument('--chunk-size', type=int, default=parquet_export.CHUNK_SIZE,
+                            help="Rows fetched and buffered at a time")
+        parser.add_argument('--full', action='store_true',
+                            help="Drop the existing files and export everything again")
+
+    def handle(self, *args, **options):
+        if not parquet_export.HAVE_PYARROW:
+            raise CommandError("Parquet export needs PyArrow (pip install pyarrow).")
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be at least 1")
+
+        for table in options['tables'] or parquet_export.TABLES:
+            started = time.perf_counter()
+            result = parquet_export.export_table(
+                table, out_dir=options['out'], chunk_size=options['chunk_size'], full=options['full'],
+            )
+            self.stdout.write(
+                f"{table}: {result['rows']} rows into {len(result['files'])} files "
+                f"(up to #{result['last_id']}) in {time.perf_counter() - started:.1f}s"
+            )
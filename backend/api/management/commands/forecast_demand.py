@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import forecasting
+
+HISTORY_DAYS = 365
+# Three years of history for 50k products: the size the benchmark is quoted at
+BENCHMARK_DAYS = 1095
+
+
+class Command(BaseCommand):
+    help = "Forecast demand for every product with vectorized Holt-Winters and store the results"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--history-days', type=int,
+                            help=f"Days of sales history to fit on ({HISTORY_DAYS}, {BENCHMARK_DAYS} with --benchmark)")
+        parser.add_argument('--horizon', type=int, default=30, help="Days to forecast")
+        parser.add_argument('--benchmark', action='store_true',
+                            help="Time the fit on a synthetic matrix instead of touching the database")
+        parser.add_argument('--products', type=int, default=50_000, help="Rows of the --benchmark matrix")
+
+    def handle(self, *args, **options):
+        if forecasting.np is None:
+            raise CommandError("Demand forecasting needs NumPy (pip install numpy).")
+        if options['history_days'] is None:
+            options['history_days'] = BENCHMARK_DAYS if options['benchmark'] else HISTORY_DAYS
+        if options['history_days'] < 1 or options['horizon'] < 1:
+            raise CommandError("--history-days and --horizon must be at least 1")
+
+        if options['benchmark']:
+            self.benchmark(options['products'], options['history_days'], options['horizon'])
+            return
+
+        started = time.perf_counter()
+        count = forecasting.forecast_catalog(options['history_days'], options['horizon'])
+        self.stdout.write(f"Forecast {count} products in {time.perf_counter() - started:.1f}s")
+
+    def benchmark(self, products, days, horizon):
+        np = forecasting.np
+        rng = np.random.default_rng(0)
+        # Poisson demand with a weekly cycle and a per-product base rate
+        base = rng.gamma(0.5, 2.0, size=(products, 1))
+        weekly = 1 + 0.3 * np.sin(2 * np.pi * np.arange(days) / forecasting.SEASON)
+        matrix = rng.poisson(base * weekly).astype(np.float32)
+
+        started = time.perf_counter()
+        forecasting.holt_winters(matrix, horizon=horizon)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Holt-Winters on {products} products x {days} days: {elapsed:.2f}s "
+            f"({matrix.nbytes / 2**20:.0f} MB matrix)"
+        )
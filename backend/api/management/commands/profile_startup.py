@@ -0,0 +1,109 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter under -X importtime and prints its timings
+# as the last line of stdout
+PROBE = """
+import json, os, sys, time
+from io import BytesIO
+started = time.perf_counter()
+timings = {}
+
+def lap(name):
+    global started
+    now = time.perf_counter()
+    timings[name] = round((now - started) * 1000, 2)
+    started = now
+
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+lap('setup_ms')
+if sys.argv[2] == '1':
+    from api import warmup
+    warmup.warm_up()
+    lap('warm_up_ms')
+
+path, _, query = sys.argv[1].partition('?')
+for name in ('first_request_ms', 'second_request_ms'):
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80', 'HTTP_ACCEPT': 'application/json', 'wsgi.input': BytesIO(),
+        'wsgi.url_scheme': 'http', 'wsgi.errors': sys.stderr,
+    }
+    statuses = []
+    body = b''.join(application(environ, lambda status, headers: statuses.append(status)))
+    lap(name)
+timings['status'] = statuses[0]
+print(json.dumps(timings))
+"""
+
+
+def parse_importtime(stderr):
+    """
+    -X importtime lines as [(module, self_us, cumulative_us, depth)].
+    Depth 0 modules were imported directly; their cumulative times add up
+    to the whole import time.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+class Command(BaseCommand):
+    help = ("Profile a cold start in a fresh interpreter: import times (python -X importtime), "
+            "django.setup(), warm-up and the first requests, as JSON")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/expense-categories/',
+                            help="URL of the first requests: a cheap one shows the start-up costs best")
+        parser.add_argument('--top', type=int, default=15, help="Slowest modules to list")
+        parser.add_argument('--runs', type=int, default=3, help="Best of N cold starts is reported")
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError("--runs must be at least 1")
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE}
+        results = {'path': options['path']}
+        for mode, warm in (('cold', '0'), ('warmed', '1')):
+            runs = [self.probe(options['path'], warm, env) for _ in range(options['runs'])]
+            timings, imports = min(runs, key=lambda run: sum(value for key, value in run[0].items()
+                                                             if key.endswith('_ms')))
+            # Time to the first byte of a new process: everything up to the first response
+            timings['first_byte_ms'] = round(sum(timings[key] for key in (
+                'setup_ms', 'warm_up_ms', 'first_request_ms') if key in timings), 2)
+            results[mode] = timings
+            if mode == 'cold':
+                results['imports'] = self.summarize(imports, options['top'])
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def probe(self, path, warm, env):
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROBE, path, warm],
+            capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+        )
+        if process.returncode != 0:
+            raise CommandError(process.stderr.strip().splitlines()[-1] if process.stderr.strip() else
+                               f"Probe exited with {process.returncode}")
+        return json.loads(process.stdout.strip().splitlines()[-1]), parse_importtime(process.stderr)
+
+    @staticmethod
+    def summarize(rows, top):
+        def entry(row):
+            return {'module': row[0], 'self_ms': round(row[1] / 1000, 2), 'cumulative_ms': round(row[2] / 1000, 2)}
+
+        return {
+            'total_ms': round(sum(row[2] for row in rows if row[3] == 0) / 1000, 2),
+            'slowest': [entry(row) for row in sorted((row for row in rows if row[3] == 0),
+                                                      key=lambda row: -row[2])[:top]],
+            'api': [entry(row) for row in rows if row[0].startswith('api.') or row[0] == 'api'],
+        }
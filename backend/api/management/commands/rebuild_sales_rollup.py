@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.rollups import rebuild_monthly_sales
+
+
+class Command(BaseCommand):
+    help = "Recompute the ProductMonthlySales rollup from sales and archived summaries"
+
+    def handle(self, *args, **options):
+        rows = rebuild_monthly_sales()
+        self.stdout.write(f"Rebuilt {rows} product-month rows")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.inventory import rebuild_velocities
+
+
+class Command(BaseCommand):
+    help = "Recompute every product's sales velocity and days of cover from the sales history"
+
+    def handle(self, *args, **options):
+        count = rebuild_velocities()
+        self.stdout.write(f"Updated {count} products")
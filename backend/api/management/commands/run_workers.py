@@ -0,0 +1,64 @@
+import multiprocessing
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+def worker_main(poll_interval, once):
+    """Entry point of one worker process."""
+    import django
+
+    django.setup()
+    from api.jobs import work
+
+    stopping = threading.Event()
+    # Finish the current job on SIGTERM/SIGINT instead of dying mid-write
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+    try:
+        work(once=once, poll_interval=poll_interval, stop=stopping.is_set)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Run background job workers (reports, exports) in a pool of processes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=settings.JOB_WORKER_PROCESSES)
+        parser.add_argument('--poll-interval', type=float, default=settings.JOB_POLL_INTERVAL_SECONDS,
+                            help="Seconds to sleep when the queue is empty")
+        parser.add_argument('--once', action='store_true', help="Exit when the queue is empty")
+
+    def handle(self, *args, **options):
+        if options['processes'] < 1:
+            raise CommandError("--processes must be at least 1")
+
+        if options['processes'] == 1:
+            from api.jobs import work
+
+            processed = work(once=options['once'], poll_interval=options['poll_interval'])
+            self.stdout.write(f"Processed {processed} jobs")
+            return
+
+        # Children must open their own database connections
+        connections.close_all()
+        context = multiprocessing.get_context('spawn')
+        workers = [
+            context.Process(target=worker_main, args=(options['poll_interval'], options['once']), daemon=False)
+            for _ in range(options['processes'])
+        ]
+        for process in workers:
+            process.start()
+        self.stdout.write(f"Started {len(workers)} workers")
+        try:
+            for process in workers:
+                process.join()
+        except KeyboardInterrupt:
+            for process in workers:
+                process.terminate()
+            for process in workers:
+                process.join()
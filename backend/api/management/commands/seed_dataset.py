@@ -0,0 +1,261 @@
+import math
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from api import business_time
+from api.models import Expense, ExpenseCategory, Product, Purchase, Sale
+from api.money import to_cents
+from api.inventory import rebuild_velocities
+from api.rollups import rebuild_monthly_sales
+
+
+ITEMS = [
+    "Sugar", "Rice", "Maize Flour", "Cooking Oil", "Salt", "Soap", "Tea Leaves", "Milk",
+    "Bread", "Beans", "Soda", "Water", "Matches", "Candles", "Biscuits", "Toothpaste",
+    "Detergent", "Margarine", "Wheat Flour", "Paraffin",
+]
+SIZES = ["250g", "500g", "1kg", "2kg", "5kg", "300ml", "500ml", "1L", "2L", "5L", "Pack", "Carton"]
+BRANDS = ["Kakira", "Mukwano", "Bidco", "Fresh Dairy", "Nile", "Rwenzori", "Tilda", "Nice", "Movit", "Sameer"]
+EXPENSES = [
+    ("Electricity", Decimal("150000")), ("Water", Decimal("40000")), ("Transport", Decimal("25000")),
+    ("Internet", Decimal("90000")), ("Repairs", Decimal("60000")), ("Airtime", Decimal("10000")),
+]
+
+_total_cost = Purchase._meta.get_field('total_cost')
+# Largest total_cost the column holds: 99,999,999.99 for max_digits=10
+MAX_ORDER_COST = (Decimal(10) ** _total_cost.max_digits - 1).scaleb(-_total_cost.decimal_places)
+
+
+@contextmanager
+def explicit_dates(*models):
+    """
+    The transaction models use auto_now_add, which would overwrite every
+    generated date with now() inside bulk_create. Switch it off meanwhile.
+    """
+    fields = [model._meta.get_field('date') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def batched(iterable_size, batch_size):
+    for start in range(0, iterable_size, batch_size):
+        yield min(batch_size, iterable_size - start)
+
+
+class Command(BaseCommand):
+    help = "Generate a deterministic, realistically distributed dataset with bulk_create"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1_000)
+        parser.add_argument('--sales', type=int, default=100_000)
+        parser.add_argument('--purchases-per-product', type=int, default=12)
+        parser.add_argument('--expenses', type=int, default=2_000)
+        parser.add_argument('--days', type=int, default=730, help="Length of the generated history")
+        parser.add_argument('--end', help="Last day of the history (YYYY-MM-DD), default today. "
+                                          "Pass it explicitly for byte-identical reruns.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument('--clear', action='store_true',
+                            help="Delete all existing products, sales, purchases and expenses first")
+
+    def handle(self, *args, **options):
+        if options['products'] < 1 or options['days'] < 1:
+            raise CommandError("--products and --days must be at least 1")
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        end = (datetime.strptime(options['end'], '%Y-%m-%d').date()
+               if options['end'] else business_time.localdate())
+        self.start_day = end - timedelta(days=options['days'] - 1)
+        self.days = options['days']
+        self.tz = business_time.tz()
+        self.midnights = [
+            timezone.make_aware(datetime.combine(self.start_day + timedelta(days=offset), dt_time()), self.tz)
+            for offset in range(self.days)
+        ]
+
+        if options['clear']:
+            self.log("Clearing existing data")
+            Sale.objects.all().delete()
+            Purchase.objects.all().delete()
+            Expense.objects.all().delete()
+            Product.objects.all().delete()
+
+        started = time.perf_counter()
+        products = self.create_products(options['products'])
+        day_weights = self.day_weights()
+
+        with explicit_dates(Sale, Purchase, Expense):
+            sold = self.create_sales(products, options['sales'], day_weights)
+            bought = self.create_purchases(products, sold, options['purchases_per_product'])
+            self.create_expenses(options['expenses'], day_weights)
+
+        # Stock is whatever was bought and not sold, written once at the end
+        for product in products:
+            product.stock = bought[product.pk] - sold[product.pk]
+        Product.objects.bulk_update(products, ['stock'], batch_size=self.batch_size)
+
+        # bulk_create bypasses Sale.save, so derived tables are rebuilt in one go
+        rebuild_monthly_sales()
+        rebuild_velocities()
+
+        self.log(f"Done in {time.perf_counter() - started:.1f}s")
+
+    def log(self, message):
+        self.stdout.write(message)
+
+    # ---- distributions --------------------------------------------------
+
+    def day_weights(self):
+        """
+        Cumulative weights per day: a yearly season (peaks around December
+        and the school-term start in February), busier weekends and mild growth.
+        """
+        weights = []
+        total = 0.0
+        for offset in range(self.days):
+            day = self.start_day + timedelta(days=offset)
+            doy = day.timetuple().tm_yday
+            season = (1.0
+                      + 0.35 * math.exp(-((doy - 355) / 12) ** 2)
+                      + 0.2 * math.exp(-((doy - 35) / 10) ** 2)
+                      + 0.1 * math.sin(2 * math.pi * doy / 365))
+            weekday = 1.3 if day.weekday() >= 5 else 1.0
+            growth = 1.0 + 0.5 * offset / self.days
+            total += season * weekday * growth
+            weights.append(total)
+        return weights
+
+    def random_moment(self, day_offset):
+        # Shop hours 07:00-22:00 with lunch and evening peaks
+        peak, spread = (13, 2) if self.rng.random() < 0.5 else (18, 1.5)
+        hour = min(max(int(self.rng.gauss(peak, spread)), 7), 21)
+        return self.midnights[day_offset] + timedelta(seconds=hour * 3600 + self.rng.randrange(3600))
+
+    def quantity(self):
+        # Long tail: mostly 1-3 units, occasionally a bulk buy
+        return min(int(self.rng.paretovariate(1.8)), 50)
+
+    # ---- generators -----------------------------------------------------
+
+    def create_products(self, count):
+        self.log(f"Creating {count} products")
+        products = []
+        for i in range(count):
+            buying = Decimal(self.rng.randrange(5, 2_000) * 50)
+            margin = Decimal(self.rng.randrange(105, 160)) / 100
+            products.append(Product(
+                name=f"{self.rng.choice(ITEMS)} {self.rng.choice(SIZES)} #{i + 1}",
+                brand=self.rng.choice(BRANDS),
+                stock=0,
+                buying_price=buying,
+                selling_price=(buying * margin).quantize(Decimal('1')),
+            ))
+            products[-1].refresh_search_fields()
+            products[-1].buying_price_cents = to_cents(buying)
+        created = []
+        for chunk_start in range(0, count, self.batch_size):
+            created += Product.objects.bulk_create(products[chunk_start:chunk_start + self.batch_size])
+        return created
+
+    def create_sales(self, products, count, day_weights):
+        self.log(f"Creating {count} sales")
+        # Zipf-like popularity: a few best sellers, a long tail of slow movers
+        order = list(range(len(products)))
+        self.rng.shuffle(order)
+        popularity = [0.0] * len(products)
+        for rank, index in enumerate(order):
+            popularity[index] = 1 / (rank + 1) ** 1.1
+        cum_popularity = []
+        total = 0.0
+        for weight in popularity:
+            total += weight
+            cum_popularity.append(total)
+
+        sold = {product.pk: 0 for product in products}
+        days = range(self.days)
+        written = 0
+        for size in batched(count, self.batch_size):
+            picked = self.rng.choices(products, cum_weights=cum_popularity, k=size)
+            picked_days = self.rng.choices(days, cum_weights=day_weights, k=size)
+            batch = []
+            for product, day_offset in zip(picked, picked_days):
+                quantity = self.quantity()
+                sold[product.pk] += quantity
+                total_price = product.selling_price * quantity
+                batch.append(Sale(
+                    product_id=product.pk,
+                    quantity=quantity,
+                    total_price=total_price,
+                    total_price_cents=to_cents(total_price),
+                    date=self.random_moment(day_offset),
+                ))
+            with transaction.atomic():
+                Sale.objects.bulk_create(batch)
+            written += size
+            if written % (self.batch_size * 20) == 0:
+                self.log(f"  {written} sales")
+        return sold
+
+    def create_purchases(self, products, sold, per_product):
+        """Restock orders covering everything sold plus some spare stock."""
+        self.log("Creating purchases")
+        bought = {}
+        batch = []
+        for product in products:
+            orders = max(1, min(per_product, sold[product.pk] // 5 or 1))
+            needed = sold[product.pk] + self.rng.randrange(5, 60)
+            # Split restocks too big for Purchase.total_cost into more orders
+            largest = max(1, int(MAX_ORDER_COST // product.buying_price))
+            orders = max(orders, -(-needed // largest))
+            per_order = -(-needed // orders)  # ceil
+            bought[product.pk] = per_order * orders
+            for _ in range(orders):
+                batch.append(Purchase(
+                    product_id=product.pk,
+                    quantity=per_order,
+                    total_cost=product.buying_price * per_order,
+                    total_cost_cents=product.buying_price_cents * per_order,
+                    date=self.random_moment(self.rng.randrange(self.days)),
+                ))
+                if len(batch) >= self.batch_size:
+                    Purchase.objects.bulk_create(batch)
+                    batch = []
+        if batch:
+            Purchase.objects.bulk_create(batch)
+        return bought
+
+    def create_expenses(self, count, day_weights):
+        self.log(f"Creating {count} expenses")
+        categories = {
+            title: ExpenseCategory.objects.get_or_create(name=title)[0]
+            for title in ["Rent"] + [title for title, _ in EXPENSES]
+        }
+        batch = []
+        # Rent on the first of every month
+        day = self.start_day
+        while day <= self.start_day + timedelta(days=self.days - 1):
+            if day.day == 1:
+                batch.append(Expense(title="Rent", amount=Decimal("1500000"), amount_cents=150_000_000,
+                                     category=categories["Rent"],
+                                     date=timezone.make_aware(datetime.combine(day, dt_time(9)), self.tz)))
+            day += timedelta(days=1)
+        for day_offset in self.rng.choices(range(self.days), cum_weights=day_weights, k=count):
+            title, typical = self.rng.choice(EXPENSES)
+            amount = (typical * Decimal(self.rng.uniform(0.5, 1.5))).quantize(Decimal('1'))
+            batch.append(Expense(title=title, amount=amount, amount_cents=to_cents(amount), category=categories[title],
+                                 date=self.random_moment(day_offset)))
+        for chunk_start in range(0, len(batch), self.batch_size):
+            Expense.objects.bulk_create(batch[chunk_start:chunk_start + self.batch_size])
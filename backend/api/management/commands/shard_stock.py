@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.inventory import shard_stock, sync_sharded_stock
+from api.models import Product
+
+
+class Command(BaseCommand):
+    help = "Stripe a hot product's stock over several rows, or refresh the snapshots of sharded products"
+
+    def add_arguments(self, parser):
+        parser.add_argument('product_ids', nargs='*', type=int)
+        parser.add_argument('--shards', type=int, default=8,
+                            help="Number of shards, 0 moves the stock back onto the product row")
+        parser.add_argument('--sync', action='store_true',
+                            help="Refresh stock, velocity and days of cover of all sharded products")
+
+    def handle(self, *args, **options):
+        if options['sync']:
+            self.stdout.write(f"Synced {sync_sharded_stock()} sharded products")
+            return
+        if not options['product_ids']:
+            raise CommandError("Give at least one product id, or --sync")
+        if not 0 <= options['shards'] <= 256:
+            raise CommandError("--shards must be between 0 and 256")
+
+        for product in Product.objects.filter(pk__in=options['product_ids']):
+            product = shard_stock(product, options['shards'])
+            self.stdout.write(f"{product.name}: {product.stock} units over {product.stock_shards} shards")
@@ -0,0 +1,194 @@
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+
+def _accepted_encodings(header):
+    """
+    Parse an Accept-Encoding header into {coding: q}. A q of 0 refuses the
+    coding ('gzip;q=0'), a malformed one counts as 0.
+    """
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def _preferred_encoding(header, available):
+    """
+    The coding of `available` the client weighs highest, '*' standing for
+    any it does not name; ties go to the first in `available`. None if it
+    accepts none of them.
+    """
+    accepted = _accepted_encodings(header)
+    weights = {coding: accepted.get(coding, accepted.get('*', 0.0)) for coding in available}
+    best = max(available, key=lambda coding: weights[coding], default=None)
+    return best if best is not None and weights[best] > 0 else None
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Opt-in response compression for large bodies.
+
+    Compresses with whichever of brotli (when the package is installed) and
+    gzip the client's Accept-Encoding weighs higher, brotli on a tie. Gzip is
+    Django's GZipMiddleware; responses smaller than COMPRESSION_MIN_SIZE,
+    streaming responses and anything already encoded are passed through
+    untouched.
+
+    Enable with COMPRESSION_ENABLED = True (RESPONSE_COMPRESSION=1 in the env).
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.enabled = getattr(settings, 'COMPRESSION_ENABLED', False)
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 8192)
+        self.brotli_quality = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 4)
+        self.encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def process_response(self, request, response):
+        if not self.enabled or response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if len(response.content) < self.min_size:
+            return response
+
+        encoding = _preferred_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), self.encodings)
+        if encoding == 'gzip':
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if encoding is None:
+            return response
+        compressed = brotli.compress(response.content, quality=self.brotli_quality)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        response.headers['Content-Encoding'] = 'br'
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        return response
+
+
+query_logger = logging.getLogger('api.queries')
+
+
+class QueryStats:
+    """
+    Collects per-request database activity through connection.execute_wrapper.
+    Times are in milliseconds.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_sql = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.count += 1
+            self.total_ms += elapsed
+            if elapsed >= self.slowest_ms:
+                self.slowest_ms = elapsed
+                self.slowest_sql = sql
+
+    def as_dict(self):
+        return {
+            'queries': self.count,
+            'db_ms': round(self.total_ms, 2),
+            'slowest_ms': round(self.slowest_ms, 2),
+            'slowest_sql': self.slowest_sql,
+        }
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Records query count, total DB time and the slowest statement of every
+    request. The numbers are sent back as a Server-Timing header and logged
+    as one JSON line on the 'api.queries' logger. SQL text is only logged,
+    never put in the header.
+
+    The stats are also available on request.query_stats for other code.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'QUERY_INSTRUMENTATION_ENABLED', True)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        stats = QueryStats()
+        request.query_stats = stats
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            # Wrapping does not open a connection, so every alias is covered
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - started) * 1000
+
+        response['Server-Timing'] = (
+            f'db;dur={stats.total_ms:.2f};desc="{stats.count} queries", '
+            f'db-slowest;dur={stats.slowest_ms:.2f}, '
+            f'total;dur={total_ms:.2f}'
+        )
+        query_logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 2),
+            **stats.as_dict(),
+        }))
+        return response
+
+
+class AuditContextMiddleware:
+    """
+    Makes the current request available to audit.py, which reads the
+    acting user from it when a write is recorded. DRF authenticates inside
+    the view and sets request.user on this same HttpRequest, so JWT users
+    are seen too.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        from . import audit
+
+        token = audit.current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            audit.current_request.reset(token)
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_rollup(apps, schema_editor):
+    Sale = apps.get_model('api', 'Sale')
+    SalesDailySummary = apps.get_model('api', 'SalesDailySummary')
+    ProductMonthlySales = apps.get_model('api', 'ProductMonthlySales')
+
+    totals = {}
+    hot = (
+        Sale.objects.annotate(month=TruncMonth('date'))
+        .values('product_id', 'month')
+        .annotate(quantity=Sum('quantity'), revenue=Sum('total_price'))
+    )
+    archived = (
+        SalesDailySummary.objects.annotate(month=TruncMonth('day'))
+        .values('product_id', 'month')
+        .annotate(quantity=Sum('quantity'), revenue=Sum('revenue'))
+    )
+    for row in list(hot) + list(archived):
+        month = row['month']
+        month = month.date() if hasattr(month, 'date') else month
+        key = (row['product_id'], month)
+        quantity, revenue = totals.get(key, (0, 0))
+        totals[key] = (quantity + row['quantity'], revenue + row['revenue'])
+
+    ProductMonthlySales.objects.bulk_create(
+        [
+            ProductMonthlySales(product_id=product_id, month=month, quantity=quantity, revenue=revenue)
+            for (product_id, month), (quantity, revenue) in totals.items()
+        ],
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_transaction_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductMonthlySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(db_index=True)),
+                ('quantity', models.BigIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.product')),
+            ],
+            options={
+                'unique_together': {('product', 'month')},
+            },
+        ),
+        migrations.RunPython(backfill_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:16
+
+from django.db import migrations, models, transaction
+
+
+def normalize(value):
+    return ' '.join((value or '').casefold().split())[:100]
+
+
+def populate_search_fields(apps, schema_editor):
+    Product = apps.get_model('api', 'Product')
+    products = list(Product.objects.only('id', 'name', 'brand'))
+    for product in products:
+        product.name_search = normalize(product.name)
+        product.brand_search = normalize(product.brand)
+    Product.objects.bulk_update(products, ['name_search', 'brand_search'], batch_size=2000)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # Substring search on PostgreSQL; other backends fall back to a scan
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    try:
+        with transaction.atomic():
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    except Exception:
+        # No permission to install the extension: keep the btree indexes only
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS api_product_name_search_trgm '
+        'ON api_product USING gin (name_search gin_trgm_ops)'
+    )
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS api_product_brand_search_trgm '
+        'ON api_product USING gin (brand_search gin_trgm_ops)'
+    )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS api_product_name_search_trgm')
+    schema_editor.execute('DROP INDEX IF EXISTS api_product_brand_search_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_product_monthly_sales'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='brand_search',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='name_search',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='stock',
+            field=models.PositiveBigIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(populate_search_fields, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
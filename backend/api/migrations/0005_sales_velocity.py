@@ -0,0 +1,61 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:18
+
+import math
+
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncDay
+from django.utils import timezone
+
+
+def backfill_velocity(apps, schema_editor):
+    # Same formula as api.inventory.rebuild_velocities, 14-day half-life
+    Product = apps.get_model('api', 'Product')
+    Sale = apps.get_model('api', 'Sale')
+    now = timezone.now()
+    tau = 14 / math.log(2)
+    totals = {}
+    daily = (
+        Sale.objects.annotate(day=TruncDay('date'))
+        .values('product_id', 'day')
+        .annotate(units=Sum('quantity'))
+    )
+    for row in daily:
+        age_days = max((now - row['day']).total_seconds(), 0) / 86400
+        weight = row['units'] * math.exp(-age_days / tau) / tau
+        totals[row['product_id']] = totals.get(row['product_id'], 0.0) + weight
+
+    products = list(Product.objects.only('id', 'stock'))
+    for product in products:
+        product.sales_velocity = totals.get(product.pk, 0.0)
+        product.velocity_updated_at = now
+        product.days_of_cover = product.stock / product.sales_velocity if product.sales_velocity > 0 else None
+    Product.objects.bulk_update(
+        products, ['sales_velocity', 'velocity_updated_at', 'days_of_cover'], batch_size=2000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_product_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='days_of_cover',
+            field=models.FloatField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='sales_velocity',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='velocity_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_velocity, migrations.RunPython.noop),
+    ]
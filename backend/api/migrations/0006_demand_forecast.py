@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_sales_velocity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DemandForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('generated_at', models.DateTimeField()),
+                ('horizon_days', models.PositiveIntegerField()),
+                ('units', models.FloatField(db_index=True)),
+                ('daily', models.JSONField()),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='forecast', to='api.product')),
+            ],
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_stock_shards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpenseCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'expense categories',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='expensedailysummary',
+            name='day',
+            field=models.DateField(db_index=True),
+        ),
+        migrations.AddField(
+            model_name='archivedexpense',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.expensecategory'),
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='expenses', to='api.expensecategory'),
+        ),
+        migrations.AddField(
+            model_name='expensedailysummary',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.expensecategory'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='expensedailysummary',
+            unique_together={('day', 'category')},
+        ),
+    ]
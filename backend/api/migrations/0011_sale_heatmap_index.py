@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_expense_category'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['date', 'quantity', 'total_price'], name='sale_date_covering_idx'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:33
+
+from django.db import migrations, models
+from django.db.models import BigIntegerField, F
+from django.db.models.functions import Cast, Round
+
+COLUMNS = [
+    ('Product', 'buying_price', 'buying_price_cents'),
+    ('Sale', 'total_price', 'total_price_cents'),
+    ('Purchase', 'total_cost', 'total_cost_cents'),
+    ('Expense', 'amount', 'amount_cents'),
+    ('SalesDailySummary', 'revenue', 'revenue_cents'),
+    ('SalesDailySummary', 'cogs', 'cogs_cents'),
+    ('PurchaseDailySummary', 'total_cost', 'total_cost_cents'),
+    ('ExpenseDailySummary', 'amount', 'amount_cents'),
+]
+
+
+def backfill(apps, schema_editor):
+    # One set-based UPDATE per column; `manage.py backfill_cents` does the
+    # same in pk batches for tables too big for a single statement
+    for model_name, decimal_field, cents_field in COLUMNS:
+        apps.get_model('api', model_name).objects.update(**{
+            cents_field: Cast(Round(F(decimal_field) * 100), BigIntegerField()),
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_sale_heatmap_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expense',
+            name='amount_cents',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='expensedailysummary',
+            name='amount_cents',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='buying_price_cents',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='purchase',
+            name='total_cost_cents',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='purchasedailysummary',
+            name='total_cost_cents',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='total_price_cents',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='salesdailysummary',
+            name='cogs_cents',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='salesdailysummary',
+            name='revenue_cents',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_money_cents'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(max_length=30, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('rows', models.BigIntegerField(default=0)),
+                ('exported_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_export_cursor'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='sale',
+            name='sale_date_covering_idx',
+        ),
+        migrations.AddField(
+            model_name='archivedsale',
+            name='voided',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='void_reason',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='voided',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='voided_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['date', 'voided', 'quantity', 'total_price_cents'], name='sale_date_covering_idx'),
+        ),
+    ]
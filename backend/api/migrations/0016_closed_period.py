@@ -0,0 +1,71 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_audit_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClosedPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True)),
+                ('closed_at', models.DateTimeField(auto_now_add=True)),
+                ('quantity_sold', models.BigIntegerField(default=0)),
+                ('revenue_cents', models.BigIntegerField(default=0)),
+                ('cogs_cents', models.BigIntegerField(default=0)),
+                ('expenses_cents', models.BigIntegerField(default=0)),
+                ('purchases_cents', models.BigIntegerField(default=0)),
+                ('purchase_quantity', models.BigIntegerField(default=0)),
+                ('closed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['month'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PeriodDaySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('quantity_sold', models.BigIntegerField(default=0)),
+                ('revenue_cents', models.BigIntegerField(default=0)),
+                ('cogs_cents', models.BigIntegerField(default=0)),
+                ('expenses_cents', models.BigIntegerField(default=0)),
+                ('purchases_cents', models.BigIntegerField(default=0)),
+                ('purchase_quantity', models.BigIntegerField(default=0)),
+                ('closed_period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='days', to='api.closedperiod')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PeriodExpenseSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(db_index=True)),
+                ('category_name', models.CharField(blank=True, max_length=100)),
+                ('amount_cents', models.BigIntegerField(default=0)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.expensecategory')),
+                ('closed_period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='expense_categories', to='api.closedperiod')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PeriodProductSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_name', models.CharField(max_length=100)),
+                ('product_brand', models.CharField(blank=True, max_length=100)),
+                ('quantity', models.BigIntegerField(default=0)),
+                ('revenue_cents', models.BigIntegerField(default=0)),
+                ('cogs_cents', models.BigIntegerField(default=0)),
+                ('closed_period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='products', to='api.closedperiod')),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.product')),
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_closed_period'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='idempotencykey',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='client',
+            field=models.CharField(default='', max_length=100),
+        ),
+        migrations.AlterUniqueTogether(
+            name='idempotencykey',
+            unique_together={('client', 'scope', 'key')},
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_idempotency_key_client'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='job',
+            name='result_file',
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='result_path',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
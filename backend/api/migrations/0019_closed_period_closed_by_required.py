@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-19 09:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def assign_unknown_closers(apps, schema_editor):
+    # Months closed anonymously before closing needed an admin: credit the
+    # first admin, as someone has to answer for them
+    ClosedPeriod = apps.get_model('api', 'ClosedPeriod')
+    CustomUser = apps.get_model('api', 'CustomUser')
+    unknown = ClosedPeriod.objects.filter(closed_by__isnull=True)
+    if not unknown.exists():
+        return
+    admin = CustomUser.objects.filter(Q(role='admin') | Q(is_superuser=True)).order_by('pk').first()
+    if admin is None:
+        raise RuntimeError("Closed months without closed_by need an admin user to be credited to; create one first.")
+    unknown.update(closed_by=admin)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_job_result_path'),
+    ]
+
+    operations = [
+        migrations.RunPython(assign_unknown_closers, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='closedperiod',
+            name='closed_by',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:35
+
+from django.db import migrations, models
+
+
+def start_heartbeats(apps, schema_editor):
+    # Jobs running now count as last heard from when they started
+    Job = apps.get_model('api', 'Job')
+    Job.objects.filter(status='running').update(heartbeat_at=models.F('started_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_closed_period_closed_by_required'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(start_heartbeats, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,10 @@
-from django.db import models, transaction
-from django.db.models import Sum
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Sum
+from datetime import timedelta
 from decimal import Decimal
+from . import business_time, inventory
+from .money import from_cents, to_cents
 # models.py
 from django.contrib.auth.models import AbstractUser
 
@@ -20,50 +24,134 @@ class CustomUser(AbstractUser):
 
 
 
+# Length of the product search columns. casefold() can lengthen text
+# ('ß' -> 'ss'), so a 100 character name may not fit unless cut.
+SEARCH_TEXT_LENGTH = 100
+
+
+def normalize_search_text(value):
+    """Lowercased, single-spaced form used by the product search columns."""
+    return ' '.join((value or '').casefold().split())[:SEARCH_TEXT_LENGTH]
+
+
 class Product(models.Model):
     name = models.CharField(max_length=100)
     brand = models.CharField(max_length=100, blank=True)
-    stock = models.PositiveBigIntegerField(default=0)
+    stock = models.PositiveBigIntegerField(default=0, db_index=True)
     buying_price = models.DecimalField(max_digits=10, decimal_places=2)
     selling_price = models.DecimalField(max_digits=10, decimal_places=2)
+    # buying_price in cents, for integer COGS sums (see money.py)
+    buying_price_cents = models.BigIntegerField(default=0, editable=False)
+    # Normalized copies of name/brand for indexed prefix search (see ProductViewSet.search)
+    name_search = models.CharField(max_length=SEARCH_TEXT_LENGTH, db_index=True, editable=False, default='')
+    brand_search = models.CharField(max_length=SEARCH_TEXT_LENGTH, db_index=True, editable=False, default='')
+    # Exponentially weighted units/day and stock / velocity (see inventory.py)
+    sales_velocity = models.FloatField(default=0, editable=False)
+    velocity_updated_at = models.DateTimeField(null=True, blank=True, editable=False)
+    days_of_cover = models.FloatField(null=True, blank=True, db_index=True, editable=False)
+    # Number of StockShard rows holding this product's stock, 0 = stock lives
+    # in `stock`. While sharded, `stock` is a snapshot (see inventory.py).
+    stock_shards = models.PositiveSmallIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.name
+
+    def refresh_search_fields(self):
+        self.name_search = normalize_search_text(self.name)
+        self.brand_search = normalize_search_text(self.brand)
+
+    def save(self, *args, **kwargs):
+        self.refresh_search_fields()
+        self.buying_price_cents = to_cents(self.buying_price)
+        self.days_of_cover = inventory.days_of_cover(self.stock, self.sales_velocity)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if {'name', 'brand'} & update_fields:
+                update_fields |= {'name_search', 'brand_search'}
+            if 'buying_price' in update_fields:
+                update_fields |= {'buying_price_cents'}
+            if {'stock', 'sales_velocity'} & update_fields:
+                update_fields |= {'days_of_cover'}
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
     
     @property
     def total_sales(self):
-        return Sale.objects.filter(product=self).aggregate(Sum('total_price'))['total_price__sum'] or Decimal('0.00')
+        hot = Sale.objects.filter(product=self, voided=False).aggregate(Sum('total_price_cents'))['total_price_cents__sum'] or 0
+        archived = SalesDailySummary.objects.filter(product=self).aggregate(Sum('revenue_cents'))['revenue_cents__sum'] or 0
+        return from_cents(hot + archived)
         
     @property
     def total_profit(self):
-        total_quantity_sold = Sale.objects.filter(product=self).aggregate(Sum('quantity'))['quantity__sum'] or 0
+        total_quantity_sold = Sale.objects.filter(product=self, voided=False).aggregate(Sum('quantity'))['quantity__sum'] or 0
+        total_quantity_sold += SalesDailySummary.objects.filter(product=self).aggregate(Sum('quantity'))['quantity__sum'] or 0
         return (self.selling_price - self.buying_price) * total_quantity_sold
 
 class Sale(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField()
     total_price = models.DecimalField(max_digits=10, decimal_places=2)
-    date = models.DateTimeField(auto_now_add=True)
+    total_price_cents = models.BigIntegerField(default=0, editable=False)
+    date = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Voided (returned) sales stay for the record but count nowhere: reports,
+    # rollups and velocities filter on this flag (see voids.py)
+    voided = models.BooleanField(default=False, db_index=True, editable=False)
+    voided_at = models.DateTimeField(null=True, blank=True, editable=False)
+    void_reason = models.CharField(max_length=255, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Covering index for the sales heatmap: a date range is read
+            # from the index alone, without touching the table
+            models.Index(fields=['date', 'voided', 'quantity', 'total_price_cents'], name='sale_date_covering_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         with transaction.atomic():
+            if self.voided:
+                raise ValueError("A voided sale cannot be changed")
+            if self.pk is not None and ClosedPeriod.is_closed(self.date):
+                raise ValueError(CLOSED_PERIOD_MESSAGE)
+
             # Validate quantity
             if self.quantity <= 0:
                 raise ValueError("Quantity must be positive")
             
             # Calculate total price
             self.total_price = self.product.selling_price * self.quantity
+            self.total_price_cents = to_cents(self.total_price)
+
+            if self.product.stock_shards:
+                return self._save_sharded(*args, **kwargs)
+
+            # Read stock and velocity under a row lock so concurrent sales
+            # of the same product cannot overwrite each other's decrement
+            locked = Product.objects.select_for_update().only(
+                'stock', 'sales_velocity', 'velocity_updated_at', 'stock_shards'
+            ).get(pk=self.product_id)
+            if locked.stock_shards:
+                # Sharded since self.product was loaded
+                self.product.stock_shards = locked.stock_shards
+                return self._save_sharded(*args, **kwargs)
+            self.product.stock = locked.stock
+            self.product.sales_velocity = locked.sales_velocity
+            self.product.velocity_updated_at = locked.velocity_updated_at
 
             # Handle stock updates
+            old_sale = None
             if self.pk is None:
                 # New sale: check stock and reduce
                 if self.product.stock < self.quantity:
                     raise ValueError("Insufficient stock")
                 self.product.stock -= self.product.stock >= self.quantity and self.quantity or 0
+                inventory.record_units_sold(self.product, self.quantity)
             else:
                 # Existing sale: adjust stock based on quantity change
                 old_sale = Sale.objects.get(pk=self.pk)
                 quantity_diff = self.quantity - old_sale.quantity
+                if quantity_diff:
+                    inventory.record_units_sold(self.product, quantity_diff)
                 if quantity_diff > 0:
                     # Increased quantity: check if enough stock for additional units
                     if self.product.stock < quantity_diff:
@@ -79,6 +167,42 @@ class Sale(models.Model):
             # Save the sale
             super().save(*args, **kwargs)
 
+            # Keep the monthly rollup in step (date is only known after saving)
+            if old_sale is not None:
+                ProductMonthlySales.add(old_sale.product_id, old_sale.date, -old_sale.quantity, -old_sale.total_price)
+            ProductMonthlySales.add(self.product_id, self.date, self.quantity, self.total_price)
+
+    def _save_sharded(self, *args, **kwargs):
+        """
+        Sale of a product with striped stock: take the units from one shard
+        and leave the Product row alone, so concurrent cashiers do not queue
+        on it. Velocity is refreshed by inventory.sync_sharded_stock().
+        """
+        old_sale = None if self.pk is None else Sale.objects.get(pk=self.pk)
+        quantity_diff = self.quantity - (old_sale.quantity if old_sale else 0)
+        if quantity_diff > 0:
+            inventory.take_stock(self.product, quantity_diff)
+        elif quantity_diff < 0:
+            inventory.return_stock(self.product, -quantity_diff)
+        super().save(*args, **kwargs)
+
+        # The (product, month) rollup row is as hot as the product row, so it
+        # is updated after commit as one short statement. If the process dies
+        # in between, rebuild_sales_rollup puts it right.
+        deltas = [(self.product_id, self.date, self.quantity, self.total_price)]
+        if old_sale is not None:
+            deltas.append((old_sale.product_id, old_sale.date, -old_sale.quantity, -old_sale.total_price))
+        transaction.on_commit(lambda: [ProductMonthlySales.add(*delta) for delta in deltas])
+
+    def delete(self, *args, **kwargs):
+        if ClosedPeriod.is_closed(self.date):
+            raise ValueError(CLOSED_PERIOD_MESSAGE)
+        with transaction.atomic():
+            if not self.voided:
+                # A void already took the sale out of the rollup
+                ProductMonthlySales.add(self.product_id, self.date, -self.quantity, -self.total_price)
+            return super().delete(*args, **kwargs)
+
 
 from django.core.exceptions import ValidationError
 
@@ -86,13 +210,17 @@ class Purchase(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField()
     total_cost = models.DecimalField(max_digits=10, decimal_places=2)
-    date = models.DateTimeField(auto_now_add=True)
+    total_cost_cents = models.BigIntegerField(default=0, editable=False)
+    date = models.DateTimeField(auto_now_add=True, db_index=True)
 
     def save(self, *args, **kwargs):
         with transaction.atomic():
             # Validate quantity
             if self.quantity <= 0:
                 raise ValidationError("Quantity must be positive")
+
+            if self.pk is not None and ClosedPeriod.is_closed(self.date):
+                raise ValidationError(CLOSED_PERIOD_MESSAGE)
             
             # Validate product buying_price
             if self.product.buying_price < 0:
@@ -100,9 +228,16 @@ class Purchase(models.Model):
 
             # Calculate total cost
             self.total_cost = self.product.buying_price * self.quantity
+            self.total_cost_cents = to_cents(self.total_cost)
+
+            if self.product.stock_shards:
+                return self._save_sharded(*args, **kwargs)
 
             # Lock the product to prevent race conditions
             product = Product.objects.select_for_update().get(pk=self.product.pk)
+            if product.stock_shards:
+                self.product.stock_shards = product.stock_shards
+                return self._save_sharded(*args, **kwargs)
 
             if self.pk is None:
                 # New purchase: increase stock
@@ -135,11 +270,361 @@ class Purchase(models.Model):
             # Save the purchase
             super().save(*args, **kwargs)
 
+    def _save_sharded(self, *args, **kwargs):
+        """Purchase of a product with striped stock: adjust one shard."""
+        quantity_diff = self.quantity
+        if self.pk is not None:
+            old_purchase = Purchase.objects.get(pk=self.pk)
+            if old_purchase.product_id != self.product_id:
+                raise ValidationError("Cannot move a purchase of a product with sharded stock to another product")
+            quantity_diff -= old_purchase.quantity
+        if quantity_diff > 0:
+            if inventory.available_stock(self.product) + quantity_diff > 1_000_000:
+                raise ValidationError(f"Stock for {self.product.name} exceeds maximum limit of 1,000,000")
+            inventory.return_stock(self.product, quantity_diff)
+        elif quantity_diff < 0:
+            try:
+                inventory.take_stock(self.product, -quantity_diff)
+            except ValueError:
+                raise ValidationError(f"Cannot update purchase: insufficient stock for product {self.product.name}")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        if ClosedPeriod.is_closed(self.date):
+            raise ValidationError(CLOSED_PERIOD_MESSAGE)
+        return super().delete(*args, **kwargs)
+
     def __str__(self):
         return f"Purchase of {self.quantity} {self.product.name} on {self.date}"
 
 
+class ExpenseCategory(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name_plural = 'expense categories'
+
+    def __str__(self):
+        return self.name
+
+
 class Expense(models.Model):
     title = models.CharField(max_length=100)
     amount = models.DecimalField(max_digits=10,decimal_places=2)
-    date = models.DateTimeField(auto_now_add=True)
+    amount_cents = models.BigIntegerField(default=0, editable=False)
+    date = models.DateTimeField(auto_now_add=True, db_index=True)
+    category = models.ForeignKey(ExpenseCategory, null=True, blank=True, on_delete=models.SET_NULL,
+                                 related_name='expenses')
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None and ClosedPeriod.is_closed(self.date):
+            raise ValidationError(CLOSED_PERIOD_MESSAGE)
+        self.amount_cents = to_cents(self.amount)
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        if ClosedPeriod.is_closed(self.date):
+            raise ValidationError(CLOSED_PERIOD_MESSAGE)
+        return super().delete(*args, **kwargs)
+
+
+# Archive of closed years (see archive.py).
+# Raw rows are kept in the Archived* tables for audits; reports only read
+# the *DailySummary tables, one row per product per local day.
+
+class ArchivedSale(models.Model):
+    original_id = models.BigIntegerField(unique=True)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField()
+    total_price = models.DecimalField(max_digits=10, decimal_places=2)
+    date = models.DateTimeField()
+    voided = models.BooleanField(default=False)
+
+
+class ArchivedPurchase(models.Model):
+    original_id = models.BigIntegerField(unique=True)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField()
+    total_cost = models.DecimalField(max_digits=10, decimal_places=2)
+    date = models.DateTimeField()
+
+
+class ArchivedExpense(models.Model):
+    original_id = models.BigIntegerField(unique=True)
+    title = models.CharField(max_length=100)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    date = models.DateTimeField()
+    category = models.ForeignKey(ExpenseCategory, null=True, blank=True, on_delete=models.SET_NULL)
+
+
+class ProductMonthlySales(models.Model):
+    """
+    Units and revenue per product per calendar month (local time), over the
+    whole history including archived years. Maintained by Sale.save/delete;
+    rebuild with `manage.py rebuild_sales_rollup` after bulk loads.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    month = models.DateField(db_index=True)  # first day of the month
+    quantity = models.BigIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('product', 'month')
+
+    @staticmethod
+    def month_of(value):
+        return business_time.month_of(value)
+
+    @classmethod
+    def add(cls, product_id, date, quantity, revenue):
+        """Atomic increment of one (product, month) row, creating it if needed."""
+        month = cls.month_of(date)
+        changes = {'quantity': F('quantity') + quantity, 'revenue': F('revenue') + revenue}
+        if cls.objects.filter(product_id=product_id, month=month).update(**changes):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(product_id=product_id, month=month, quantity=quantity, revenue=revenue)
+        except IntegrityError:
+            # Another writer created the row first
+            cls.objects.filter(product_id=product_id, month=month).update(**changes)
+
+
+class SalesDailySummary(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    day = models.DateField(db_index=True)
+    quantity = models.PositiveBigIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # quantity * buying_price at the time of archiving
+    cogs = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    revenue_cents = models.BigIntegerField(default=0)
+    cogs_cents = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('product', 'day')
+
+    def save(self, *args, **kwargs):
+        self.revenue_cents = to_cents(self.revenue)
+        self.cogs_cents = to_cents(self.cogs)
+        super().save(*args, **kwargs)
+
+
+class PurchaseDailySummary(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    day = models.DateField(db_index=True)
+    quantity = models.PositiveBigIntegerField(default=0)
+    total_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_cost_cents = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('product', 'day')
+
+    def save(self, *args, **kwargs):
+        self.total_cost_cents = to_cents(self.total_cost)
+        super().save(*args, **kwargs)
+
+
+class ExpenseDailySummary(models.Model):
+    # One row per local day and category; category NULL = uncategorised
+    day = models.DateField(db_index=True)
+    category = models.ForeignKey(ExpenseCategory, null=True, blank=True, on_delete=models.SET_NULL)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    amount_cents = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('day', 'category')
+
+    def save(self, *args, **kwargs):
+        self.amount_cents = to_cents(self.amount)
+        super().save(*args, **kwargs)
+
+
+class DemandForecast(models.Model):
+    """Latest demand forecast per product, written by `manage.py forecast_demand`."""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='forecast')
+    generated_at = models.DateTimeField()
+    horizon_days = models.PositiveIntegerField()
+    units = models.FloatField(db_index=True)  # total over the horizon
+    daily = models.JSONField()  # one value per day of the horizon
+
+
+class IdempotencyKey(models.Model):
+    """
+    Response of a create call made with an Idempotency-Key header, replayed
+    when the client retries with the same key. Expired rows are removed by
+    `manage.py purge_idempotency_keys`.
+    """
+    key = models.CharField(max_length=255)
+    client = models.CharField(max_length=100, default='')  # 'user:<id>', or 'ip:<address>' when anonymous
+    scope = models.CharField(max_length=255)  # method and request path the key was used on
+    fingerprint = models.CharField(max_length=64)  # sha256 of the request body
+    status_code = models.PositiveSmallIntegerField()
+    response_body = models.JSONField(encoder=DjangoJSONEncoder, null=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        unique_together = ('client', 'scope', 'key')
+
+
+class Job(models.Model):
+    """
+    Background work (reports, exports) queued by the API and executed by
+    `manage.py run_workers`. Handlers live in api/jobs.py.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    created_by = models.ForeignKey(CustomUser, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Refreshed by the worker while the job runs (see jobs.heartbeat)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True)
+    error = models.TextField(blank=True)
+
+    # Either a JSON result or a file, stored under JOB_FILES_DIR
+    result = models.JSONField(encoder=DjangoJSONEncoder, null=True, blank=True)
+    result_path = models.CharField(max_length=255, blank=True)  # relative to JOB_FILES_DIR
+    result_filename = models.CharField(max_length=255, blank=True)
+    result_content_type = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers claim the oldest queued job
+            models.Index(fields=['status', 'created_at'], name='job_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+
+class StockShard(models.Model):
+    """
+    One stripe of a hot product's stock. Sales and purchases update a random
+    shard instead of the Product row; the real stock is the sum.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='shards')
+    index = models.PositiveSmallIntegerField()
+    quantity = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('product', 'index')
+
+
+class ExportCursor(models.Model):
+    """How far each table has been exported to Parquet (see parquet_export.py)."""
+    table = models.CharField(max_length=30, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    rows = models.BigIntegerField(default=0)
+    exported_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.table} up to #{self.last_id}"
+
+
+class AuditLog(models.Model):
+    """One audited write, buffered and bulk inserted by audit.py."""
+    created_at = models.DateTimeField(db_index=True)
+    user = models.ForeignKey(CustomUser, null=True, blank=True, on_delete=models.SET_NULL)
+    object_type = models.CharField(max_length=20)  # 'sale', 'purchase', 'expense', 'product'
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10)
+    # {field: [before, after]}
+    changes = models.JSONField(encoder=DjangoJSONEncoder, default=dict)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['object_type', 'object_id', 'created_at'], name='audit_object_idx'),
+            models.Index(fields=['user', 'created_at'], name='audit_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.object_type} #{self.object_id}"
+
+
+# Month-end close (see periods.py)
+
+CLOSED_PERIOD_MESSAGE = "Transactions dated in a closed period cannot be changed or deleted."
+
+
+class ClosedPeriod(models.Model):
+    """
+    A closed calendar month (BUSINESS_TIME_ZONE) with its totals frozen. Months are
+    closed in order, so every day before open_from() is closed.
+    """
+    month = models.DateField(unique=True)  # first day of the month
+    closed_at = models.DateTimeField(auto_now_add=True)
+    # Closing cannot be undone, so who did it is kept with the books
+    closed_by = models.ForeignKey(CustomUser, on_delete=models.PROTECT)
+    quantity_sold = models.BigIntegerField(default=0)
+    revenue_cents = models.BigIntegerField(default=0)
+    cogs_cents = models.BigIntegerField(default=0)
+    expenses_cents = models.BigIntegerField(default=0)
+    purchases_cents = models.BigIntegerField(default=0)
+    purchase_quantity = models.BigIntegerField(default=0)
+
+    class Meta:
+        ordering = ['month']
+
+    @staticmethod
+    def next_month(month):
+        return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+    @classmethod
+    def open_from(cls):
+        """First day of the open period, or None while nothing is closed."""
+        last = cls.objects.order_by('-month').values_list('month', flat=True).first()
+        return None if last is None else cls.next_month(last)
+
+    @classmethod
+    def is_closed(cls, value):
+        """Whether the datetime `value` falls in a closed month."""
+        if value is None:  # not saved yet: dated now
+            return False
+        open_day = cls.open_from()
+        return open_day is not None and business_time.localdate(value) < open_day
+
+    def __str__(self):
+        return self.month.strftime('%Y-%m')
+
+
+class PeriodDaySnapshot(models.Model):
+    """Frozen totals of one local day of a closed month, for the period reports."""
+    closed_period = models.ForeignKey(ClosedPeriod, on_delete=models.CASCADE, related_name='days')
+    day = models.DateField(unique=True)
+    quantity_sold = models.BigIntegerField(default=0)
+    revenue_cents = models.BigIntegerField(default=0)
+    cogs_cents = models.BigIntegerField(default=0)
+    expenses_cents = models.BigIntegerField(default=0)
+    purchases_cents = models.BigIntegerField(default=0)
+    purchase_quantity = models.BigIntegerField(default=0)
+
+
+class PeriodExpenseSnapshot(models.Model):
+    # One row per local day and category of a closed month; the name is kept
+    # as it was at the close
+    closed_period = models.ForeignKey(ClosedPeriod, on_delete=models.CASCADE, related_name='expense_categories')
+    day = models.DateField(db_index=True)
+    category = models.ForeignKey(ExpenseCategory, null=True, blank=True, on_delete=models.SET_NULL)
+    category_name = models.CharField(max_length=100, blank=True)
+    amount_cents = models.BigIntegerField(default=0)
+
+
+class PeriodProductSnapshot(models.Model):
+    """Units, revenue and COGS of one product over a closed month."""
+    closed_period = models.ForeignKey(ClosedPeriod, on_delete=models.CASCADE, related_name='products')
+    product = models.ForeignKey(Product, null=True, blank=True, on_delete=models.SET_NULL)
+    product_name = models.CharField(max_length=100)
+    product_brand = models.CharField(max_length=100, blank=True)
+    quantity = models.BigIntegerField(default=0)
+    revenue_cents = models.BigIntegerField(default=0)
+    cogs_cents = models.BigIntegerField(default=0)
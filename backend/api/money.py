@@ -0,0 +1,64 @@
+"""
+Money as integer minor units (cents).
+
+The DecimalField columns that reports add up each have a *_cents
+BigIntegerField next to them. The models' save() keeps them in step, and so
+do the bulk writers (seed_dataset, archive). Reports sum the integers in SQL
+and turn the result into a Decimal once, with from_cents(). On SQLite,
+where decimals are stored as REAL/TEXT, this is both faster and exact.
+
+`manage.py backfill_cents` recomputes every column from the decimals.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db.models import BigIntegerField, F
+from django.db.models.functions import Cast, Round
+
+CENT = Decimal('0.01')
+
+# (model, decimal field, cents field)
+CENTS_COLUMNS = [
+    ('Product', 'buying_price', 'buying_price_cents'),
+    ('Sale', 'total_price', 'total_price_cents'),
+    ('Purchase', 'total_cost', 'total_cost_cents'),
+    ('Expense', 'amount', 'amount_cents'),
+    ('SalesDailySummary', 'revenue', 'revenue_cents'),
+    ('SalesDailySummary', 'cogs', 'cogs_cents'),
+    ('PurchaseDailySummary', 'total_cost', 'total_cost_cents'),
+    ('ExpenseDailySummary', 'amount', 'amount_cents'),
+]
+
+
+def to_cents(value):
+    return int((Decimal(value) * 100).to_integral_value(ROUND_HALF_UP))
+
+
+def from_cents(value):
+    """Integer cents (or None from an empty SUM) to a 2-place Decimal."""
+    return (Decimal(value or 0) / 100).quantize(CENT)
+
+
+def backfill_cents(get_model=None, batch_size=100_000, log=None):
+    """
+    Recompute every *_cents column from its decimal with set-based UPDATEs,
+    one pk range of `batch_size` rows per statement. `get_model` is
+    apps.get_model inside migrations. Returns {label: rows updated}.
+    """
+    if get_model is None:
+        from django.apps import apps
+        get_model = apps.get_model
+
+    updated = {}
+    for model_name, decimal_field, cents_field in CENTS_COLUMNS:
+        model = get_model('api', model_name)
+        rows = 0
+        last = model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        for start in range(0, last + 1, batch_size):
+            rows += model.objects.filter(pk__gte=start, pk__lt=start + batch_size).update(**{
+                cents_field: Cast(Round(F(decimal_field) * 100), BigIntegerField()),
+            })
+        label = f"{model_name}.{cents_field}"
+        updated[label] = rows
+        if log:
+            log(f"{label}: {rows} rows")
+    return updated
@@ -0,0 +1,24 @@
+from rest_framework.pagination import PageNumberPagination
+
+
+class OptionalPageNumberPagination(PageNumberPagination):
+    """
+    Page-number pagination that only kicks in when the client asks for it
+    with ?page= or ?page_size=, so existing callers keep getting a plain list.
+    """
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.page_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class AlwaysPageNumberPagination(PageNumberPagination):
+    """For endpoints that can grow without bound, such as the audit log: always paginated."""
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
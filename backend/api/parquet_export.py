@@ -0,0 +1,224 @@
+"""
+Columnar export of the transaction history for analysts.
+
+Each table is streamed from the database in pk order with .iterator() and
+written as Arrow record batches into Hive-partitioned Parquet files:
+
+    <PARQUET_EXPORT_DIR>/sale/year=2025/month=03/part-000000000001.parquet
+
+Partitions are by local month in BUSINESS_TIME_ZONE, like the reports.
+An ExportCursor row per table remembers the last exported id, so each run
+appends only the new rows as new files. At most `chunk_size` rows are held
+in memory at once.
+
+Rows are exported once, as they were at the time. Later edits to exported
+rows, including voids (see voids.py), are not picked up. Rows archived before their first export (see
+archive.py) live in the Archived* tables and are not covered either.
+"""
+import os
+import shutil
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+from importlib.util import find_spec
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import F, Min
+from django.utils import timezone
+
+from . import business_time
+from .models import Expense, ExportCursor, Purchase, Sale
+from .money import CENT
+
+# Importing PyArrow (and NumPy with it) takes a good part of a cold start,
+# and jobs.py pulls this module into every process: it is only loaded by
+# require_pyarrow(), when an export runs
+HAVE_PYARROW = find_spec('pyarrow') is not None
+pa = pc = pq = None
+
+CHUNK_SIZE = 50_000
+# Rows younger than this wait for the next run, so a transaction that got
+# its id earlier but commits later is not skipped by the cursor
+SETTLE = timedelta(minutes=1)
+
+# (column, ORM lookup, arrow type name). A 'money' column is not fetched:
+# it is the exact decimal of the *_cents column it names (see money.py).
+Table = namedtuple('Table', ['model', 'columns'])
+TABLES = {
+    'sale': Table(Sale, [
+        ('id', 'id', 'int64'),
+        ('date', 'date', 'timestamp'),
+        ('product_id', 'product_id', 'int64'),
+        ('product_name', 'product__name', 'string'),
+        ('product_brand', 'product__brand', 'string'),
+        ('quantity', 'quantity', 'int64'),
+        ('total_price', 'total_price_cents', 'money'),
+        ('total_price_cents', 'total_price_cents', 'int64'),
+        ('voided', 'voided', 'bool'),
+    ]),
+    'purchase': Table(Purchase, [
+        ('id', 'id', 'int64'),
+        ('date', 'date', 'timestamp'),
+        ('product_id', 'product_id', 'int64'),
+        ('product_name', 'product__name', 'string'),
+        ('product_brand', 'product__brand', 'string'),
+        ('quantity', 'quantity', 'int64'),
+        ('total_cost', 'total_cost_cents', 'money'),
+        ('total_cost_cents', 'total_cost_cents', 'int64'),
+    ]),
+    'expense': Table(Expense, [
+        ('id', 'id', 'int64'),
+        ('date', 'date', 'timestamp'),
+        ('title', 'title', 'string'),
+        ('category', 'category__name', 'string'),
+        ('amount', 'amount_cents', 'money'),
+        ('amount_cents', 'amount_cents', 'int64'),
+    ]),
+}
+
+
+def require_pyarrow():
+    global pa, pc, pq
+    if not HAVE_PYARROW:
+        raise RuntimeError("Parquet export needs PyArrow (pip install pyarrow).")
+    if pa is None:
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+        import pyarrow as pa
+
+
+def export_dir():
+    return Path(settings.PARQUET_EXPORT_DIR)
+
+
+def arrow_schema(table):
+    types = {
+        'int64': pa.int64(),
+        'string': pa.string(),
+        'bool': pa.bool_(),
+        'timestamp': pa.timestamp('us', tz='UTC'),
+        # Any int64 number of cents fits
+        'money': pa.decimal128(19, 2),
+    }
+    return pa.schema([(name, types[kind]) for name, _, kind in table.columns])
+
+
+def export_table(name, out_dir=None, chunk_size=CHUNK_SIZE, full=False, settle=SETTLE):
+    """
+    Append the rows of table `name` added since its last export. With
+    full=True the table's files and cursor are dropped and everything is
+    exported again. Returns {'rows', 'last_id', 'files'}.
+    """
+    require_pyarrow()
+    table = TABLES[name]
+    out_dir = Path(out_dir or export_dir())
+    table_dir = out_dir / name
+
+    cursor, _ = ExportCursor.objects.get_or_create(table=name)
+    if full:
+        ExportCursor.objects.filter(pk=cursor.pk).update(last_id=0, rows=0, exported_at=None)
+        cursor.last_id = 0
+        shutil.rmtree(table_dir, ignore_errors=True)
+    since = cursor.last_id
+
+    rows = table.model.objects.filter(pk__gt=since)
+    unsettled = rows.filter(date__gte=timezone.now() - settle).aggregate(first=Min('pk'))['first']
+    if unsettled is not None:
+        rows = rows.filter(pk__lt=unsettled)
+    fetched = [(column, lookup) for column, lookup, kind in table.columns if kind != 'money']
+    rows = rows.order_by('pk').values_list(*[lookup for _, lookup in fetched])
+
+    writer = _PartitionWriter(table, f"part-{since + 1:012d}.parquet", table_dir, [column for column, _ in fetched])
+    tz = business_time.tz()
+    date_index = [column for column, _ in fetched].index('date')
+    buffers = defaultdict(list)
+    buffered = count = 0
+    last_id = since
+    try:
+        for row in rows.iterator(chunk_size=chunk_size):
+            local = row[date_index].astimezone(tz)
+            buffers[(local.year, local.month)].append(row)
+            buffered += 1
+            if buffered >= chunk_size:
+                count += writer.write(buffers)
+                buffers, buffered = defaultdict(list), 0
+            last_id = row[0]
+        count += writer.write(buffers)
+        files = writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+
+    # Only advance the cursor if nobody else exported this table meanwhile
+    moved = ExportCursor.objects.filter(pk=cursor.pk, last_id=since).update(
+        last_id=last_id, rows=F('rows') + count, exported_at=timezone.now(),
+    )
+    if not moved:
+        for path in files:
+            path.unlink(missing_ok=True)
+        raise RuntimeError(f"Another export of '{name}' finished first; nothing was written.")
+    return {'rows': count, 'last_id': last_id, 'files': [str(path.relative_to(out_dir)) for path in files]}
+
+
+def export_all(tables=None, **kwargs):
+    return {name: export_table(name, **kwargs) for name in (tables or TABLES)}
+
+
+class _PartitionWriter:
+    """
+    One ParquetWriter per year/month partition touched by this run. Files
+    are written under a .tmp name and renamed on close, so readers never see
+    a half-written file. A rerun after a crash overwrites the same names.
+    """
+
+    def __init__(self, table, filename, table_dir, fetched):
+        self.table = table
+        self.schema = arrow_schema(table)
+        self.filename = filename
+        self.table_dir = table_dir
+        self.fetched = fetched
+        self.writers = {}
+
+    def path(self, key):
+        year, month = key
+        return self.table_dir / f"year={year}" / f"month={month:02d}" / self.filename
+
+    def write(self, buffers):
+        written = 0
+        for key, rows in buffers.items():
+            writer = self.writers.get(key)
+            if writer is None:
+                path = self.path(key)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                writer = self.writers[key] = pq.ParquetWriter(f"{path}.tmp", self.schema)
+            writer.write_batch(self.record_batch(rows))
+            written += len(rows)
+        return written
+
+    def record_batch(self, rows):
+        fetched = {
+            column: pa.array(values, type=self.schema.field(column).type)
+            for column, values in zip(self.fetched, zip(*rows))
+        }
+        arrays = []
+        for column, source, kind in self.table.columns:
+            if kind == 'money':
+                cents = fetched[source].cast(pa.decimal128(19, 0))
+                arrays.append(pc.multiply(cents, pa.scalar(CENT, pa.decimal128(3, 2))).cast(pa.decimal128(19, 2)))
+            else:
+                arrays.append(fetched[column])
+        return pa.record_batch(arrays, schema=self.schema)
+
+    def close(self):
+        paths = []
+        for key, writer in self.writers.items():
+            writer.close()
+            path = self.path(key)
+            os.replace(f"{path}.tmp", path)
+            paths.append(path)
+        return sorted(paths)
+
+    def abort(self):
+        for key, writer in self.writers.items():
+            writer.close()
+            Path(f"{self.path(key)}.tmp").unlink(missing_ok=True)
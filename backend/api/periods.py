@@ -0,0 +1,167 @@
+"""
+Month-end close.
+
+close_through(month, user) closes every open month up to `month`, oldest first.
+Closing a month freezes its figures in snapshot rows:
+- ClosedPeriod: the month's totals,
+- PeriodDaySnapshot: units, revenue, COGS, expenses and purchases per local day,
+- PeriodExpenseSnapshot: expenses per local day and category,
+- PeriodProductSnapshot: units, revenue and COGS per product.
+From then on, sales, purchases and expenses dated in that month can no
+longer be changed, voided or deleted (see the models' save/delete).
+
+Months are closed in order, so the closed history is everything before a
+single day, ClosedPeriod.open_from(). The reports read that part from the
+snapshots and only compute the open period live (see open_only()). COGS
+is frozen at the buying prices of the close, as archiving does.
+"""
+from collections import defaultdict
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import F, Min, Sum
+
+from . import business_time
+from .business_time import BusinessTrunc
+from .models import (
+    ClosedPeriod, Expense, ExpenseCategory, ExpenseDailySummary, PeriodDaySnapshot, PeriodExpenseSnapshot,
+    PeriodProductSnapshot, Product, Purchase, PurchaseDailySummary, Sale, SalesDailySummary,
+)
+
+
+def open_only(queryset, open_day, field='date'):
+    """
+    Leave out the rows of closed months: transactions by their `date`,
+    daily summaries by their `day` (field='day').
+    """
+    if open_day is None:
+        return queryset
+    if field == 'day':
+        return queryset.filter(day__gte=open_day)
+    return queryset.filter(date__gte=business_time.midnight(open_day))
+
+
+def first_open_month():
+    """The month the next close covers, or None if there is nothing to close."""
+    open_day = ClosedPeriod.open_from()
+    if open_day is not None:
+        return open_day
+    firsts = [
+        business_time.localdate(value) for value in (
+            Sale.objects.aggregate(first=Min('date'))['first'],
+            Purchase.objects.aggregate(first=Min('date'))['first'],
+            Expense.objects.aggregate(first=Min('date'))['first'],
+        ) if value is not None
+    ] + [
+        value for value in (
+            SalesDailySummary.objects.aggregate(first=Min('day'))['first'],
+            PurchaseDailySummary.objects.aggregate(first=Min('day'))['first'],
+            ExpenseDailySummary.objects.aggregate(first=Min('day'))['first'],
+        ) if value is not None
+    ]
+    return min(firsts).replace(day=1) if firsts else None
+
+
+def close_through(month, user):
+    """
+    Close every open month up to and including the one `month` falls in,
+    recording `user` (an admin) as who closed them. Each month is closed in
+    its own transaction. Returns the new periods.
+    """
+    month = month.replace(day=1)
+    if month >= business_time.localdate().replace(day=1):
+        raise ValueError("Only months that have ended can be closed.")
+    current = first_open_month() or month
+    if current > month:
+        raise ValueError(f"{month:%Y-%m} is already closed.")
+    closed = []
+    while current <= month:
+        closed.append(_close_month(current, user))
+        current = ClosedPeriod.next_month(current)
+    return closed
+
+
+def _close_month(month, user):
+    end = ClosedPeriod.next_month(month)
+    hot = {'date__gte': business_time.midnight(month), 'date__lt': business_time.midnight(end)}
+    archived = {'day__gte': month, 'day__lt': end}
+    days = defaultdict(lambda: defaultdict(int))
+    products = defaultdict(lambda: defaultdict(int))
+
+    with transaction.atomic():
+        # The unique month makes a concurrent close of the same month fail
+        period = ClosedPeriod.objects.create(month=month, closed_by=user)
+
+        sales = Sale.objects.filter(voided=False, **hot)
+        sale_totals = {
+            'units': Sum('quantity'),
+            'revenue': Sum('total_price_cents'),
+            'cogs': Sum(F('quantity') * F('product__buying_price_cents')),
+        }
+        archived_sale_totals = {'units': Sum('quantity'), 'revenue': Sum('revenue_cents'), 'cogs': Sum('cogs_cents')}
+        for row in (
+            list(sales.annotate(day=BusinessTrunc('date', 'day')).values('day').annotate(**sale_totals).order_by())
+            + list(SalesDailySummary.objects.filter(**archived).values('day')
+                   .annotate(**archived_sale_totals).order_by())
+        ):
+            _add(days[_as_date(row['day'])], quantity_sold=row['units'], revenue_cents=row['revenue'],
+                 cogs_cents=row['cogs'])
+        for row in (
+            list(sales.values('product_id').annotate(**sale_totals).order_by())
+            + list(SalesDailySummary.objects.filter(**archived).values('product_id')
+                   .annotate(**archived_sale_totals).order_by())
+        ):
+            _add(products[row['product_id']], quantity=row['units'], revenue_cents=row['revenue'],
+                 cogs_cents=row['cogs'])
+
+        for row in (
+            list(Purchase.objects.filter(**hot).annotate(day=BusinessTrunc('date', 'day')).values('day')
+                 .annotate(quantity=Sum('quantity'), cost=Sum('total_cost_cents')).order_by())
+            + list(PurchaseDailySummary.objects.filter(**archived).values('day')
+                   .annotate(quantity=Sum('quantity'), cost=Sum('total_cost_cents')).order_by())
+        ):
+            _add(days[_as_date(row['day'])], purchase_quantity=row['quantity'], purchases_cents=row['cost'])
+
+        expenses = defaultdict(int)
+        for row in (
+            list(Expense.objects.filter(**hot).annotate(day=BusinessTrunc('date', 'day')).values('day', 'category_id')
+                 .annotate(amount=Sum('amount_cents')).order_by())
+            + list(ExpenseDailySummary.objects.filter(**archived).values('day', 'category_id')
+                   .annotate(amount=Sum('amount_cents')).order_by())
+        ):
+            day = _as_date(row['day'])
+            expenses[(day, row['category_id'])] += row['amount'] or 0
+            _add(days[day], expenses_cents=row['amount'])
+
+        names = dict(ExpenseCategory.objects.filter(pk__in={pk for _, pk in expenses}).values_list('pk', 'name'))
+        details = Product.objects.only('name', 'brand').in_bulk(list(products))
+        PeriodDaySnapshot.objects.bulk_create([
+            PeriodDaySnapshot(closed_period=period, day=day, **totals) for day, totals in sorted(days.items())
+        ])
+        PeriodExpenseSnapshot.objects.bulk_create([
+            PeriodExpenseSnapshot(closed_period=period, day=day, category_id=category_id,
+                                  category_name=names.get(category_id, ''), amount_cents=amount)
+            for (day, category_id), amount in expenses.items()
+        ])
+        PeriodProductSnapshot.objects.bulk_create([
+            PeriodProductSnapshot(closed_period=period, product_id=product_id,
+                                  product_name=details[product_id].name, product_brand=details[product_id].brand,
+                                  **totals)
+            for product_id, totals in products.items()
+        ])
+
+        for field in ('quantity_sold', 'revenue_cents', 'cogs_cents', 'expenses_cents', 'purchases_cents',
+                      'purchase_quantity'):
+            setattr(period, field, sum(totals[field] for totals in days.values()))
+        period.save()
+    return period
+
+
+def _add(totals, **values):
+    for field, value in values.items():
+        totals[field] += value or 0
+
+
+def _as_date(value):
+    # BusinessTrunc gives local datetimes, the summaries dates
+    return value.date() if isinstance(value, datetime) else value
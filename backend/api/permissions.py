@@ -0,0 +1,17 @@
+from rest_framework.permissions import BasePermission
+
+
+def is_admin(user):
+    """A signed-in user with the admin role, or a superuser."""
+    return bool(user and user.is_authenticated and (user.role == 'admin' or user.is_superuser))
+
+
+class IsAdminRole(BasePermission):
+    """
+    Only admins (CustomUser.role, see is_admin). For what cannot be undone
+    or tells who did what: closing the books, the audit trail.
+    """
+    message = "Only admins can do this."
+
+    def has_permission(self, request, view):
+        return is_admin(request.user)
@@ -0,0 +1,147 @@
+"""
+Bulk product edits for PATCH /api/products/bulk/.
+
+Changes are checked against the rows' current values in one pass, with the
+same field validation and business rules as ProductSerializer, and written
+with bulk_update (one CASE WHEN statement per batch) in a single
+transaction. The columns Product.save() derives (search fields, cents,
+days of cover) are kept in step, and sharded stock is re-spread.
+"""
+from collections import namedtuple
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from django.db import transaction
+from rest_framework import serializers
+
+from . import audit, dashboard, inventory
+from .models import Product, normalize_search_text
+from .money import CENT, to_cents
+from .serializers import PRODUCT_RULE_FIELDS, ProductSerializer, product_value_errors
+
+EDITABLE_FIELDS = ['name', 'brand', 'stock', 'buying_price', 'selling_price']
+PRICE_FIELDS = ['buying_price', 'selling_price']
+MAX_ROWS = 10_000
+BATCH_SIZE = 1_000
+
+# A relative price change, resolved against the locked row
+Percent = namedtuple('Percent', ['value'])
+
+
+def parse_updates(items):
+    """
+    [{"id": 1, "selling_price": "12.50"}, ...] -> ({id: {field: value}}, errors).
+    Values go through the ProductSerializer fields, so they are parsed and
+    bounded exactly as on PUT /api/products/{id}/.
+    """
+    fields = ProductSerializer().fields
+    changes, errors = {}, []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get('id'), int):
+            errors.append({'index': index, 'errors': {'id': "Each update needs an integer id."}})
+            continue
+        pk = item['id']
+        row_errors, values = {}, {}
+        for field, value in item.items():
+            if field == 'id':
+                continue
+            if field not in EDITABLE_FIELDS:
+                row_errors[field] = "This field cannot be bulk updated."
+                continue
+            try:
+                values[field] = fields[field].run_validation(value)
+            except serializers.ValidationError as e:
+                row_errors[field] = e.detail[0] if isinstance(e.detail, list) else e.detail
+        if pk in changes:
+            row_errors['id'] = "Duplicate id."
+        if not values and not row_errors:
+            row_errors['id'] = "No fields to update."
+        if row_errors:
+            errors.append({'index': index, 'id': pk, 'errors': row_errors})
+        else:
+            changes[pk] = values
+    return changes, errors
+
+
+def parse_adjustment(filters, adjust):
+    """
+    {"brand": "Kakira"} or {"ids": [...]} plus {"selling_price": 10} (percent)
+    -> {id: {field: Percent}} for every matching product.
+    """
+    if not isinstance(filters, dict) or not set(filters) & {'brand', 'ids'} or set(filters) - {'brand', 'ids'}:
+        raise ValueError("filter must have 'brand' and/or 'ids'")
+    if not isinstance(adjust, dict) or not adjust or set(adjust) - set(PRICE_FIELDS):
+        raise ValueError(f"adjust must map {' and/or '.join(PRICE_FIELDS)} to a percentage")
+    percents = {}
+    for field, value in adjust.items():
+        try:
+            percent = Decimal(str(value))
+        except InvalidOperation:
+            raise ValueError(f"{field} must be a number")
+        if not percent.is_finite() or percent <= -100:
+            raise ValueError(f"{field} must be a percentage above -100")
+        percents[field] = Percent(percent)
+
+    products = Product.objects.all()
+    if 'brand' in filters:
+        products = products.filter(brand_search=normalize_search_text(str(filters['brand'])))
+    if 'ids' in filters:
+        ids = filters['ids']
+        if not isinstance(ids, list) or not all(isinstance(pk, int) for pk in ids):
+            raise ValueError("ids must be a list of integers")
+        products = products.filter(pk__in=ids)
+    return {pk: dict(percents) for pk in products.values_list('pk', flat=True)}
+
+
+def apply_updates(changes, atomic=True):
+    """
+    Apply {id: {field: value | Percent}}. Rows that are missing or break a
+    rule are reported as [{'id', 'errors'}]. With atomic=True one bad row
+    means nothing is written. Returns (updated ids, errors).
+    """
+    errors, updated, touched = [], [], set()
+    with transaction.atomic():
+        products = Product.objects.select_for_update().in_bulk(list(changes))
+        restock = []
+        for pk, values in changes.items():
+            product = products.get(pk)
+            if product is None:
+                errors.append({'id': pk, 'errors': {'id': "Product not found."}})
+                continue
+            current = {field: getattr(product, field) for field in PRODUCT_RULE_FIELDS}
+            for field, value in values.items():
+                if isinstance(value, Percent):
+                    value = (current[field] * (100 + value.value) / 100).quantize(CENT, ROUND_HALF_UP)
+                setattr(product, field, value)
+            row_errors = product_value_errors({field: getattr(product, field) for field in PRODUCT_RULE_FIELDS})
+            if row_errors:
+                errors.append({'id': pk, 'errors': row_errors})
+                continue
+
+            product.refresh_search_fields()
+            product.buying_price_cents = to_cents(product.buying_price)
+            if 'stock' in values and product.stock_shards:
+                restock.append(product)
+            product.days_of_cover = inventory.days_of_cover(product.stock, product.sales_velocity)
+            updated.append(product)
+            touched |= set(values)
+
+        if errors and atomic:
+            return [], errors
+
+        fields = set(touched)
+        if {'name', 'brand'} & fields:
+            fields |= {'name_search', 'brand_search'}
+        if 'buying_price' in fields:
+            fields.add('buying_price_cents')
+        if 'stock' in fields:
+            fields.add('days_of_cover')
+        if updated:
+            Product.objects.bulk_update(updated, sorted(fields), batch_size=BATCH_SIZE)
+            dashboard.changed()
+        # bulk_update sends no signals
+        for product in updated:
+            audit.record_changes(product)
+        # Sharded stock lives in StockShard rows: spread the new level over them
+        for product in restock:
+            inventory.shard_stock(product, product.stock_shards, stock=product.stock)
+    return [product.pk for product in updated], errors
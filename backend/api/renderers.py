@@ -0,0 +1,90 @@
+import re
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # DRF's JSONRenderer is used instead
+    orjson = None
+
+
+def _decimal_mode():
+    """
+    How Decimal values are written: 'number' (exact JSON number, the default,
+    same shape DRF produces for raw Decimals) or 'string' (exact quoted string).
+    """
+    return getattr(settings, 'FAST_JSON_DECIMALS', 'number')
+
+
+class _DecimalStringEncoder(JSONEncoder):
+    """DRF's encoder, except Decimals are written as exact strings rather than floats."""
+
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return str(obj)
+        return super().default(obj)
+
+
+class _DecimalStringJSONRenderer(JSONRenderer):
+    encoder_class = _DecimalStringEncoder
+
+
+_drf_encoder = JSONEncoder()
+
+
+def _orjson_default(marker):
+    use_fragment = _decimal_mode() == 'number' and hasattr(orjson, 'Fragment')
+
+    def default(obj):
+        if isinstance(obj, Decimal):
+            if use_fragment:
+                return orjson.Fragment(str(obj).encode())
+            if marker:
+                return f'{marker}{obj}'
+            return str(obj)
+        # lazy strings, querysets, timedeltas... same rules as DRF
+        return _drf_encoder.default(obj)
+    return default
+
+
+def _decimal_marker():
+    # orjson before 3.9 has no Fragment: numbers are tagged and unquoted afterwards
+    if _decimal_mode() != 'number' or hasattr(orjson, 'Fragment'):
+        return None
+    return f'__dec_{uuid.uuid4().hex}__'
+
+
+class FastJSONRenderer(BaseRenderer):
+    """
+    Drop-in replacement for rest_framework.renderers.JSONRenderer.
+
+    Uses orjson (see requirements.txt), which renders Decimals exactly,
+    never through float. Without it, DRF's JSONRenderer does the work.
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        if orjson is None:
+            # DRF's own renderer: in 'number' mode Decimals go through float,
+            # as they always did without this renderer
+            renderer = _DecimalStringJSONRenderer() if _decimal_mode() == 'string' else JSONRenderer()
+            return renderer.render(data, accepted_media_type, renderer_context)
+
+        marker = _decimal_marker()
+        body = orjson.dumps(
+            data,
+            default=_orjson_default(marker),
+            option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS,
+        )
+        if marker:
+            body = re.sub(f'"{marker}([^"]*)"'.encode(), rb'\1', body)
+        return body
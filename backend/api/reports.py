@@ -1,8 +1,25 @@
 # your_app/reports.py
-from django.db.models import Sum, F, ExpressionWrapper, DecimalField
-from django.db.models.functions import TruncDay, TruncWeek, TruncMonth, TruncYear
-from decimal import Decimal
-from .models import Sale, Expense
+from django.db.models import Sum, F, ExpressionWrapper, Func, IntegerField, Q, Value
+from datetime import datetime, timedelta
+from functools import partial
+from . import business_time
+from .business_time import BusinessTrunc
+from .models import Sale, Expense, SalesDailySummary, ExpenseDailySummary
+from .models import ClosedPeriod, PeriodDaySnapshot, PeriodExpenseSnapshot
+from .money import from_cents
+from .periods import open_only
+
+def _period_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+# Periods are business days, weeks, months and years (see business_time.py)
+TRUNC_FUNCS = {
+    period: partial(BusinessTrunc, kind=kind)
+    for period, kind in [('daily', 'day'), ('weekly', 'week'), ('monthly', 'month'), ('yearly', 'year')]
+}
+UNCATEGORIZED = 'Uncategorized'
+
 
 def get_profit_calculations(period='daily'):
     """
@@ -10,35 +27,66 @@ def get_profit_calculations(period='daily'):
     - period: 'daily', 'weekly', 'monthly', 'yearly'
     Returns a list of dicts with 'period', 'revenue', 'cogs', 'expenses', 'profit'
     """
-    if period == 'daily':
-        trunc_func = TruncDay
-    elif period == 'weekly':
-        trunc_func = TruncWeek
-    elif period == 'monthly':
-        trunc_func = TruncMonth
-    elif period == 'yearly':
-        trunc_func = TruncYear
-    else:
+    trunc_func = TRUNC_FUNCS.get(period)
+    if trunc_func is None:
         raise ValueError("Invalid period. Choose from 'daily', 'weekly', 'monthly', 'yearly'.")
 
-    # Calculate sales revenue and COGS per period
-    sales_data = Sale.objects.annotate(
+    # Closed months are read from their snapshots, the rest is computed live
+    open_day = ClosedPeriod.open_from()
+
+    # Calculate sales revenue and COGS per period, in integer cents
+    sales_data = open_only(Sale.objects.filter(voided=False), open_day).annotate(
         period=trunc_func('date')
     ).values('period').annotate(
-        revenue=Sum('total_price', output_field=DecimalField()),
-        cogs=Sum(ExpressionWrapper(F('quantity') * F('product__buying_price'), output_field=DecimalField()))
+        revenue=Sum('total_price_cents'),
+        cogs=Sum(F('quantity') * F('product__buying_price_cents'))
     ).order_by('period')
 
     # Calculate expenses per period
-    expenses_data = Expense.objects.annotate(
+    expenses_data = open_only(Expense.objects.all(), open_day).annotate(
         period=trunc_func('date')
     ).values('period').annotate(
-        expenses=Sum('amount', output_field=DecimalField())
+        expenses=Sum('amount_cents')
     ).order_by('period')
 
-    # Convert querysets to dicts for easy merging
-    sales_dict = {item['period']: {'revenue': item['revenue'] or Decimal('0.00'), 'cogs': item['cogs'] or Decimal('0.00')} for item in sales_data}
-    expenses_dict = {item['period']: item['expenses'] or Decimal('0.00') for item in expenses_data}
+    # Archived years, already summed per day
+    archived_sales_data = open_only(SalesDailySummary.objects.all(), open_day, 'day').annotate(
+        period=trunc_func('day')
+    ).values('period').annotate(
+        revenue=Sum('revenue_cents'),
+        cogs=Sum('cogs_cents')
+    ).order_by('period')
+
+    archived_expenses_data = open_only(ExpenseDailySummary.objects.all(), open_day, 'day').annotate(
+        period=trunc_func('day')
+    ).values('period').annotate(
+        expenses=Sum('amount_cents')
+    ).order_by('period')
+
+    # Days with only purchases do not show up in this report
+    closed_data = list(PeriodDaySnapshot.objects.filter(
+        Q(quantity_sold__gt=0) | Q(expenses_cents__gt=0)
+    ).annotate(
+        period=trunc_func('day')
+    ).values('period').annotate(
+        revenue=Sum('revenue_cents'),
+        cogs=Sum('cogs_cents'),
+        expenses=Sum('expenses_cents')
+    ).order_by('period'))
+
+    # Convert querysets to dicts for easy merging.
+    # Hot periods are datetimes, archived ones are dates, so key both by date.
+    sales_dict = {}
+    for item in list(sales_data) + list(archived_sales_data) + closed_data:
+        key = _period_date(item['period'])
+        totals = sales_dict.setdefault(key, {'revenue': 0, 'cogs': 0})
+        totals['revenue'] += item['revenue'] or 0
+        totals['cogs'] += item['cogs'] or 0
+
+    expenses_dict = {}
+    for item in list(expenses_data) + list(archived_expenses_data) + closed_data:
+        key = _period_date(item['period'])
+        expenses_dict[key] = expenses_dict.get(key, 0) + (item['expenses'] or 0)
 
     # Get all unique periods from both sales and expenses
     all_periods = sorted(set(sales_dict.keys()) | set(expenses_dict.keys()))
@@ -46,16 +94,17 @@ def get_profit_calculations(period='daily'):
     # Build the results
     results = []
     for p in all_periods:
-        revenue = sales_dict.get(p, {'revenue': Decimal('0.00')})['revenue']
-        cogs = sales_dict.get(p, {'cogs': Decimal('0.00')})['cogs']
-        expenses = expenses_dict.get(p, Decimal('0.00'))
+        revenue = sales_dict.get(p, {'revenue': 0})['revenue']
+        cogs = sales_dict.get(p, {'cogs': 0})['cogs']
+        expenses = expenses_dict.get(p, 0)
         profit = revenue - cogs - expenses
         results.append({
             'period': p.strftime('%Y-%m-%d') if period == 'daily' else p.strftime('%Y-%m') if period == 'monthly' else p.strftime('%Y'),
-            'revenue': float(revenue),  # Convert Decimal to float for JSON serialization
-            'cogs': float(cogs),
-            'expenses': float(expenses),
-            'profit': float(profit)
+            # Cents become Decimals here, rendered exactly by FastJSONRenderer
+            'revenue': from_cents(revenue),
+            'cogs': from_cents(cogs),
+            'expenses': from_cents(expenses),
+            'profit': from_cents(profit)
         })
 
     return results
@@ -66,22 +115,175 @@ def get_overall_profits():
     Calculate overall (all-time) profits.
     Returns a dict with 'revenue', 'cogs', 'expenses', 'profit'
     """
-    sales_agg = Sale.objects.aggregate(
-        revenue=Sum('total_price', output_field=DecimalField()),
-        cogs=Sum(ExpressionWrapper(F('quantity') * F('product__buying_price'), output_field=DecimalField()))
+    open_day = ClosedPeriod.open_from()
+    sales_agg = open_only(Sale.objects.filter(voided=False), open_day).aggregate(
+        revenue=Sum('total_price_cents'),
+        cogs=Sum(F('quantity') * F('product__buying_price_cents'))
     )
-    expenses_agg = Expense.objects.aggregate(
-        expenses=Sum('amount', output_field=DecimalField())
+    expenses_agg = open_only(Expense.objects.all(), open_day).aggregate(
+        expenses=Sum('amount_cents')
     )
+    archived_sales_agg = open_only(SalesDailySummary.objects.all(), open_day, 'day').aggregate(
+        revenue=Sum('revenue_cents'), cogs=Sum('cogs_cents'))
+    archived_expenses_agg = open_only(ExpenseDailySummary.objects.all(), open_day, 'day').aggregate(
+        expenses=Sum('amount_cents'))
+    closed_agg = ClosedPeriod.objects.aggregate(
+        revenue=Sum('revenue_cents'), cogs=Sum('cogs_cents'), expenses=Sum('expenses_cents'))
 
-    revenue = sales_agg['revenue'] or Decimal('0.00')
-    cogs = sales_agg['cogs'] or Decimal('0.00')
-    expenses = expenses_agg['expenses'] or Decimal('0.00')
+    revenue = (sales_agg['revenue'] or 0) + (archived_sales_agg['revenue'] or 0) + (closed_agg['revenue'] or 0)
+    cogs = (sales_agg['cogs'] or 0) + (archived_sales_agg['cogs'] or 0) + (closed_agg['cogs'] or 0)
+    expenses = ((expenses_agg['expenses'] or 0) + (archived_expenses_agg['expenses'] or 0)
+                + (closed_agg['expenses'] or 0))
     profit = revenue - cogs - expenses
 
     return {
-        'revenue': float(revenue),
-        'cogs': float(cogs),
-        'expenses': float(expenses),
-        'profit': float(profit)
+        'revenue': from_cents(revenue),
+        'cogs': from_cents(cogs),
+        'expenses': from_cents(expenses),
+        'profit': from_cents(profit)
+    }
+
+
+def write_profit_csv(out, period='daily'):
+    """
+    Write the profit report for `period` (or 'overall') as CSV to the
+    file-like `out`. Shared by the CSV endpoint and the export job.
+    """
+    import csv
+
+    data = [get_overall_profits()] if period == 'overall' else get_profit_calculations(period)
+    writer = csv.writer(out)
+    writer.writerow(['Period', 'Revenue', 'COGS', 'Expenses', 'Profit'])  # Header
+    for row in data:
+        period_str = row.get('period', 'Overall') or 'Overall'
+        writer.writerow([period_str, row['revenue'], row['cogs'], row['expenses'], row['profit']])
+
+
+def get_expense_summary(period='overall', start=None, end=None):
+    """
+    Expense totals per category, per period ('daily', 'weekly', 'monthly',
+    'yearly' or 'overall'), optionally limited to local dates start..end.
+    One grouped query over Expense plus one over the archived daily summaries.
+    Returns a list of dicts with 'period', 'category_id', 'category', 'total'.
+    """
+    if period != 'overall' and period not in TRUNC_FUNCS:
+        raise ValueError("Invalid period. Choose from 'daily', 'weekly', 'monthly', 'yearly', 'overall'.")
+
+    open_day = ClosedPeriod.open_from()
+    expenses = open_only(Expense.objects.all(), open_day)
+    archived = open_only(ExpenseDailySummary.objects.all(), open_day, 'day')
+    closed = PeriodExpenseSnapshot.objects.all()
+    if start:
+        expenses = expenses.filter(date__gte=business_time.midnight(start))
+        archived = archived.filter(day__gte=start)
+        closed = closed.filter(day__gte=start)
+    if end:
+        expenses = expenses.filter(date__lt=business_time.midnight(end + timedelta(days=1)))
+        archived = archived.filter(day__lte=end)
+        closed = closed.filter(day__lte=end)
+
+    fields = ['category_id', 'category__name']
+    closed_fields = ['category_id', 'category_name']
+    if period != 'overall':
+        expenses = expenses.annotate(period=TRUNC_FUNCS[period]('date'))
+        archived = archived.annotate(period=TRUNC_FUNCS[period]('day'))
+        closed = closed.annotate(period=TRUNC_FUNCS[period]('day'))
+        fields.append('period')
+        closed_fields.append('period')
+
+    groups = {}
+    rows = (
+        list(expenses.values(*fields).annotate(total=Sum('amount_cents')).order_by())
+        + list(archived.values(*fields).annotate(total=Sum('amount_cents')).order_by())
+        # Category names as they were at the close
+        + [
+            {**row, 'category__name': row['category_name']}
+            for row in closed.values(*closed_fields).annotate(total=Sum('amount_cents')).order_by()
+        ]
+    )
+    for row in rows:
+        key = (_period_date(row.get('period')), row['category_id'])
+        group = groups.setdefault(key, {
+            'period': _format_period(key[0], period),
+            'category_id': row['category_id'],
+            'category': row['category__name'] or UNCATEGORIZED,
+            'total': 0,
+        })
+        group['total'] += row['total'] or 0
+
+    for group in groups.values():
+        group['total'] = from_cents(group['total'])
+    return sorted(groups.values(), key=lambda g: (g['period'] or '', -g['total'], g['category']))
+
+
+def _format_period(value, period):
+    if value is None:
+        return None
+    if period == 'monthly':
+        return value.strftime('%Y-%m')
+    if period == 'yearly':
+        return value.strftime('%Y')
+    return value.strftime('%Y-%m-%d')  # daily, and the Monday of each week
+
+
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+HEATMAP_BUCKET_SECONDS = 900  # every real UTC offset is a multiple of 15 minutes
+
+
+class EpochSeconds(Func):
+    """
+    Whole seconds since the Unix epoch, computed natively by the database.
+    Django's timezone-aware Extract runs a Python function per row on
+    SQLite, which is ten times slower over a year of sales.
+    """
+    output_field = IntegerField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return Func(Value('%s'), *self.get_source_expressions(), function='strftime',
+                    template="CAST(%(function)s(%(expressions)s) AS INTEGER)").as_sql(compiler, connection)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, template="CAST(FLOOR(EXTRACT(EPOCH FROM %(expressions)s)) AS BIGINT)",
+                              **extra_context)
+
+
+def get_sales_heatmap(start, end):
+    """
+    Revenue and units sold by weekday x hour of day in BUSINESS_TIME_ZONE,
+    for local dates start..end inclusive.
+
+    One grouped query sums sales per 15-minute UTC bucket, reading the date
+    range from the covering sale_date_covering_idx index. Each bucket lies
+    inside one local hour, so folding the buckets into weekday x hour here
+    is exact, DST included.
+
+    Archived years only keep daily totals, so they are not included.
+    Returns 7 x 24 matrices, Monday first.
+    """
+    from django.conf import settings
+
+    tz = business_time.tz()
+    since = business_time.midnight(start)
+    until = business_time.midnight(end + timedelta(days=1))
+    buckets = (
+        Sale.objects.filter(date__gte=since, date__lt=until, voided=False)
+        .annotate(bucket=ExpressionWrapper(EpochSeconds('date') / HEATMAP_BUCKET_SECONDS, output_field=IntegerField()))
+        .values('bucket')
+        .annotate(revenue=Sum('total_price_cents'), units=Sum('quantity'))
+        .order_by()
+    )
+
+    revenue = [[0] * 24 for _ in WEEKDAYS]
+    units = [[0] * 24 for _ in WEEKDAYS]
+    for row in buckets:
+        local = datetime.fromtimestamp(int(row['bucket']) * HEATMAP_BUCKET_SECONDS, tz)
+        revenue[local.weekday()][local.hour] += row['revenue']
+        units[local.weekday()][local.hour] += row['units']
+    return {
+        'timezone': settings.BUSINESS_TIME_ZONE,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'weekdays': WEEKDAYS,
+        'revenue': [[from_cents(cents) for cents in row] for row in revenue],
+        'units': units,
     }
@@ -0,0 +1,51 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+
+from .business_time import BusinessTrunc
+from .models import ProductMonthlySales, Sale, SalesDailySummary
+
+
+def monthly_sales_totals(sale_model, summary_model):
+    """
+    {(product_id, month): [quantity, revenue]} from hot sales plus archived
+    daily summaries, in two grouped queries. Takes the models as arguments
+    so data migrations can pass their historical versions.
+    """
+    totals = defaultdict(lambda: [0, Decimal('0')])
+    hot = (
+        sale_model.objects.filter(voided=False)
+        .annotate(month=BusinessTrunc('date', 'month'))
+        .values('product_id', 'month')
+        .annotate(quantity=Sum('quantity'), revenue=Sum('total_price'))
+    )
+    archived = (
+        summary_model.objects
+        .annotate(month=BusinessTrunc('day', 'month'))
+        .values('product_id', 'month')
+        .annotate(quantity=Sum('quantity'), revenue=Sum('revenue'))
+    )
+    for row in list(hot) + list(archived):
+        month = row['month']
+        month = month.date() if hasattr(month, 'date') else month
+        entry = totals[(row['product_id'], month)]
+        entry[0] += row['quantity'] or 0
+        entry[1] += row['revenue'] or Decimal('0')
+    return totals
+
+
+def rebuild_monthly_sales(batch_size=5_000):
+    """Recompute ProductMonthlySales from scratch, e.g. after bulk_create loads."""
+    totals = monthly_sales_totals(Sale, SalesDailySummary)
+    with transaction.atomic():
+        ProductMonthlySales.objects.all().delete()
+        ProductMonthlySales.objects.bulk_create(
+            [
+                ProductMonthlySales(product_id=product_id, month=month, quantity=quantity, revenue=revenue)
+                for (product_id, month), (quantity, revenue) in totals.items()
+            ],
+            batch_size=batch_size,
+        )
+    return len(totals)
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from .models import *
+from . import inventory
+from .money import from_cents
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=6)
@@ -61,7 +63,39 @@ class LoginSerializer(serializers.Serializer):
 
 
 
+PRODUCT_RULE_FIELDS = ['name', 'stock', 'buying_price', 'selling_price']
+
+
+def product_value_errors(values):
+    """
+    Business rules for a product's values, as {field: message}. Shared by
+    ProductSerializer and the bulk update (product_bulk.py).
+    """
+    errors = {}
+    # Validate that buying_price and selling_price are non-negative
+    if values.get('buying_price') < 0:
+        errors['buying_price'] = "Buying price cannot be negative."
+    if values.get('selling_price') < 0:
+        errors['selling_price'] = "Selling price cannot be negative."
+
+    # Validate that stock is non-negative (already enforced by PositiveBigIntegerField, but added for clarity)
+    if values.get('stock', 0) < 0:
+        errors['stock'] = "Stock cannot be negative."
+
+    # Optional: Ensure selling_price is not less than buying_price (business logic)
+    if values.get('selling_price') < values.get('buying_price'):
+        errors.setdefault('selling_price', "Selling price should not be less than buying price.")
+
+    # Validate that name is not empty
+    if not values.get('name').strip():
+        errors['name'] = "Product name cannot be empty."
+    return errors
+
+
 class ProductSerializer(serializers.ModelSerializer):
+    # Rendering the stock also reads the shard count (see fieldsets.py)
+    sparse_columns = {'stock': ['stock_shards']}
+
     class Meta:
         model = Product
         fields = ['id', 'name', 'brand', 'stock', 'buying_price', 'selling_price']
@@ -72,26 +106,26 @@ class ProductSerializer(serializers.ModelSerializer):
         }
 
     def validate(self, data):
-        # Validate that buying_price and selling_price are non-negative
-        if data.get('buying_price') < 0:
-            raise serializers.ValidationError({"buying_price": "Buying price cannot be negative."})
-        if data.get('selling_price') < 0:
-            raise serializers.ValidationError({"selling_price": "Selling price cannot be negative."})
-        
-        # Validate that stock is non-negative (already enforced by PositiveBigIntegerField, but added for clarity)
-        if data.get('stock', 0) < 0:
-            raise serializers.ValidationError({"stock": "Stock cannot be negative."})
-        
-        # Optional: Ensure selling_price is not less than buying_price (business logic)
-        if data.get('selling_price') < data.get('buying_price'):
-            raise serializers.ValidationError({
-                "selling_price": "Selling price should not be less than buying price."
-            })
-        
-        # Validate that name is not empty
-        if not data.get('name').strip():
-            raise serializers.ValidationError({"name": "Product name cannot be empty."})
-        
+        # On a partial update the untouched fields keep their current values
+        values = {field: getattr(self.instance, field) for field in PRODUCT_RULE_FIELDS} if self.instance else {}
+        values.update(data)
+        errors = product_value_errors(values)
+        if errors:
+            raise serializers.ValidationError(errors)
+        return data
+
+    def update(self, instance, validated_data):
+        # Sharded stock lives in StockShard rows: spread the new level over them
+        stock = validated_data.pop('stock', None) if instance.stock_shards else None
+        instance = super().update(instance, validated_data)
+        if stock is not None:
+            instance = inventory.shard_stock(instance, instance.stock_shards, stock=stock)
+        return instance
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if 'stock' in data and instance.stock_shards:
+            data['stock'] = inventory.available_stock(instance)
         return data
     
 
@@ -101,10 +135,15 @@ class ProductSerializer(serializers.ModelSerializer):
 class SaleSerializer(serializers.ModelSerializer):
     class Meta:
         model = Sale
-        fields = ['id', 'product', 'quantity', 'total_price', 'date']
-        read_only_fields = ['id', 'total_price', 'date']
+        fields = ['id', 'product', 'quantity', 'total_price', 'date', 'voided', 'voided_at', 'void_reason']
+        read_only_fields = ['id', 'total_price', 'date', 'voided', 'voided_at', 'void_reason']
 
     def validate(self, data):
+        if self.instance is not None and self.instance.voided:
+            raise serializers.ValidationError("A voided sale cannot be changed.")
+        if self.instance is not None and ClosedPeriod.is_closed(self.instance.date):
+            raise serializers.ValidationError(CLOSED_PERIOD_MESSAGE)
+
         # Validate quantity is positive
         if data.get('quantity') <= 0:
             raise serializers.ValidationError({"quantity": "Quantity must be positive."})
@@ -112,9 +151,10 @@ class SaleSerializer(serializers.ModelSerializer):
         # Validate sufficient stock for the product
         product = data.get('product')
         quantity = data.get('quantity')
-        if product.stock < quantity:
+        available = inventory.available_stock(product)
+        if available < quantity:
             raise serializers.ValidationError({
-                "quantity": f"Insufficient stock. Available: {product.stock}, Requested: {quantity}"
+                "quantity": f"Insufficient stock. Available: {available}, Requested: {quantity}"
             })
 
         return data
@@ -176,12 +216,15 @@ class PurchaseSerializer(serializers.ModelSerializer):
 
     def validate(self, attrs):
         """Cross-field validation"""
+        if self.instance is not None and ClosedPeriod.is_closed(self.instance.date):
+            raise serializers.ValidationError(CLOSED_PERIOD_MESSAGE)
+
         product = attrs.get('product')
         quantity = attrs.get('quantity')
         
         if product and quantity:
             # Check if this would exceed maximum stock limit
-            current_stock = product.stock
+            current_stock = inventory.available_stock(product)
             if self.instance:
                 # For updates, consider the change in quantity
                 old_quantity = self.instance.quantity
@@ -219,13 +262,25 @@ class PurchaseSerializer(serializers.ModelSerializer):
 
 
 
+class ExpenseCategorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ExpenseCategory
+        fields = ['id', 'name']
+
+    def validate_name(self, value):
+        if not value.strip():
+            raise serializers.ValidationError("Name cannot be empty")
+        return value.strip()
+
+
 class ExpenseSerializer(serializers.ModelSerializer):
     # Make date read-only since it's auto-generated
     date = serializers.DateTimeField(read_only=True)
+    category_name = serializers.CharField(source='category.name', read_only=True, default=None)
     
     class Meta:
         model = Expense
-        fields = ['id', 'title', 'amount', 'date']
+        fields = ['id', 'title', 'amount', 'date', 'category', 'category_name']
         read_only_fields = ['date']
     
     def validate_amount(self, value):
@@ -240,6 +295,11 @@ class ExpenseSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Title cannot be empty")
         return value.strip()
 
+    def validate(self, attrs):
+        if self.instance is not None and ClosedPeriod.is_closed(self.instance.date):
+            raise serializers.ValidationError(CLOSED_PERIOD_MESSAGE)
+        return attrs
+
 
 # serializers.py
 from rest_framework import serializers
@@ -254,3 +314,75 @@ class MonthlySalesSerializer(serializers.Serializer):
         # Format month as "YYYY-MM"
         return obj["month"].strftime("%Y-%m")
 
+
+
+class DemandForecastSerializer(serializers.ModelSerializer):
+    product_name = serializers.CharField(source="product.name", read_only=True)
+
+    class Meta:
+        model = DemandForecast
+        fields = ['product', 'product_name', 'generated_at', 'horizon_days', 'units', 'daily']
+
+
+class JobSerializer(serializers.ModelSerializer):
+    has_file = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'params', 'status', 'created_at', 'started_at', 'heartbeat_at', 'finished_at',
+            'attempts', 'error', 'result', 'has_file', 'result_filename',
+        ]
+        read_only_fields = fields
+
+    def get_has_file(self, obj):
+        return bool(obj.result_filename)
+
+
+class AuditLogSerializer(serializers.ModelSerializer):
+    username = serializers.CharField(source='user.username', read_only=True, default=None)
+
+    class Meta:
+        model = AuditLog
+        fields = ['id', 'created_at', 'user', 'username', 'object_type', 'object_id', 'action', 'changes']
+        read_only_fields = fields
+
+
+class CentsField(serializers.Field):
+    """Read-only money amount stored as integer cents, rendered as an exact Decimal."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return from_cents(value)
+
+
+class PeriodProductSnapshotSerializer(serializers.ModelSerializer):
+    revenue = CentsField(source='revenue_cents')
+    cogs = CentsField(source='cogs_cents')
+
+    class Meta:
+        model = PeriodProductSnapshot
+        fields = ['product', 'product_name', 'product_brand', 'quantity', 'revenue', 'cogs']
+        read_only_fields = fields
+
+
+class ClosedPeriodSerializer(serializers.ModelSerializer):
+    month = serializers.DateField(format='%Y-%m', read_only=True)
+    closed_by = serializers.CharField(source='closed_by.username', read_only=True, default=None)
+    revenue = CentsField(source='revenue_cents')
+    cogs = CentsField(source='cogs_cents')
+    expenses = CentsField(source='expenses_cents')
+    purchases = CentsField(source='purchases_cents')
+    profit = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ClosedPeriod
+        fields = ['id', 'month', 'closed_at', 'closed_by', 'quantity_sold', 'revenue', 'cogs', 'expenses', 'profit',
+                  'purchases', 'purchase_quantity']
+        read_only_fields = fields
+
+    def get_profit(self, obj):
+        return from_cents(obj.revenue_cents - obj.cogs_cents - obj.expenses_cents)
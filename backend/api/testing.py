@@ -0,0 +1,42 @@
+from contextlib import contextmanager
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(budget, using='default'):
+    """
+    Fail when the wrapped block runs more than `budget` queries.
+
+        with query_budget(3):
+            self.client.get('/api/sales/')
+
+    Unlike assertNumQueries this is an upper bound, so endpoints can get
+    cheaper without breaking the test. The captured statements are listed
+    in the failure message.
+    """
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    executed = len(context.captured_queries)
+    if executed > budget:
+        statements = '\n'.join(
+            f'{i}. {query["sql"]}' for i, query in enumerate(context.captured_queries, start=1)
+        )
+        raise QueryBudgetExceeded(
+            f"{executed} queries executed, budget is {budget}:\n{statements}"
+        )
+
+
+class QueryBudgetMixin:
+    """TestCase mixin exposing query_budget as an assertion."""
+
+    def assertMaxQueries(self, budget, func=None, *args, using='default', **kwargs):
+        if func is None:
+            return query_budget(budget, using=using)
+        with query_budget(budget, using=using):
+            return func(*args, **kwargs)
@@ -0,0 +1,62 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..archive import archive_transactions
+from ..financial_service import FinancialService
+from ..models import (
+    ArchivedSale, Expense, ExpenseDailySummary, Product, Purchase, Sale, SalesDailySummary,
+)
+from ..reports import get_overall_profits, get_profit_calculations
+
+
+class ArchiveTransactionsTests(TestCase):
+    def setUp(self):
+        call_command('seed_dataset', '--products', '15', '--sales', '600', '--expenses', '40',
+                     '--days', '300', '--end', '2025-03-31', '--batch-size', '200', stdout=StringIO())
+
+    def reports(self):
+        product = Product.objects.order_by('pk').first()
+        return {
+            'overall': get_overall_profits(),
+            'periods': {p: get_profit_calculations(p) for p in ['daily', 'weekly', 'monthly', 'yearly']},
+            'monthly_sales': self.client.get('/api/monthly-sales/').json(),
+            'total_sales': product.total_sales,
+            'total_profit': product.total_profit,
+            'yearly_2024': FinancialService.generate_financial_report('yearly', year=2024),
+            'month_2025_02': FinancialService.generate_financial_report('monthly', year=2025, month=2),
+        }
+
+    def test_report_totals_unchanged(self):
+        before = self.reports()
+        sales_before = Sale.objects.count()
+
+        moved = archive_transactions(2024, batch_size=97)
+
+        self.assertGreater(moved['sales'], 0)
+        self.assertEqual(ArchivedSale.objects.count(), moved['sales'])
+        self.assertEqual(Sale.objects.count(), sales_before - moved['sales'])
+        self.assertFalse(Sale.objects.filter(date__year=2024).exists())
+        self.assertFalse(Expense.objects.filter(date__year=2024).exists())
+        self.assertFalse(Purchase.objects.filter(date__year=2024).exists())
+        self.assertTrue(SalesDailySummary.objects.exists())
+        self.assertTrue(ExpenseDailySummary.objects.exists())
+        self.assertEqual(self.reports(), before)
+
+    def test_archiving_leaves_stock_alone(self):
+        stock = dict(Product.objects.values_list('pk', 'stock'))
+        archive_transactions(2024)
+        self.assertEqual(dict(Product.objects.values_list('pk', 'stock')), stock)
+
+    def test_rerun_is_a_no_op(self):
+        archive_transactions(2024)
+        before = self.reports()
+        moved = archive_transactions(2024)
+        self.assertEqual(moved, {'sales': 0, 'purchases': 0, 'expenses': 0})
+        self.assertEqual(self.reports(), before)
+
+    def test_open_year_is_refused(self):
+        with self.assertRaises(ValueError):
+            archive_transactions(9999)
+
@@ -0,0 +1,100 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+
+from .. import audit
+from ..models import AuditLog, CustomUser, Expense, Product, Sale
+from ..voids import void_sales
+
+
+@override_settings(AUDIT_FLUSH_INTERVAL_SECONDS=3600, AUDIT_BUFFER_SIZE=500)
+class AuditBufferTests(TestCase):
+    def setUp(self):
+        audit.enable_background_flush()
+        self.addCleanup(audit.disable_background_flush)
+        self.product = Product.objects.create(name="Sugar", brand="Kakira", stock=50,
+                                              buying_price=Decimal("10.00"), selling_price=Decimal("15.00"))
+
+    def test_nothing_is_written_until_flush(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            sale = Sale.objects.create(product=self.product, quantity=2)
+        self.assertFalse(AuditLog.objects.exists())
+        self.assertEqual(audit.flush(), 1)
+        entry = AuditLog.objects.get(object_type='sale')
+        self.assertEqual((entry.object_type, entry.object_id, entry.action), ('sale', sale.pk, 'create'))
+        self.assertEqual(entry.changes['total_price'], [None, "30.00"])
+
+    def test_diffs_only_changed_fields(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.get(pk=self.product.pk)
+            product.stock = 10
+            product.save()  # stock is not audited
+            product.selling_price = Decimal("16.50")
+            product.save()
+        audit.flush()
+        self.assertEqual(list(AuditLog.objects.values_list('action', 'changes')), [
+            ('update', {'selling_price': ["15.00", "16.50"]}),
+        ])
+
+    def test_rolled_back_writes_are_not_audited(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    Expense.objects.create(title="Tea", amount=Decimal("5.00"))
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(callbacks, [])
+        self.assertEqual(audit.flush(), 0)
+
+    @override_settings(AUDIT_BUFFER_SIZE=3)
+    def test_full_buffer_flushes_itself(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Expense.objects.create(title="Tea", amount=Decimal("5.00"))
+        self.assertEqual(AuditLog.objects.count(), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            expense = Expense.objects.create(title="Bread", amount=Decimal("3.00"))
+            expense.delete()
+        self.assertEqual(AuditLog.objects.count(), 3)
+        self.assertEqual(AuditLog.objects.get(action='delete').changes['title'], ["Bread", None])
+
+
+class AuditApiTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="cashier", email="c@example.com", password="secret123")
+        self.admin = CustomUser.objects.create_user(username="owner", email="o@example.com", password="secret123",
+                                                    role='admin')
+        self.client.force_authenticate(self.user)
+        self.product = Product.objects.create(name="Sugar", brand="Kakira", stock=50,
+                                              buying_price=Decimal("10.00"), selling_price=Decimal("15.00"))
+
+    def test_acting_user_and_queries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            sale_id = self.client.post('/api/sales/', {'product': self.product.pk, 'quantity': 3}, format='json').data['id']
+            self.client.post(f'/api/sales/{sale_id}/void/', {'reason': "Returned"}, format='json')
+            self.client.patch('/api/products/bulk/', {'updates': [{'id': self.product.pk, 'selling_price': '18'}]},
+                              format='json')
+        audit.flush()
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.get('/api/audit-log/', {'object_type': 'sale', 'object_id': sale_id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['action'] for row in response.data['results']], ['void', 'create'])
+        self.assertEqual(response.data['results'][0]['username'], "cashier")
+
+        response = self.client.get('/api/audit-log/', {'user': self.user.pk, 'object_type': 'product'})
+        self.assertEqual(response.data['results'][0]['changes'], {'selling_price': ["15.00", "18.00"]})
+        self.assertEqual(self.client.get('/api/audit-log/', {'start': '2000-01-01', 'end': '2000-12-31'}).data['count'], 0)
+
+    def test_admins_only(self):
+        self.assertEqual(self.client.get('/api/audit-log/').status_code, 403)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/audit-log/').status_code, 401)
+
+    def test_bad_filters(self):
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.get('/api/audit-log/', {'object_type': 'user'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/audit-log/', {'object_id': 1}).status_code, 400)
+        self.assertEqual(self.client.get('/api/audit-log/', {'start': 'monday'}).status_code, 400)
@@ -0,0 +1,107 @@
+import threading
+from decimal import Decimal
+from unittest import mock
+
+from django.test import override_settings
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from .. import batch
+from ..models import Product, Sale
+
+
+def make_product():
+    return Product.objects.create(name="Sugar", brand="Kakira", stock=10,
+                                  buying_price=Decimal("10.00"), selling_price=Decimal("15.00"))
+
+
+@override_settings(BATCH_MAX_WORKERS=1)
+class BatchTests(APITestCase):
+    def setUp(self):
+        self.product = make_product()
+
+    def post(self, requests, **extra):
+        return self.client.post('/api/batch/', {'requests': requests, **extra}, format='json')
+
+    def test_answers_in_order(self):
+        response = self.post([
+            {'method': 'GET', 'path': '/api/products/?fields=id,name'},
+            {'method': 'POST', 'path': '/api/sales/', 'body': {'product': self.product.pk, 'quantity': 2}},
+            {'method': 'GET', 'path': f'/api/products/{self.product.pk}/?fields=stock'},
+            {'method': 'GET', 'path': '/api/nowhere/'},
+            {'method': 'GET', 'path': '/api/batch/'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        answers = response.json()['responses']
+        self.assertEqual([answer['status'] for answer in answers], [200, 201, 200, 404, 400])
+        self.assertEqual(answers[0]['body'], [{'id': self.product.pk, 'name': "Sugar"}])
+        self.assertEqual(answers[1]['body']['quantity'], 2)
+        self.assertEqual(answers[2]['body'], {'stock': 8})
+
+    def test_atomic_batch_rolls_back_at_the_first_failure(self):
+        sale = {'method': 'POST', 'path': '/api/sales/', 'body': {'product': self.product.pk, 'quantity': 4}}
+        response = self.post([sale, sale, sale, sale], atomic=True)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([answer['status'] for answer in response.json()['responses']], [201, 201, 400])
+        self.assertFalse(Sale.objects.exists())
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 10)
+
+        # Without atomic, what succeeded stays
+        self.assertEqual(self.post([sale, sale, sale]).status_code, 200)
+        self.assertEqual(Sale.objects.count(), 2)
+
+    def test_a_crashing_sub_request_answers_500_alone(self):
+        crash = mock.patch('api.views.ProductViewSet.retrieve', side_effect=RuntimeError("boom"))
+        with crash, self.assertLogs('api.batch', 'ERROR'):
+            response = self.post([
+                {'method': 'GET', 'path': f'/api/products/{self.product.pk}/'},
+                {'method': 'POST', 'path': '/api/sales/', 'body': {'product': self.product.pk, 'quantity': 2}},
+            ])
+        self.assertEqual(response.status_code, 200)
+        answers = response.json()['responses']
+        self.assertEqual([answer['status'] for answer in answers], [500, 201])
+        self.assertEqual(answers[0]['body'], {'error': 'Internal server error'})
+
+        with crash, self.assertLogs('api.batch', 'ERROR'):
+            response = self.post([
+                {'method': 'POST', 'path': '/api/sales/', 'body': {'product': self.product.pk, 'quantity': 2}},
+                {'method': 'GET', 'path': f'/api/products/{self.product.pk}/'},
+            ], atomic=True)
+        self.assertEqual([answer['status'] for answer in response.json()['responses']], [201, 500])
+        self.assertEqual(Sale.objects.count(), 1)
+
+    def test_idempotency_keys_are_per_sub_request(self):
+        sale = {'method': 'POST', 'path': '/api/sales/', 'body': {'product': self.product.pk, 'quantity': 1},
+                'headers': {'Idempotency-Key': 'one'}}
+        response = self.post([sale, sale], HTTP_IDEMPOTENCY_KEY='batch')
+        answers = response.json()['responses']
+        self.assertEqual(answers[1]['headers'].get('Idempotent-Replayed'), 'true')
+        self.assertEqual(Sale.objects.count(), 1)
+
+    def test_invalid_batches(self):
+        self.assertEqual(self.post([]).status_code, 400)
+        self.assertEqual(self.post([{'method': 'DELETE', 'path': '/api/sales/1/'}]).status_code, 400)
+        self.assertEqual(self.post([{'path': 'api/sales/'}]).status_code, 400)
+        self.assertEqual(self.post([{'path': '/api/sales/'}] * (batch.MAX_REQUESTS + 1)).status_code, 400)
+
+
+@override_settings(BATCH_MAX_WORKERS=4)
+class ConcurrentBatchTests(APITransactionTestCase):
+    def test_reads_run_on_worker_threads(self):
+        product = make_product()
+        threads = set()
+        dispatch = batch.dispatch
+
+        def recording_dispatch(*args, **kwargs):
+            threads.add(threading.current_thread().name)
+            return dispatch(*args, **kwargs)
+
+        with mock.patch.object(batch, 'dispatch', recording_dispatch):
+            response = self.client.post('/api/batch/', {'requests': [
+                {'path': '/api/products/'},
+                {'path': f'/api/products/{product.pk}/'},
+                {'path': '/api/sales/'},
+            ]}, format='json')
+        self.assertEqual([answer['status'] for answer in response.json()['responses']], [200, 200, 200])
+        self.assertEqual(response.json()['responses'][1]['body']['name'], "Sugar")
+        self.assertTrue(all(name.startswith('batch') for name in threads), threads)
@@ -0,0 +1,41 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TransactionTestCase
+
+from ..management.commands.bench import percentile
+from ..models import Product
+
+
+class PercentileTests(SimpleTestCase):
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertIsNone(percentile([], 50))
+
+
+class BenchCommandTests(TransactionTestCase):
+    def run_bench(self, *args):
+        out = StringIO()
+        # --live-db: the test database is already a throwaway one
+        call_command('bench', '--live-db', '--requests', '3', '--concurrency', '1',
+                     '--warmup', '0', *args, stdout=out, stderr=StringIO())
+        return json.loads(out.getvalue())
+
+    def test_report_shape(self):
+        report = self.run_bench('--only', 'products:list', '--only', 'profits:overall')
+        self.assertEqual(set(report['endpoints']), {'products:list', 'profits:overall'})
+        stats = report['endpoints']['products:list']
+        self.assertEqual(stats['requests'], 3)
+        self.assertEqual(stats['errors'], 0)
+        for key in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'queries_mean'):
+            self.assertIsNotNone(stats[key])
+        self.assertEqual(report['meta']['concurrency'], 1)
+
+    def test_cleans_up_after_itself(self):
+        self.run_bench('--only', 'products:create')
+        self.assertFalse(Product.objects.exists())
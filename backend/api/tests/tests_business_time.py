@@ -0,0 +1,78 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from ..archive import archive_cutoff, archive_transactions
+from ..financial_service import FinancialService
+from ..models import (
+    ClosedPeriod, CustomUser, PeriodDaySnapshot, Product, ProductMonthlySales, Sale, SalesDailySummary,
+)
+from ..periods import close_through
+from ..reports import get_overall_profits, get_profit_calculations
+from ..rollups import rebuild_monthly_sales
+
+KAMPALA = ZoneInfo('Africa/Kampala')
+
+
+# Kampala is UTC+3 and New York UTC-5: a Kampala morning is the evening
+# before on the server's clock
+@override_settings(TIME_ZONE='America/New_York', BUSINESS_TIME_ZONE='Africa/Kampala')
+class BusinessTimeZoneTests(APITestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name="Sugar", brand="Kakira", stock=100,
+                                              buying_price=Decimal("10.00"), selling_price=Decimal("15.00"))
+        # The last evening of 2024 and the first morning of 2025, shop time
+        self.late = self.sale(2, datetime(2024, 12, 31, 23, 30, tzinfo=KAMPALA))
+        self.early = self.sale(4, datetime(2025, 1, 1, 2, 0, tzinfo=KAMPALA))
+        rebuild_monthly_sales()
+
+    def sale(self, quantity, when):
+        sale = Sale.objects.create(product=self.product, quantity=quantity)
+        Sale.objects.filter(pk=sale.pk).update(date=when)
+        return Sale.objects.get(pk=sale.pk)
+
+    def reports(self):
+        return {
+            'daily': get_profit_calculations('daily'),
+            'monthly': get_profit_calculations('monthly'),
+            'yearly': get_profit_calculations('yearly'),
+            'overall': get_overall_profits(),
+            'january': FinancialService.generate_financial_report('monthly', year=2025, month=1),
+        }
+
+    def test_reports_and_rollups_count_business_days(self):
+        self.assertEqual([(row['period'], row['revenue']) for row in get_profit_calculations('daily')],
+                         [('2024-12-31', Decimal("30.00")), ('2025-01-01', Decimal("60.00"))])
+        self.assertEqual([row['period'] for row in get_profit_calculations('yearly')], ['2024', '2025'])
+        self.assertEqual(
+            sorted(ProductMonthlySales.objects.values_list('month', 'quantity')),
+            [(date(2024, 12, 1), 2), (date(2025, 1, 1), 4)],
+        )
+        january = FinancialService.generate_financial_report('monthly', year=2025, month=1)
+        self.assertEqual(january['revenue']['total_revenue'], 60.0)
+
+    def test_archive_matches_the_live_reports(self):
+        self.assertEqual(archive_cutoff(2024), datetime(2024, 12, 31, 21, tzinfo=timezone.utc))
+        before = self.reports()
+
+        archive_transactions(2024)
+
+        self.assertEqual(list(Sale.objects.values_list('pk', flat=True)), [self.early.pk])
+        self.assertEqual(list(SalesDailySummary.objects.values_list('day', 'quantity')), [(date(2024, 12, 31), 2)])
+        self.assertEqual(self.reports(), before)
+
+    def test_close_freezes_the_business_month(self):
+        admin = CustomUser.objects.create_user(username="owner", email="o@example.com", password="secret123",
+                                               role='admin')
+        before = self.reports()
+
+        [period] = close_through(date(2024, 12, 1), admin)
+
+        self.assertEqual(period.quantity_sold, 2)
+        self.assertEqual(list(PeriodDaySnapshot.objects.values_list('day', flat=True)), [date(2024, 12, 31)])
+        self.assertTrue(ClosedPeriod.is_closed(self.late.date))
+        self.assertFalse(ClosedPeriod.is_closed(self.early.date))
+        self.assertEqual(self.reports(), before)
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from ..models import CustomUser, Expense, ExpenseCategory, Product, Sale
+from ..periods import close_through
+from ..reports import get_profit_calculations
+from ..rollups import rebuild_monthly_sales
+
+
+class DashboardSummaryTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.today = timezone.localdate()
+        self.sugar = Product.objects.create(name="Sugar", brand="Kakira", stock=100,
+                                            buying_price=Decimal("10.00"), selling_price=Decimal("15.00"))
+        self.salt = Product.objects.create(name="Salt", brand="Nice", stock=0,
+                                           buying_price=Decimal("1.00"), selling_price=Decimal("2.00"))
+        food = ExpenseCategory.objects.create(name="Food")
+        Sale.objects.create(product=self.sugar, quantity=2)
+        self.dated(Sale.objects.create(product=self.sugar, quantity=3), days=400)
+        self.dated(Sale.objects.create(product=self.sugar, quantity=1), days=40)
+        Expense.objects.create(title="Lunch", amount=Decimal("4.00"), category=food)
+        self.dated(Expense.objects.create(title="Rent", amount=Decimal("50.00")), days=40)
+        # Backdating with update() bypasses the rollup
+        rebuild_monthly_sales()
+
+    def dated(self, obj, days):
+        date = timezone.now() - timedelta(days=days)
+        type(obj).objects.filter(pk=obj.pk).update(date=date)
+        return obj
+
+    def get(self):
+        response = self.client.get('/api/dashboard/summary/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def assertMatchesReports(self, profit):
+        rows = {
+            period: {row['period']: row for row in get_profit_calculations(period)}
+            for period in ('monthly', 'yearly')
+        }
+        for window, period, label in (('month', 'monthly', self.today.strftime('%Y-%m')),
+                                      ('year', 'yearly', self.today.strftime('%Y'))):
+            expected = rows[period].get(label, {'revenue': 0, 'cogs': 0, 'expenses': 0, 'profit': 0})
+            for field in ('revenue', 'cogs', 'expenses', 'profit'):
+                self.assertEqual(Decimal(str(profit[window][field])), Decimal(expected[field]), (window, field))
+
+    def test_summary(self):
+        with self.assertNumQueries(6):
+            data = self.get()
+        self.assertEqual(data['today'], {'sales_count': 1, 'units': 2, 'revenue': 30.0})
+        self.assertEqual(data['profit']['week']['start'],
+                         str(self.today - timedelta(days=self.today.weekday())))
+        self.assertEqual(Decimal(str(data['profit']['week']['profit'])), Decimal("6.00"))
+        self.assertMatchesReports(data['profit'])
+        self.assertEqual(data['stock'], {'products': 2, 'value': 940.0, 'out_of_stock': 1, 'low_stock': 0})
+        self.assertEqual([(row['name'], row['quantity']) for row in data['top_products']], [("Sugar", 2)])
+        self.assertEqual([(row['title'], row['category']) for row in data['recent_expenses']],
+                         [("Lunch", "Food"), ("Rent", None)])
+
+    def test_cached_until_the_next_write(self):
+        first = self.get()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get(), first)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/sales/', {'product': self.sugar.pk, 'quantity': 1}, format='json')
+        self.assertEqual(self.get()['today']['units'], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/sales/void/', {'ids': list(Sale.objects.values_list('pk', flat=True))},
+                             format='json')
+        self.assertEqual(self.get()['today']['units'], 0)
+
+    def test_closed_months_come_from_snapshots(self):
+        last_month = self.today.replace(day=1) - timedelta(days=1)
+        if last_month.year != self.today.year:
+            self.skipTest("No closed month in this year to read from snapshots")
+        admin = CustomUser.objects.create_user(username="owner", email="o@example.com", password="secret123",
+                                               role='admin')
+        with self.captureOnCommitCallbacks(execute=True):
+            close_through(last_month, admin)
+        # Closed figures no longer depend on the raw rows
+        Sale.objects.filter(date__lt=timezone.make_aware(datetime.combine(last_month, datetime.min.time())) +
+                            timedelta(days=1)).update(total_price_cents=0)
+        data = self.get()
+        self.assertMatchesReports(data['profit'])
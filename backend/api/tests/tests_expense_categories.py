@@ -0,0 +1,63 @@
+from datetime import datetime
+from decimal import Decimal
+
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from ..archive import archive_transactions
+from ..financial_service import FinancialService
+from ..models import Expense, ExpenseCategory, ExpenseDailySummary
+
+
+class ExpenseCategoryTests(APITestCase):
+    def setUp(self):
+        self.power = ExpenseCategory.objects.create(name="Electricity")
+        self.rent = ExpenseCategory.objects.create(name="Rent")
+        Expense.objects.create(title="Umeme token", amount=Decimal("50.00"), category=self.power)
+        Expense.objects.create(title="Umeme token", amount=Decimal("25.00"), category=self.power)
+        Expense.objects.create(title="Shop rent", amount=Decimal("300.00"), category=self.rent)
+        Expense.objects.create(title="Tea", amount=Decimal("5.00"))
+
+    def test_overall_summary(self):
+        response = self.client.get('/api/expenses/summary/?group_by=category')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row['category'], Decimal(str(row['total']))) for row in response.json()],
+            [("Rent", Decimal("300.00")), ("Electricity", Decimal("75.00")), ("Uncategorized", Decimal("5.00"))],
+        )
+
+    def test_summary_per_period_includes_archived_expenses(self):
+        last_year = timezone.localdate().year - 1
+        old = Expense.objects.create(title="Old rent", amount=Decimal("200.00"), category=self.rent)
+        Expense.objects.filter(pk=old.pk).update(date=timezone.make_aware(datetime(last_year, 6, 1, 10)))
+        archive_transactions(last_year)
+        self.assertEqual(ExpenseDailySummary.objects.get().category, self.rent)
+
+        # Closed-period boundary, then hot, archived and closed-period rows
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/expenses/summary/?period=yearly')
+        rows = response.json()
+        self.assertEqual((rows[0]['period'], rows[0]['category']), (str(last_year), "Rent"))
+        self.assertEqual(Decimal(str(rows[0]['total'])), Decimal("200.00"))
+        self.assertEqual(len(rows), 4)
+
+        response = self.client.get(f'/api/expenses/summary/?start={last_year + 1}-01-01')
+        self.assertEqual(len(response.json()), 3)
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.client.get('/api/expenses/summary/?group_by=title').status_code, 400)
+        self.assertEqual(self.client.get('/api/expenses/summary/?period=hourly').status_code, 400)
+        self.assertEqual(self.client.get('/api/expenses/summary/?start=yesterday').status_code, 400)
+
+    def test_financial_report_breakdown(self):
+        report = FinancialService.generate_financial_report('yearly')
+        breakdown = report['costs']['operating_expenses_by_category']
+        self.assertEqual([entry['category'] for entry in breakdown], ["Rent", "Electricity", "Uncategorized"])
+        self.assertEqual(report['costs']['operating_expenses'], 380.0)
+
+    def test_expense_api_accepts_a_category(self):
+        response = self.client.post('/api/expenses/', {'title': "Bulb", 'amount': '10.00', 'category': self.power.pk},
+                                    format='json')
+        self.assertEqual(response.json()['category_name'], "Electricity")
+        self.client.delete(f'/api/expense-categories/{self.power.pk}/')
+        self.assertEqual(Expense.objects.filter(category__isnull=True).count(), 4)
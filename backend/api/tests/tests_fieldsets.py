@@ -0,0 +1,65 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from .. import inventory
+from ..models import Expense, ExpenseCategory, Product, Purchase, Sale
+
+
+class SparseFieldsetTests(APITestCase):
+    def setUp(self):
+        self.sugar = Product.objects.create(name="Sugar", brand="Kakira", stock=100,
+                                            buying_price=Decimal("10.00"), selling_price=Decimal("15.00"))
+        self.salt = Product.objects.create(name="Salt", brand="Nice", stock=50,
+                                           buying_price=Decimal("1.00"), selling_price=Decimal("2.00"))
+        for product in (self.sugar, self.salt):
+            Sale.objects.create(product=product, quantity=2)
+            Purchase.objects.create(product=product, quantity=5)
+        food = ExpenseCategory.objects.create(name="Food")
+        Expense.objects.create(title="Lunch", amount=Decimal("4.00"), category=food)
+
+    def get(self, url, queries):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(context.captured_queries), queries)
+        return response.json(), context.captured_queries[-1]['sql']
+
+    def test_fields_trim_the_response_and_the_columns(self):
+        data, sql = self.get('/api/sales/?fields=id,quantity', 1)
+        self.assertEqual(data, [{'id': sale.pk, 'quantity': 2} for sale in Sale.objects.order_by('pk')])
+        self.assertNotIn('total_price', sql)
+
+        # Purchases no longer join the product when its fields are not asked for
+        data, sql = self.get('/api/purchases/?fields=id,total_cost', 1)
+        self.assertEqual(set(data[0]), {'id', 'total_cost'})
+        self.assertNotIn('JOIN', sql)
+        data, sql = self.get('/api/purchases/?fields=product_name', 1)
+        self.assertEqual(sorted(row['product_name'] for row in data), ["Salt", "Sugar"])
+        self.assertNotIn('selling_price', sql)
+
+        data, _ = self.get(f'/api/products/{self.sugar.pk}/?fields=name,stock', 1)
+        self.assertEqual(data, {'name': "Sugar", 'stock': 103})
+
+    def test_expand_joins_the_relation(self):
+        inventory.shard_stock(self.salt, 2)
+        data, _ = self.get('/api/sales/?expand=product', 2)  # plus the sharded salt's stock
+        self.assertEqual(sorted(row['product']['name'] for row in data), ["Salt", "Sugar"])
+        self.assertEqual(sorted(row['product']['stock'] for row in data), [53, 103])
+        self.assertIn('total_price', data[0])
+
+        data, _ = self.get('/api/purchases/?fields=quantity,product&expand=product', 2)
+        self.assertEqual({row['product']['brand'] for row in data}, {"Kakira", "Nice"})
+        data, _ = self.get('/api/expenses/?fields=title,category&expand=category', 1)
+        self.assertEqual(data, [{'title': "Lunch", 'category': {'id': data[0]['category']['id'], 'name': "Food"}}])
+
+    def test_unknown_names_and_writes(self):
+        self.assertEqual(self.client.get('/api/sales/?fields=id,colour').status_code, 400)
+        self.assertEqual(self.client.get('/api/sales/?expand=quantity').status_code, 400)
+        self.assertEqual(self.client.get('/api/products/?expand=product').status_code, 400)
+        # Writes always return the full representation
+        response = self.client.post('/api/sales/?fields=id', {'product': self.sugar.pk, 'quantity': 1}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('total_price', response.data)
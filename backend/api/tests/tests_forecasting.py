@@ -0,0 +1,88 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock, skipIf
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from .. import forecasting
+from ..models import DemandForecast, Product, Sale, SalesDailySummary
+
+
+@skipIf(forecasting.np is None, "NumPy is not installed")
+class HoltWintersTests(SimpleTestCase):
+    def test_constant_demand_is_forecast_flat(self):
+        matrix = forecasting.np.full((3, 60), 4.0)
+        forecast = forecasting.holt_winters(matrix, horizon=10)
+        self.assertEqual(forecast.shape, (3, 10))
+        self.assertTrue(forecasting.np.allclose(forecast, 4.0, atol=1e-6))
+
+    def test_weekly_pattern_and_no_negative_demand(self):
+        np = forecasting.np
+        week = np.array([0, 0, 0, 0, 0, 10, 10], dtype=float)
+        matrix = np.vstack([np.tile(week, 12), np.zeros(84)])
+        forecast = forecasting.holt_winters(matrix, horizon=7)
+        # Day 84 starts a new week, so the weekend is the last two days
+        self.assertTrue((forecast[0, 5:] > forecast[0, :5].max() + 5).all())
+        self.assertTrue((forecast >= 0).all())
+
+    def test_short_history_uses_the_mean(self):
+        forecast = forecasting.holt_winters(forecasting.np.array([[1.0, 3.0]]), horizon=3)
+        self.assertEqual(forecast.tolist(), [[2.0, 2.0, 2.0]])
+
+
+@skipIf(forecasting.np is None, "NumPy is not installed")
+class ForecastCatalogTests(APITestCase):
+    def setUp(self):
+        self.busy = Product.objects.create(
+            name="Busy", brand="Test", stock=1000,
+            buying_price=Decimal("10.00"), selling_price=Decimal("15.00"),
+        )
+        self.idle = Product.objects.create(
+            name="Idle", brand="Test", stock=5,
+            buying_price=Decimal("10.00"), selling_price=Decimal("15.00"),
+        )
+        today = timezone.localdate()
+        sales = [Sale.objects.create(product=self.busy, quantity=3) for _ in range(28)]
+        for offset, sale in enumerate(sales):
+            Sale.objects.filter(pk=sale.pk).update(date=timezone.now() - timedelta(days=offset))
+        SalesDailySummary.objects.create(
+            product=self.busy, day=today - timedelta(days=40), quantity=5,
+            revenue=Decimal("75.00"), cogs=Decimal("50.00"),
+        )
+
+    def test_matrix_combines_hot_and_archived_sales(self):
+        product_ids, first_day, matrix = forecasting.load_daily_matrix(60)
+        busy = product_ids.index(self.busy.pk)
+        idle = product_ids.index(self.idle.pk)
+        self.assertEqual(matrix[busy].sum(), 28 * 3 + 5)
+        self.assertEqual(matrix[busy, (timezone.localdate() - timedelta(days=40) - first_day).days], 5)
+        self.assertEqual(matrix[idle].sum(), 0)
+
+    def test_products_created_after_the_ids_are_read_are_skipped(self):
+        # As if Busy was created between reading the ids and reading its sales
+        without_busy = Product.objects.exclude(pk=self.busy.pk).order_by('pk')
+        with mock.patch.object(Product.objects, 'order_by', return_value=without_busy):
+            product_ids, _, matrix = forecasting.load_daily_matrix(60)
+        self.assertEqual(product_ids, [self.idle.pk])
+        self.assertEqual(matrix.sum(), 0)
+
+    def test_forecasts_are_stored_and_listed(self):
+        self.assertEqual(forecasting.forecast_catalog(history_days=60, horizon=30), 2)
+        # Running again replaces the rows instead of adding more
+        forecasting.forecast_catalog(history_days=60, horizon=30)
+        self.assertEqual(DemandForecast.objects.count(), 2)
+        busy = DemandForecast.objects.get(product=self.busy)
+        self.assertEqual(len(busy.daily), 30)
+        self.assertGreater(busy.units, 30)
+
+        response = self.client.get('/api/inventory/forecasts/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['product'] for row in response.json()['results']], [self.busy.pk, self.idle.pk])
+
+        response = self.client.get(f'/api/inventory/forecasts/?product={self.idle.pk}&page_size=1')
+        self.assertEqual(response.json()['count'], 1)
+        self.assertEqual(response.json()['results'][0]['units'], 0)
+
+        self.assertEqual(self.client.get('/api/inventory/forecasts/?product=x').status_code, 400)
@@ -0,0 +1,47 @@
+from datetime import datetime
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from ..models import Product, Sale
+
+
+@override_settings(BUSINESS_TIME_ZONE='Africa/Kampala')
+class SalesHeatmapTests(APITestCase):
+    def setUp(self):
+        product = Product.objects.create(
+            name="Bread", brand="Hot Loaf", stock=100,
+            buying_price=Decimal("3000.00"), selling_price=Decimal("4000.00"),
+        )
+        utc = ZoneInfo('UTC')
+        moments = [
+            datetime(2025, 3, 3, 6, 15, tzinfo=utc),   # Monday 09:15 in Kampala (UTC+3)
+            datetime(2025, 3, 3, 6, 59, tzinfo=utc),   # Monday 09:59
+            datetime(2025, 3, 9, 21, 30, tzinfo=utc),  # Monday 00:30 local, still Sunday in UTC
+            datetime(2025, 4, 1, 8, 0, tzinfo=utc),    # outside the range below
+        ]
+        for quantity, moment in enumerate(moments, start=1):
+            sale = Sale.objects.create(product=product, quantity=quantity)
+            Sale.objects.filter(pk=sale.pk).update(date=moment)
+
+    def test_local_weekday_and_hour(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/analytics/heatmap/?start=2025-03-01&end=2025-03-31')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['timezone'], 'Africa/Kampala')
+        self.assertEqual(data['units'][0][9], 3)
+        self.assertEqual(Decimal(str(data['revenue'][0][9])), Decimal("12000.00"))
+        self.assertEqual(data['units'][0][0], 3)
+        self.assertEqual(sum(map(sum, data['units'])), 6)
+
+    def test_range_uses_local_dates(self):
+        # 2025-03-09 21:30 UTC is already 2025-03-10 in Kampala
+        response = self.client.get('/api/analytics/heatmap/?start=2025-03-10&end=2025-03-10')
+        self.assertEqual(sum(map(sum, response.json()['units'])), 3)
+
+    def test_bad_dates(self):
+        self.assertEqual(self.client.get('/api/analytics/heatmap/?start=2025-13-01').status_code, 400)
+        self.assertEqual(self.client.get('/api/analytics/heatmap/?start=2025-03-02&end=2025-03-01').status_code, 400)
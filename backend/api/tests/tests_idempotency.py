@@ -0,0 +1,89 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from ..idempotency import purge_expired_keys
+from ..models import CustomUser, IdempotencyKey, Product, Purchase, Sale
+
+
+class IdempotencyKeyTests(APITestCase):
+    def setUp(self):
+        self.product = Product.objects.create(
+            name="Sugar 1kg", brand="Kakira", stock=10,
+            buying_price=Decimal("4000.00"), selling_price=Decimal("5000.00"),
+        )
+
+    def post(self, url, data, key):
+        return self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_sale_retry_replays_without_selling_again(self):
+        first = self.post('/api/sales/', {'product': self.product.pk, 'quantity': 2}, 'abc')
+        self.assertEqual(first.status_code, 201)
+
+        with self.assertNumQueries(1):
+            retry = self.post('/api/sales/', {'product': self.product.pk, 'quantity': 2}, 'abc')
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+
+        self.assertEqual(Sale.objects.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 8)
+
+    def test_key_is_scoped_to_the_endpoint(self):
+        self.post('/api/sales/', {'product': self.product.pk, 'quantity': 1}, 'same')
+        response = self.post('/api/purchases/', {'product': self.product.pk, 'quantity': 5}, 'same')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Purchase.objects.count(), 1)
+
+    def test_key_is_scoped_to_the_client(self):
+        alice = CustomUser.objects.create_user(username="alice", email="a@example.com", password="secret123")
+        bob = CustomUser.objects.create_user(username="bob", email="b@example.com", password="secret123")
+        self.client.force_authenticate(alice)
+        first = self.post('/api/sales/', {'product': self.product.pk, 'quantity': 1}, 'shared')
+        self.client.force_authenticate(bob)
+        second = self.post('/api/sales/', {'product': self.product.pk, 'quantity': 2}, 'shared')
+        self.assertEqual(second.status_code, 201)
+        self.assertFalse(second.has_header('Idempotent-Replayed'))
+        self.assertNotEqual(second.json()['id'], first.json()['id'])
+
+        # Anonymous callers are told apart by address
+        self.client.force_authenticate(None)
+        self.client.post('/api/sales/', {'product': self.product.pk, 'quantity': 1}, format='json',
+                         HTTP_IDEMPOTENCY_KEY='shared', REMOTE_ADDR='10.0.0.1')
+        response = self.client.post('/api/sales/', {'product': self.product.pk, 'quantity': 3}, format='json',
+                                    HTTP_IDEMPOTENCY_KEY='shared', REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Sale.objects.count(), 4)
+
+    def test_reuse_with_different_body_is_rejected(self):
+        self.post('/api/purchases/', {'product': self.product.pk, 'quantity': 5}, 'k1')
+        response = self.post('/api/purchases/', {'product': self.product.pk, 'quantity': 6}, 'k1')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Purchase.objects.count(), 1)
+
+    def test_failed_request_does_not_keep_the_key(self):
+        response = self.post('/api/sales/', {'product': self.product.pk, 'quantity': 50}, 'k2')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        response = self.post('/api/sales/', {'product': self.product.pk, 'quantity': 1}, 'k2')
+        self.assertEqual(response.status_code, 201)
+
+    def test_no_header_keeps_old_behaviour(self):
+        self.client.post('/api/sales/', {'product': self.product.pk, 'quantity': 1}, format='json')
+        self.client.post('/api/sales/', {'product': self.product.pk, 'quantity': 1}, format='json')
+        self.assertEqual(Sale.objects.count(), 2)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_expired_keys(self):
+        self.post('/api/sales/', {'product': self.product.pk, 'quantity': 1}, 'old')
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+        # An expired key runs the request again
+        self.post('/api/sales/', {'product': self.product.pk, 'quantity': 1}, 'old')
+        self.assertEqual(Sale.objects.count(), 2)
+
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+        self.assertEqual(purge_expired_keys(), 1)
+        self.assertFalse(IdempotencyKey.objects.exists())
@@ -0,0 +1,48 @@
+import json
+from decimal import Decimal
+
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from ..models import Product, Sale
+from ..testing import QueryBudgetExceeded, QueryBudgetMixin
+
+
+class QueryInstrumentationTests(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.product = Product.objects.create(
+            name="Sugar", brand="Kakira", stock=50,
+            buying_price=Decimal("3000.00"), selling_price=Decimal("3500.00"),
+        )
+        Sale.objects.create(product=self.product, quantity=2)
+
+    def test_server_timing_header(self):
+        """Every API response reports its DB work as Server-Timing."""
+        response = self.client.get('/api/sales/')
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn('db-slowest;dur=', timing)
+        self.assertNotIn('SELECT', timing)
+
+    def test_structured_log_line(self):
+        with self.assertLogs('api.queries', level='INFO') as logs:
+            self.client.get('/api/products/')
+        entry = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(entry['path'], '/api/products/')
+        self.assertEqual(entry['status'], 200)
+        self.assertGreaterEqual(entry['queries'], 1)
+        self.assertIn('SELECT', entry['slowest_sql'])
+
+    @override_settings(QUERY_INSTRUMENTATION_ENABLED=False)
+    def test_can_be_disabled(self):
+        response = self.client.get('/api/sales/')
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_query_budget_passes(self):
+        with self.assertMaxQueries(1):
+            self.client.get('/api/sales/')
+
+    def test_query_budget_fails_when_exceeded(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            with self.assertMaxQueries(0):
+                self.client.get('/api/sales/')
@@ -0,0 +1,158 @@
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from decimal import Decimal
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from .. import jobs
+from ..models import Job, Product, Sale
+
+
+class ClaimTests(TestCase):
+    def test_jobs_are_claimed_oldest_first_and_once(self):
+        first = jobs.enqueue('sales_csv')
+        second = jobs.enqueue('sales_csv')
+        claimed = jobs.claim_next('w1')
+        self.assertEqual(claimed.pk, first.pk)
+        self.assertEqual(jobs.claim_next('w2').pk, second.pk)
+        self.assertIsNone(jobs.claim_next('w3'))
+
+        claimed.refresh_from_db()
+        self.assertEqual((claimed.status, claimed.worker, claimed.attempts), (Job.RUNNING, 'w1', 1))
+
+    def test_failing_handler_records_the_error(self):
+        job = Job.objects.create(kind='financial_report', params={'period': 'weekly', 'week': 'x'})
+        jobs.run_job(jobs.claim_next())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn("week must be an integer", job.error)
+
+    @override_settings(JOB_STALE_AFTER_MINUTES=10, JOB_MAX_ATTEMPTS=2)
+    def test_stale_jobs_are_requeued_then_failed(self):
+        job = jobs.enqueue('sales_csv')
+        jobs.claim_next()
+        Job.objects.update(heartbeat_at=timezone.now() - timedelta(minutes=30))
+        self.assertEqual(jobs.requeue_stale(), (1, 0))
+        jobs.claim_next()
+        Job.objects.update(heartbeat_at=timezone.now() - timedelta(minutes=30))
+        self.assertEqual(jobs.requeue_stale(), (0, 1))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+
+    @override_settings(JOB_STALE_AFTER_MINUTES=10)
+    def test_long_jobs_with_a_heartbeat_are_left_running(self):
+        jobs.enqueue('sales_csv')
+        job = jobs.claim_next('w1')
+        Job.objects.update(started_at=timezone.now() - timedelta(hours=3),
+                           heartbeat_at=timezone.now() - timedelta(minutes=30))
+        self.assertTrue(jobs.touch(job))
+        self.assertEqual(jobs.requeue_stale(), (0, 0))
+
+    def test_a_requeued_job_keeps_the_new_runs_result(self):
+        files = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, files)
+        jobs.enqueue('sales_csv')
+        first = jobs.claim_next('w1')
+        # w1 went quiet and the job was given to w2
+        Job.objects.update(status=Job.QUEUED, worker='')
+        second = jobs.claim_next('w2')
+        self.assertFalse(jobs.touch(first))
+
+        with self.settings(JOB_FILES_DIR=files):
+            self.assertFalse(jobs.run_job(first))
+            self.assertEqual(os.listdir(files), [])
+            self.assertTrue(jobs.run_job(second))
+        second.refresh_from_db()
+        self.assertEqual((second.status, second.worker, os.listdir(files)), (Job.DONE, 'w2', [second.result_path]))
+
+    def test_heartbeat_thread_touches_the_job(self):
+        jobs.enqueue('sales_csv')
+        job = jobs.claim_next()
+        beats = []
+        with mock.patch.object(jobs, 'touch', side_effect=lambda job: beats.append(job) or len(beats) < 3):
+            with jobs.heartbeat(job, interval=0.001):
+                while len(beats) < 3:
+                    time.sleep(0.001)
+        # It stops by itself once the job is no longer ours
+        self.assertEqual(len(beats), 3)
+
+    def test_expired_jobs_and_files_are_purged(self):
+        files = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, files)
+        with self.settings(JOB_FILES_DIR=files, JOB_RESULT_TTL_DAYS=7):
+            old, recent = jobs.enqueue('sales_csv'), jobs.enqueue('sales_csv')
+            jobs.run_job(jobs.claim_next())
+            jobs.run_job(jobs.claim_next())
+            Job.objects.filter(pk=old.pk).update(finished_at=timezone.now() - timedelta(days=8))
+            running = jobs.enqueue('sales_csv')
+            self.assertEqual(jobs.purge_expired(), 1)
+            self.assertEqual(sorted(Job.objects.values_list('pk', flat=True)), [recent.pk, running.pk])
+            self.assertEqual(os.listdir(files), [Job.objects.get(pk=recent.pk).result_path])
+
+    def test_enqueue_validates(self):
+        with self.assertRaises(ValueError):
+            jobs.enqueue('nope')
+        with self.assertRaises(ValueError):
+            jobs.enqueue('profit_csv', {'period': 'hourly'})
+
+
+class JobApiTests(APITestCase):
+    def setUp(self):
+        files = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, files)
+        override = override_settings(JOB_FILES_DIR=files)
+        override.enable()
+        self.addCleanup(override.disable)
+        product = Product.objects.create(
+            name="Rice 1kg", brand="Tilda", stock=10,
+            buying_price=Decimal("3000.00"), selling_price=Decimal("4000.00"),
+        )
+        Sale.objects.create(product=product, quantity=2)
+
+    def test_enqueue_poll_and_download(self):
+        response = self.client.post('/api/jobs/', {'kind': 'profit_csv', 'params': {'period': 'overall'}}, format='json')
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()['id']
+        self.assertEqual(response.json()['status'], Job.QUEUED)
+        self.assertEqual(self.client.get(f'/api/jobs/{job_id}/download/').status_code, 409)
+
+        call_command('run_workers', processes=1, once=True, stdout=StringIO())
+
+        self.assertEqual(self.client.get(f'/api/jobs/{job_id}/').json()['status'], Job.DONE)
+        response = self.client.get(f'/api/jobs/{job_id}/download/')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(b''.join(response.streaming_content).decode().splitlines()[1],
+                         'Overall,8000.00,6000.00,0.00,2000.00')
+
+        # The file lives on disk, not in the job row
+        os.remove(jobs.result_path(Job.objects.get(pk=job_id)))
+        self.assertEqual(self.client.get(f'/api/jobs/{job_id}/download/').status_code, 410)
+
+    def test_sales_csv_is_written_to_a_file(self):
+        job = jobs.enqueue('sales_csv')
+        jobs.run_job(jobs.claim_next())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        with open(jobs.result_path(job)) as file:
+            lines = file.read().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(os.listdir(jobs.files_dir()), [job.result_path])
+
+    def test_json_result(self):
+        response = self.client.post('/api/jobs/', {'kind': 'financial_report', 'params': {'period': 'yearly'}}, format='json')
+        job = Job.objects.get(pk=response.json()['id'])
+        jobs.run_job(jobs.claim_next())
+        response = self.client.get(f'/api/jobs/{job.pk}/download/')
+        self.assertEqual(response.json()['revenue']['total_revenue'], 8000.0)
+
+    def test_bad_kind(self):
+        response = self.client.post('/api/jobs/', {'kind': 'everything'}, format='json')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,71 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from ..money import backfill_cents, from_cents, to_cents
+from ..models import Expense, Product, Purchase, Sale
+from ..reports import get_overall_profits
+
+
+class CentsConversionTests(SimpleTestCase):
+    def test_round_trip(self):
+        self.assertEqual(to_cents(Decimal("12.34")), 1234)
+        self.assertEqual(to_cents(Decimal("0.005")), 1)
+        self.assertEqual(to_cents("7"), 700)
+        self.assertEqual(from_cents(1234), Decimal("12.34"))
+        self.assertEqual(from_cents(None), Decimal("0.00"))
+
+
+class CentsColumnTests(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(
+            name="Sugar 1kg", brand="Kakira", stock=100,
+            buying_price=Decimal("0.10"), selling_price=Decimal("0.30"),
+        )
+
+    def test_save_keeps_cents_in_step(self):
+        sale = Sale.objects.create(product=self.product, quantity=3)
+        purchase = Purchase.objects.create(product=self.product, quantity=2)
+        expense = Expense.objects.create(title="Tea", amount=Decimal("0.70"))
+        self.assertEqual(self.product.buying_price_cents, 10)
+        self.assertEqual(sale.total_price_cents, 90)
+        self.assertEqual(purchase.total_cost_cents, 20)
+        self.assertEqual(expense.amount_cents, 70)
+
+        self.product.buying_price = Decimal("0.20")
+        self.product.save(update_fields=['buying_price'])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.buying_price_cents, 20)
+
+    def test_report_totals_are_exact(self):
+        # 0.1 + 0.2 style sums that drift in floating point
+        for _ in range(10):
+            Sale.objects.create(product=self.product, quantity=1)
+        Expense.objects.create(title="Tea", amount=Decimal("0.10"))
+        Expense.objects.create(title="Tea", amount=Decimal("0.20"))
+        self.assertEqual(get_overall_profits(), {
+            'revenue': Decimal("3.00"), 'cogs': Decimal("1.00"),
+            'expenses': Decimal("0.30"), 'profit': Decimal("1.70"),
+        })
+
+    def test_backfill_repairs_columns(self):
+        sale = Sale.objects.create(product=self.product, quantity=3)
+        Expense.objects.create(title="Tea", amount=Decimal("12.35"))
+        Sale.objects.update(total_price_cents=0)
+        Expense.objects.update(amount_cents=0)
+        Product.objects.update(buying_price_cents=0)
+
+        updated = backfill_cents(batch_size=1)
+        self.assertEqual(updated['Sale.total_price_cents'], 1)
+        sale.refresh_from_db()
+        self.assertEqual(sale.total_price_cents, 90)
+        self.assertEqual(Expense.objects.get().amount_cents, 1235)
+        self.assertEqual(Product.objects.get().buying_price_cents, 10)
+
+    def test_backfill_command(self):
+        Expense.objects.create(title="Tea", amount=Decimal("5.00"))
+        Expense.objects.update(amount_cents=0)
+        call_command('backfill_cents', stdout=StringIO())
+        self.assertEqual(Expense.objects.get().amount_cents, 500)
@@ -0,0 +1,101 @@
+from datetime import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from ..models import Product, ProductMonthlySales, Sale
+from ..rollups import rebuild_monthly_sales
+
+
+class ProductMonthlySalesRollupTests(APITestCase):
+    def setUp(self):
+        self.sugar = Product.objects.create(
+            name="Sugar", brand="Kakira", stock=100,
+            buying_price=Decimal("3000.00"), selling_price=Decimal("3500.00"),
+        )
+        self.soap = Product.objects.create(
+            name="Soap", brand="Mukwano", stock=100,
+            buying_price=Decimal("2000.00"), selling_price=Decimal("2500.00"),
+        )
+
+    def rollup(self):
+        return sorted(
+            ProductMonthlySales.objects.filter(quantity__gt=0)
+            .values_list('product_id', 'month', 'quantity', 'revenue')
+        )
+
+    def test_maintained_on_create_update_delete(self):
+        sale = Sale.objects.create(product=self.sugar, quantity=2)
+        Sale.objects.create(product=self.sugar, quantity=1)
+        month = timezone.localdate().replace(day=1)
+        self.assertEqual(self.rollup(), [(self.sugar.pk, month, 3, Decimal("10500.00"))])
+
+        sale.quantity = 4
+        sale.save()
+        self.assertEqual(self.rollup(), [(self.sugar.pk, month, 5, Decimal("17500.00"))])
+
+        sale.delete()
+        self.assertEqual(self.rollup(), [(self.sugar.pk, month, 1, Decimal("3500.00"))])
+
+    def test_rebuild_matches_incremental(self):
+        Sale.objects.create(product=self.sugar, quantity=2)
+        Sale.objects.create(product=self.soap, quantity=5)
+        incremental = self.rollup()
+        ProductMonthlySales.objects.all().delete()
+        rebuild_monthly_sales()
+        self.assertEqual(self.rollup(), incremental)
+
+    def test_seed_dataset_rebuilds_rollup(self):
+        call_command('seed_dataset', '--products', '5', '--sales', '200', '--expenses', '5',
+                     '--days', '60', '--end', '2024-03-31', '--clear', stdout=StringIO())
+        seeded = self.rollup()
+        rebuild_monthly_sales()
+        self.assertEqual(self.rollup(), seeded)
+        self.assertEqual(sum(row[2] for row in seeded), sum(Sale.objects.values_list('quantity', flat=True)))
+
+
+class MonthlySalesReportViewTests(APITestCase):
+    def setUp(self):
+        self.sugar = Product.objects.create(
+            name="Sugar", brand="Kakira", stock=0,
+            buying_price=Decimal("3000.00"), selling_price=Decimal("3500.00"),
+        )
+        self.soap = Product.objects.create(
+            name="Soap", brand="Mukwano", stock=0,
+            buying_price=Decimal("2000.00"), selling_price=Decimal("2500.00"),
+        )
+        for product, year, month, quantity in [
+            (self.sugar, 2023, 12, 1), (self.sugar, 2024, 1, 2), (self.soap, 2024, 1, 3), (self.soap, 2024, 2, 4),
+        ]:
+            ProductMonthlySales.objects.create(
+                product=product, month=datetime(year, month, 1).date(),
+                quantity=quantity, revenue=product.selling_price * quantity,
+            )
+        self.url = '/api/monthly-sales/'
+
+    def test_unfiltered_list(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row['product'], row['month']) for row in response.data],
+            [('Sugar', '2023-12'), ('Soap', '2024-01'), ('Sugar', '2024-01'), ('Soap', '2024-02')],
+        )
+
+    def test_filters(self):
+        response = self.client.get(self.url, {'year': 2024, 'brand': 'mukwano'})
+        self.assertEqual([row['month'] for row in response.data], ['2024-01', '2024-02'])
+        response = self.client.get(self.url, {'product': self.sugar.pk})
+        self.assertEqual([row['total_quantity'] for row in response.data], [1, 2])
+
+    def test_bad_filter(self):
+        response = self.client.get(self.url, {'year': 'last'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_pagination_is_opt_in(self):
+        response = self.client.get(self.url, {'page_size': 3})
+        self.assertEqual(response.data['count'], 4)
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIsNotNone(response.data['next'])
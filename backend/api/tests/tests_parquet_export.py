@@ -0,0 +1,86 @@
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import skipIf
+
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from .. import jobs, parquet_export
+from ..models import Expense, ExportCursor, Job, Product, Sale
+
+
+@skipIf(not parquet_export.HAVE_PYARROW, "PyArrow is not installed")
+class ParquetExportTests(APITestCase):
+    def setUp(self):
+        self.out = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.out)
+        self.product = Product.objects.create(
+            name="Sugar 1kg", brand="Kakira", stock=100,
+            buying_price=Decimal("2.50"), selling_price=Decimal("3.10"),
+        )
+        for month in (1, 1, 2):
+            self.sell(datetime(2025, month, 15, 12))
+
+    def sell(self, when, quantity=1):
+        sale = Sale.objects.create(product=self.product, quantity=quantity)
+        Sale.objects.filter(pk=sale.pk).update(date=timezone.make_aware(when))
+        return sale
+
+    def read(self, table):
+        import pyarrow.dataset as ds
+        return ds.dataset(f"{self.out}/{table}", format='parquet', partitioning='hive').to_table().sort_by('id')
+
+    def test_partitions_and_values(self):
+        result = parquet_export.export_table('sale', out_dir=self.out, chunk_size=2)
+        self.assertEqual(result['rows'], 3)
+        self.assertEqual(result['files'], [
+            'sale/year=2025/month=01/part-000000000001.parquet',
+            'sale/year=2025/month=02/part-000000000001.parquet',
+        ])
+        rows = self.read('sale').to_pylist()
+        self.assertEqual([(row['year'], row['month']) for row in rows], [(2025, 1), (2025, 1), (2025, 2)])
+        self.assertEqual(rows[0]['total_price'], Decimal("3.10"))
+        self.assertEqual(rows[0]['total_price_cents'], 310)
+        self.assertEqual(rows[0]['product_name'], "Sugar 1kg")
+
+    def test_incremental_append(self):
+        parquet_export.export_table('sale', out_dir=self.out, settle=timedelta(0))
+        new = self.sell(datetime(2025, 2, 20, 9), quantity=2)
+        result = parquet_export.export_table('sale', out_dir=self.out, settle=timedelta(0))
+        self.assertEqual((result['rows'], result['last_id']), (1, new.pk))
+        self.assertEqual(result['files'], [f'sale/year=2025/month=02/part-{new.pk:012d}.parquet'])
+        self.assertEqual(self.read('sale').num_rows, 4)
+        self.assertEqual(ExportCursor.objects.get(table='sale').rows, 4)
+
+        self.assertEqual(parquet_export.export_table('sale', out_dir=self.out)['rows'], 0)
+        result = parquet_export.export_table('sale', out_dir=self.out, full=True)
+        self.assertEqual(result['rows'], 4)
+        self.assertEqual(self.read('sale').num_rows, 4)
+
+    def test_recent_rows_wait_for_the_next_run(self):
+        Sale.objects.create(product=self.product, quantity=1)
+        result = parquet_export.export_table('sale', out_dir=self.out)
+        self.assertEqual(result['rows'], 3)
+
+    def test_expenses_without_category(self):
+        Expense.objects.create(title="Tea", amount=Decimal("0.30"))
+        parquet_export.export_table('expense', out_dir=self.out, settle=timedelta(0))
+        row = self.read('expense').to_pylist()[0]
+        self.assertEqual((row['category'], row['amount']), (None, Decimal("0.30")))
+
+    def test_api_enqueues_a_job(self):
+        with override_settings(PARQUET_EXPORT_DIR=self.out):
+            response = self.client.post('/api/exports/parquet/', {'tables': ['sale']}, format='json')
+            self.assertEqual(response.status_code, 202)
+            jobs.run_job(jobs.claim_next())
+            self.assertEqual(Job.objects.get().result['sale']['rows'], 3)
+            status = self.client.get('/api/exports/parquet/').json()
+        self.assertNotIn('directory', status)
+        self.assertEqual(status['tables'][0], {
+            'table': 'sale', 'path': 'sale/', 'last_id': Sale.objects.latest('pk').pk, 'rows': 3,
+            'exported_at': status['tables'][0]['exported_at'],
+        })
+        self.assertEqual(self.client.post('/api/exports/parquet/', {'tables': ['users']}, format='json').status_code, 400)
@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from ..financial_service import FinancialService
+from ..models import (
+    ClosedPeriod, CustomUser, Expense, ExpenseCategory, PeriodDaySnapshot, PeriodProductSnapshot, Product, Purchase, Sale,
+)
+from ..periods import close_through
+from ..reports import get_expense_summary, get_overall_profits, get_profit_calculations
+
+
+def month_before(month):
+    return (month - timedelta(days=1)).replace(day=1)
+
+
+class PeriodCloseTests(APITestCase):
+    def setUp(self):
+        self.this_month = timezone.localdate().replace(day=1)
+        self.last_month = month_before(self.this_month)
+        self.old_month = month_before(self.last_month)
+        self.product = Product.objects.create(name="Sugar", brand="Kakira", stock=100,
+                                              buying_price=Decimal("10.00"), selling_price=Decimal("15.00"))
+        rent = ExpenseCategory.objects.create(name="Rent")
+        self.old_sale = self.dated(Sale.objects.create(product=self.product, quantity=2), self.old_month, 3)
+        self.last_sale = self.dated(Sale.objects.create(product=self.product, quantity=4), self.last_month, 10)
+        self.purchase = self.dated(Purchase.objects.create(product=self.product, quantity=5), self.last_month, 11)
+        self.expense = self.dated(Expense.objects.create(title="Rent", amount=Decimal("20.00"), category=rent),
+                                  self.last_month, 1)
+        Sale.objects.create(product=self.product, quantity=1)
+        self.admin = CustomUser.objects.create_user(username="owner", email="o@example.com", password="secret123",
+                                                    role='admin')
+
+    def dated(self, obj, month, day):
+        date = timezone.make_aware(datetime(month.year, month.month, day, 12))
+        type(obj).objects.filter(pk=obj.pk).update(date=date)
+        obj.refresh_from_db()
+        return obj
+
+    def reports(self):
+        return {
+            'daily': get_profit_calculations('daily'),
+            'weekly': get_profit_calculations('weekly'),
+            'monthly': get_profit_calculations('monthly'),
+            'overall': get_overall_profits(),
+            'expenses': get_expense_summary('monthly'),
+            'month': FinancialService.generate_financial_report(
+                'monthly', year=self.last_month.year, month=self.last_month.month),
+        }
+
+    def test_close_freezes_figures_and_reports_match(self):
+        before = self.reports()
+        closed = close_through(self.last_month, self.admin)
+
+        # Months close oldest first, starting from the first transaction
+        self.assertEqual([period.month for period in closed], [self.old_month, self.last_month])
+        self.assertEqual(ClosedPeriod.open_from(), self.this_month)
+        period = closed[1]
+        self.assertEqual((period.revenue_cents, period.cogs_cents, period.expenses_cents), (6000, 4000, 2000))
+        self.assertEqual((period.purchases_cents, period.purchase_quantity), (5000, 5))
+        self.assertEqual(PeriodDaySnapshot.objects.filter(closed_period=period).count(), 3)
+        self.assertEqual(PeriodProductSnapshot.objects.get(closed_period=period).quantity, 4)
+        self.assertEqual(self.reports(), before)
+
+        # Closed months are read from the snapshots: later changes to the
+        # rows or the buying price do not move them
+        Sale.objects.filter(pk=self.last_sale.pk).update(total_price_cents=0)
+        Product.objects.filter(pk=self.product.pk).update(buying_price_cents=1200)
+        monthly = {row['period']: row for row in get_profit_calculations('monthly')}
+        self.assertEqual(monthly[self.last_month.strftime('%Y-%m')]['cogs'], Decimal("40.00"))
+        self.assertEqual(monthly[self.this_month.strftime('%Y-%m')]['cogs'], Decimal("12.00"))
+        self.assertEqual(get_overall_profits()['revenue'], Decimal("105.00"))
+
+    def test_only_ended_months_close_and_only_once(self):
+        with self.assertRaises(ValueError):
+            close_through(self.this_month, self.admin)
+        close_through(self.last_month, self.admin)
+        with self.assertRaises(ValueError):
+            close_through(self.old_month, self.admin)
+
+    def test_transactions_in_closed_months_are_frozen(self):
+        close_through(self.last_month, self.admin)
+
+        response = self.client.put(f'/api/sales/{self.last_sale.pk}/', {'product': self.product.pk, 'quantity': 1},
+                                   format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.post(f'/api/sales/{self.last_sale.pk}/void/').status_code, 400)
+        self.assertEqual(self.client.delete(f'/api/sales/{self.old_sale.pk}/').status_code, 400)
+        self.assertEqual(self.client.delete(f'/api/expenses/{self.expense.pk}/').status_code, 400)
+        self.assertEqual(self.client.patch(f'/api/expenses/{self.expense.pk}/', {'amount': '1'},
+                                           format='json').status_code, 400)
+        self.assertEqual(self.client.delete(f'/api/purchases/{self.purchase.pk}/').status_code, 400)
+        with self.assertRaises(ValueError):
+            self.last_sale.save()
+        with self.assertRaises(ValidationError):
+            self.purchase.delete()
+        self.assertFalse(Sale.objects.filter(voided=True).exists())
+        self.assertEqual(Expense.objects.get().amount, Decimal("20.00"))
+
+        # The open month is untouched
+        response = self.client.post('/api/sales/', {'product': self.product.pk, 'quantity': 1}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.client.post(f"/api/sales/{response.data['id']}/void/").status_code, 200)
+
+    def test_api(self):
+        month = {'month': self.last_month.strftime('%Y-%m')}
+        self.assertEqual(self.client.post('/api/periods/close/', month, format='json').status_code, 401)
+        cashier = CustomUser.objects.create_user(username="cashier", email="c@example.com", password="secret123")
+        self.client.force_authenticate(cashier)
+        self.assertEqual(self.client.post('/api/periods/close/', month, format='json').status_code, 403)
+        self.assertFalse(ClosedPeriod.objects.exists())
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.post('/api/periods/close/', {'month': self.last_month.strftime('%Y-%m')},
+                                    format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([row['month'] for row in response.data],
+                         [self.old_month.strftime('%Y-%m'), self.last_month.strftime('%Y-%m')])
+        self.assertEqual(response.data[1]['profit'], Decimal("0.00"))
+        self.assertEqual(response.data[1]['closed_by'], "owner")
+
+        detail = self.client.get(f"/api/periods/{response.data[1]['id']}/").data
+        self.assertEqual(detail['products'], [{
+            'product': self.product.pk, 'product_name': "Sugar", 'product_brand': "Kakira", 'quantity': 4,
+            'revenue': Decimal("60.00"), 'cogs': Decimal("40.00"),
+        }])
+        self.assertEqual(self.client.post('/api/periods/close/', {'month': 'May'}, format='json').status_code, 400)
@@ -0,0 +1,93 @@
+from decimal import Decimal
+
+from rest_framework.test import APITestCase
+
+from .. import inventory
+from ..models import Product
+
+
+class ProductBulkUpdateTests(APITestCase):
+    url = '/api/products/bulk/'
+
+    def make_product(self, name, brand, buying, selling, stock=10):
+        return Product.objects.create(name=name, brand=brand, stock=stock,
+                                      buying_price=Decimal(buying), selling_price=Decimal(selling))
+
+    def setUp(self):
+        self.sugar = self.make_product("Sugar 1kg", "Kakira", "4000.00", "4500.00")
+        self.brown = self.make_product("Brown Sugar", "Kakira", "3000.00", "3333.00")
+        self.oil = self.make_product("Cooking Oil", "Mukwano", "9000.00", "10000.00")
+
+    def test_updates_keep_derived_columns(self):
+        response = self.client.patch(self.url, {'updates': [
+            {'id': self.sugar.pk, 'buying_price': '4100.50', 'stock': 0},
+            {'id': self.oil.pk, 'name': "  Sunflower   OIL ", 'selling_price': '11000'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'updated': 2, 'errors': []})
+        self.sugar.refresh_from_db()
+        self.oil.refresh_from_db()
+        self.assertEqual((self.sugar.buying_price, self.sugar.buying_price_cents), (Decimal("4100.50"), 410050))
+        self.assertEqual(self.sugar.stock, 0)
+        self.assertEqual(self.oil.name_search, "sunflower oil")
+        self.assertEqual(self.oil.selling_price, Decimal("11000.00"))
+
+    def test_bad_row_rolls_back_everything(self):
+        response = self.client.patch(self.url, {'updates': [
+            {'id': self.sugar.pk, 'selling_price': '5000'},
+            {'id': self.brown.pk, 'selling_price': '100'},
+            {'id': 999999, 'stock': 1},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['updated'], 0)
+        self.assertEqual({error['id'] for error in response.data['errors']}, {self.brown.pk, 999999})
+        self.assertIn('selling_price', response.data['errors'][0]['errors'])
+        self.sugar.refresh_from_db()
+        self.assertEqual(self.sugar.selling_price, Decimal("4500.00"))
+
+    def test_non_atomic_applies_the_valid_rows(self):
+        response = self.client.patch(self.url, {'atomic': False, 'updates': [
+            {'id': self.sugar.pk, 'selling_price': '5000'},
+            {'id': self.brown.pk, 'stock': -1, 'sales_velocity': 3},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(set(response.data['errors'][0]['errors']), {'stock', 'sales_velocity'})
+        self.sugar.refresh_from_db()
+        self.assertEqual(self.sugar.selling_price, Decimal("5000.00"))
+
+    def test_percentage_adjustment_by_brand(self):
+        # Match, locked read, one CASE update (plus the savepoint pair in tests)
+        with self.assertNumQueries(5):
+            response = self.client.patch(self.url, {'filter': {'brand': 'kakira'}, 'adjust': {'selling_price': 10}},
+                                         format='json')
+        self.assertEqual(response.data, {'updated': 2, 'errors': []})
+        self.brown.refresh_from_db()
+        self.oil.refresh_from_db()
+        self.assertEqual(self.brown.selling_price, Decimal("3666.30"))
+        self.assertEqual(self.oil.selling_price, Decimal("10000.00"))
+
+        # A cut that would sell below cost is refused for the whole brand
+        response = self.client.patch(self.url, {'filter': {'brand': 'Kakira'}, 'adjust': {'selling_price': -20}},
+                                     format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_sharded_stock_is_respread(self):
+        inventory.shard_stock(self.sugar, 4)
+        self.client.patch(self.url, {'updates': [{'id': self.sugar.pk, 'stock': 41}]}, format='json')
+        self.sugar.refresh_from_db()
+        self.assertEqual(inventory.available_stock(self.sugar), 41)
+        self.assertEqual(sorted(self.sugar.shards.values_list('quantity', flat=True)), [10, 10, 10, 11])
+
+    def test_bad_requests(self):
+        for body in [{}, {'updates': {}}, {'filter': {'name': 'x'}, 'adjust': {'selling_price': 5}},
+                     {'filter': {'brand': 'Kakira'}, 'adjust': {'stock': 5}},
+                     {'filter': {'brand': 'Kakira'}, 'adjust': {'selling_price': -100}},
+                     {'updates': [], 'atomic': 'no'}]:
+            self.assertEqual(self.client.patch(self.url, body, format='json').status_code, 400, body)
+
+    def test_partial_update_of_one_product(self):
+        response = self.client.patch(f'/api/products/{self.sugar.pk}/', {'selling_price': '4800'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.patch(f'/api/products/{self.sugar.pk}/', {'selling_price': '10'}, format='json')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,75 @@
+from decimal import Decimal
+
+from rest_framework.test import APITestCase
+
+from ..models import Product
+from ..testing import QueryBudgetMixin
+
+
+class ProductSearchTests(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        for name, brand, stock in [
+            ("Sugar 1kg", "Kakira", 40),
+            ("Brown  SUGAR 2kg", "Kinyara", 3),
+            ("Soap Bar", "Mukwano", 0),
+            ("Sukari Maalum", "Sugarland", 12),
+        ]:
+            Product.objects.create(
+                name=name, brand=brand, stock=stock,
+                buying_price=Decimal("1000.00"), selling_price=Decimal("1200.00"),
+            )
+        self.url = '/api/products/search/'
+
+    def names(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [row['name'] for row in response.data]
+
+    def test_search_fields_are_normalized(self):
+        product = Product.objects.get(brand="Kinyara")
+        self.assertEqual(product.name_search, "brown sugar 2kg")
+        self.assertEqual(product.brand_search, "kinyara")
+
+    def test_search_fields_fit_their_columns(self):
+        # casefold() turns each 'ß' into 'ss'
+        product = Product.objects.create(
+            name="ß" * 100, brand="Straße", buying_price=Decimal("1.00"), selling_price=Decimal("2.00"),
+        )
+        self.assertEqual(product.name_search, "s" * 100)
+        self.assertEqual(product.brand_search, "strasse")
+        self.assertEqual(self.names(q="ß" * 100), ["ß" * 100])
+
+    def test_prefix_matches_name_or_brand(self):
+        # Name matches come before brand-only matches
+        self.assertEqual(self.names(q="SUG"), ["Sugar 1kg", "Sukari Maalum"])
+        self.assertEqual(self.names(q="su"), ["Sugar 1kg", "Sukari Maalum"])
+        self.assertEqual(self.names(q="k"), ["Sugar 1kg", "Brown  SUGAR 2kg"])
+        self.assertEqual(self.names(q="muk"), ["Soap Bar"])
+
+    def test_contains(self):
+        self.assertEqual(self.names(q="sugar", match="contains"),
+                         ["Brown  SUGAR 2kg", "Sugar 1kg", "Sukari Maalum"])
+
+    def test_limit_and_empty_query(self):
+        self.assertEqual(len(self.names(q="s", limit=1)), 1)
+        self.assertEqual(self.names(q="  "), [])
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.client.get(self.url, {'q': 's', 'match': 'regex'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'q': 's', 'limit': 'all'}).status_code, 400)
+
+    def test_search_query_budget(self):
+        with self.assertMaxQueries(2):
+            self.client.get(self.url, {'q': 'sug'})
+
+    def test_renaming_updates_search_columns(self):
+        product = Product.objects.get(name="Soap Bar")
+        product.name = "Bar Soap"
+        product.save(update_fields=['name'])
+        product.refresh_from_db()
+        self.assertEqual(product.name_search, "bar soap")
+
+    def test_low_stock_filter(self):
+        response = self.client.get('/api/products/', {'stock__lte': 3})
+        self.assertEqual([row['stock'] for row in response.data], [0, 3])
+        self.assertEqual(self.client.get('/api/products/', {'stock__lte': 'x'}).status_code, 400)
@@ -0,0 +1,93 @@
+import gzip
+import json
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+
+from .. import renderers
+from ..renderers import FastJSONRenderer
+from ..middleware import CompressionMiddleware
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def setUp(self):
+        self.data = {
+            'revenue': Decimal('12345678901234.57'),
+            'rows': [{'price': Decimal('0.10'), 'name': 'Sugar "1kg"'}],
+            'date': datetime(2024, 1, 15, 10, 30, tzinfo=dt_timezone.utc),
+        }
+
+    def render(self):
+        return json.loads(FastJSONRenderer().render(self.data), parse_float=Decimal)
+
+    def test_decimals_are_exact_numbers_by_default(self):
+        """Decimals come out as bare JSON numbers without float rounding."""
+        body = FastJSONRenderer().render(self.data)
+        self.assertIn(b'"revenue":12345678901234.57', body)
+        self.assertEqual(self.render()['rows'][0]['price'], Decimal('0.10'))
+
+    @override_settings(FAST_JSON_DECIMALS='string')
+    def test_decimals_as_strings(self):
+        """String mode quotes decimals exactly like DRF's DecimalField does."""
+        data = self.render()
+        self.assertEqual(data['revenue'], '12345678901234.57')
+        self.assertEqual(data['rows'][0]['price'], '0.10')
+
+    def test_datetimes_match_drf_format(self):
+        """UTC datetimes keep DRF's trailing 'Z'."""
+        self.assertEqual(self.render()['date'], '2024-01-15T10:30:00Z')
+
+    def test_without_orjson_drf_renders(self):
+        """Without orjson the body is DRF's JSONRenderer output."""
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+            with override_settings(FAST_JSON_DECIMALS='string'):
+                self.assertEqual(json.loads(FastJSONRenderer().render(self.data))['rows'][0]['price'], '0.10')
+
+    def test_none_renders_empty_body(self):
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+@override_settings(COMPRESSION_ENABLED=True, COMPRESSION_MIN_SIZE=100)
+class CompressionMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.body = b'{"name":"Product"}' * 200
+
+    def get_response(self, body=None, accept='gzip, deflate'):
+        middleware = CompressionMiddleware(lambda request: HttpResponse(body or self.body))
+        request = self.factory.get('/api/sales/', HTTP_ACCEPT_ENCODING=accept)
+        return middleware(request)
+
+    def test_large_body_is_gzipped(self):
+        response = self.get_response()
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_small_body_is_left_alone(self):
+        response = self.get_response(body=b'{}')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_refused_encoding_is_not_used(self):
+        response = self.get_response(accept='gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_client_weights_pick_the_encoding(self):
+        fake_brotli = mock.Mock(compress=mock.Mock(return_value=b'br'))
+        with mock.patch('api.middleware.brotli', fake_brotli):
+            self.assertEqual(self.get_response(accept='gzip, br')['Content-Encoding'], 'br')
+            self.assertEqual(self.get_response(accept='br;q=0.5, gzip')['Content-Encoding'], 'gzip')
+            self.assertEqual(self.get_response(accept='gzip;q=0.2, *;q=0.8')['Content-Encoding'], 'br')
+            self.assertFalse(self.get_response(accept='br;q=0, gzip;q=0').has_header('Content-Encoding'))
+        # Without the brotli package a client preferring it still gets gzip
+        self.assertEqual(self.get_response(accept='br, gzip;q=0.1')['Content-Encoding'], 'gzip')
+
+    @override_settings(COMPRESSION_ENABLED=False)
+    def test_disabled_when_turned_off(self):
+        response = self.get_response()
+        self.assertFalse(response.has_header('Content-Encoding'))
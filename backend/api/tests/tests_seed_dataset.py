@@ -0,0 +1,66 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Max, Sum
+from django.test import TestCase
+
+from ..management.commands.seed_dataset import MAX_ORDER_COST
+from ..models import Expense, Product, Purchase, Sale
+
+
+class SeedDatasetCommandTests(TestCase):
+    def seed(self, *args):
+        call_command('seed_dataset', '--products', '20', '--sales', '500', '--expenses', '30',
+                     '--days', '90', '--end', '2024-06-30', '--batch-size', '100', '--clear',
+                     *args, stdout=StringIO())
+
+    def snapshot(self):
+        return (
+            list(Product.objects.order_by('name').values_list('name', 'brand', 'stock', 'selling_price')),
+            list(Sale.objects.order_by('date', 'quantity').values_list('quantity', 'total_price', 'date')),
+            Expense.objects.aggregate(Sum('amount'))['amount__sum'],
+        )
+
+    def test_counts_and_date_range(self):
+        self.seed()
+        self.assertEqual(Product.objects.count(), 20)
+        self.assertEqual(Sale.objects.count(), 500)
+        first = Sale.objects.order_by('date').first().date
+        last = Sale.objects.order_by('-date').first().date
+        self.assertGreaterEqual(first.date().isoformat(), '2024-04-02')
+        self.assertLessEqual(last.date().isoformat(), '2024-06-30')
+
+    def test_stock_matches_purchases_minus_sales(self):
+        self.seed()
+        for product in Product.objects.all():
+            bought = Purchase.objects.filter(product=product).aggregate(q=Sum('quantity'))['q'] or 0
+            sold = Sale.objects.filter(product=product).aggregate(q=Sum('quantity'))['q'] or 0
+            self.assertEqual(product.stock, bought - sold)
+
+    def test_purchase_totals_fit_their_column(self):
+        # One restock per product would cost far more than total_cost holds
+        call_command('seed_dataset', '--products', '3', '--sales', '20000', '--purchases-per-product', '1',
+                     '--expenses', '0', '--days', '30', '--end', '2024-06-30', '--clear', stdout=StringIO())
+        sold = {row['product']: row['q'] for row in Sale.objects.values('product').annotate(q=Sum('quantity'))}
+        self.assertGreater(max(product.buying_price * sold[product.pk] for product in Product.objects.all()),
+                           MAX_ORDER_COST)
+
+        self.assertLessEqual(Purchase.objects.aggregate(Max('total_cost'))['total_cost__max'], MAX_ORDER_COST)
+        self.assertEqual(MAX_ORDER_COST, Decimal("99999999.99"))
+        for product in Product.objects.all():
+            bought = Purchase.objects.filter(product=product).aggregate(q=Sum('quantity'))['q']
+            self.assertEqual(product.stock, bought - sold[product.pk])
+
+    def test_same_seed_same_data(self):
+        self.seed()
+        first = self.snapshot()
+        self.seed()
+        self.assertEqual(self.snapshot(), first)
+        self.seed('--seed', '7')
+        self.assertNotEqual(self.snapshot(), first)
+
+    def test_dates_are_not_overwritten_by_auto_now_add(self):
+        self.seed()
+        self.assertTrue(Sale._meta.get_field('date').auto_now_add)
+        self.assertFalse(Sale.objects.filter(date__date__gt='2024-06-30').exists())
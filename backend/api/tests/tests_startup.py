@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from .. import warmup
+from ..management.commands.profile_startup import parse_importtime
+
+
+class StartupTests(TestCase):
+    def test_warm_up_compiles_urls_and_connects(self):
+        timings = warmup.warm_up()
+        self.assertEqual(set(timings), {'urls_ms', 'db_ms'})
+        self.assertGreater(warmup.compile_urls(), 20)
+        self.assertIsNotNone(connection.connection)
+
+    def test_views_do_not_import_pyarrow(self):
+        # In a fresh interpreter: this one may have run an export already
+        code = ("import django, sys; django.setup(); import api.views; "
+                "print(sorted(name for name in ('pyarrow', 'numpy') if name in sys.modules))")
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                env={**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE},
+                                cwd=settings.BASE_DIR).stdout
+        self.assertEqual(output.strip().splitlines()[-1], '[]')
+
+
+class ImportTimeParsingTests(SimpleTestCase):
+    def test_parse(self):
+        rows = parse_importtime(
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   django.urls.base\n"
+            "import time:       300 |        420 | django.urls\n"
+            "Traceback noise\n"
+        )
+        self.assertEqual(rows, [('django.urls.base', 120, 120, 1), ('django.urls', 300, 420, 0)])
@@ -0,0 +1,87 @@
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from rest_framework.test import APITestCase
+
+from ..inventory import available_stock, shard_stock, sync_sharded_stock, take_stock
+from ..models import Product, ProductMonthlySales, Purchase, Sale, StockShard
+from ..testing import QueryBudgetMixin
+
+
+class StockShardTests(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.product = Product.objects.create(
+            name="Soda 500ml", brand="Nile", stock=10,
+            buying_price=Decimal("1000.00"), selling_price=Decimal("1500.00"),
+        )
+        self.product = shard_stock(self.product, 4)
+
+    def test_stock_is_spread_evenly(self):
+        self.assertEqual(
+            list(StockShard.objects.filter(product=self.product).order_by('index').values_list('quantity', flat=True)),
+            [3, 3, 2, 2],
+        )
+        self.assertEqual(available_stock(self.product), 10)
+
+    def test_sales_and_purchases_touch_shards_not_the_product_row(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            sale = Sale.objects.create(product=self.product, quantity=2)
+        Purchase.objects.create(product=self.product, quantity=5)
+        self.assertEqual(available_stock(self.product), 13)
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock, 10)  # snapshot
+        self.assertEqual(ProductMonthlySales.objects.get(product=self.product).quantity, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            sale.quantity = 1
+            sale.save()
+        self.assertEqual(available_stock(self.product), 14)
+        self.assertEqual(ProductMonthlySales.objects.get(product=self.product).quantity, 1)
+
+        self.assertEqual(sync_sharded_stock(), 1)
+        product = Product.objects.get(pk=self.product.pk)
+        self.assertEqual(product.stock, 14)
+        self.assertGreater(product.sales_velocity, 0)
+
+    def test_sale_larger_than_any_shard_drains_several(self):
+        take_stock(self.product, 9)
+        self.assertEqual(available_stock(self.product), 1)
+        with self.assertRaises(ValueError):
+            take_stock(self.product, 2)
+
+    def test_purchase_limit_uses_the_shard_total(self):
+        with self.assertRaises(ValidationError):
+            Purchase.objects.create(product=self.product, quantity=1_000_000)
+
+    def test_api_reads_and_writes_the_shard_total(self):
+        take_stock(self.product, 4)
+        self.assertEqual(self.client.get(f'/api/products/{self.product.pk}/').json()['stock'], 6)
+
+        response = self.client.post('/api/sales/', {'product': self.product.pk, 'quantity': 7}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        payload = {'name': "Soda 500ml", 'brand': "Nile", 'stock': 40,
+                   'buying_price': '1000.00', 'selling_price': '1500.00'}
+        response = self.client.put(f'/api/products/{self.product.pk}/', payload, format='json')
+        self.assertEqual(response.json()['stock'], 40)
+        self.assertEqual(StockShard.objects.filter(product=self.product).count(), 4)
+
+    def test_listing_sharded_products_is_one_query(self):
+        take_stock(self.product, 4)
+        for i in range(5):
+            product = Product.objects.create(name=f"Juice {i}", brand="Nile", stock=20 + i,
+                                             buying_price=Decimal("1000.00"), selling_price=Decimal("1500.00"))
+            take_stock(shard_stock(product, 3), i)
+        Product.objects.create(name="Water", brand="Rwenzori", stock=8,
+                               buying_price=Decimal("500.00"), selling_price=Decimal("800.00"))
+        with self.assertMaxQueries(1):
+            response = self.client.get('/api/products/')
+        self.assertEqual(sorted(row['stock'] for row in response.json()), [6, 8, 20, 20, 20, 20, 20])
+        with self.assertMaxQueries(1):
+            response = self.client.get('/api/products/?fields=id,stock')
+        self.assertEqual(len(response.json()), 7)
+
+    def test_unshard(self):
+        take_stock(self.product, 3)
+        product = shard_stock(self.product, 0)
+        self.assertEqual((product.stock, product.stock_shards), (7, 0))
+        self.assertFalse(StockShard.objects.filter(product=product).exists())
@@ -0,0 +1,89 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+
+from .. import throttling
+from ..models import CustomUser
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_take_and_refill(self):
+        state, wait = throttling.take(None, 8, now=100.0, capacity=10, rate=2)
+        self.assertEqual((state, wait), ((2, 100.0), 0))
+        # Two tokens left, five needed: 1.5 s at 2 tokens/s
+        state, wait = throttling.take(state, 5, now=100.0, capacity=10, rate=2)
+        self.assertEqual(wait, 1.5)
+        state, wait = throttling.take(state, 5, now=101.5, capacity=10, rate=2)
+        self.assertEqual((state, wait), ((0, 101.5), 0))
+        # Refills stop at the capacity
+        state, _ = throttling.take(state, 1, now=1000.0, capacity=10, rate=2)
+        self.assertEqual(state, (9, 1000.0))
+
+    def test_full_buckets_are_pruned(self):
+        buckets = throttling.MemoryBuckets()
+        buckets.buckets = {'idle': (4, 0.0), 'busy': (0, 99.0)}
+        buckets.prune(now=100.0, capacity=10, rate=2)
+        self.assertEqual(list(buckets.buckets), ['busy'])
+
+
+@override_settings(REPORT_THROTTLE_CAPACITY=40, REPORT_THROTTLE_REFILL_PER_SECOND=0.05, REPORT_THROTTLE_CACHE='')
+class ReportThrottleTests(APITestCase):
+    def setUp(self):
+        throttling.memory_buckets.clear()
+        self.addCleanup(throttling.memory_buckets.clear)
+
+    def assertThrottled(self, response, retry_after):
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], str(retry_after))
+
+    def test_costs_by_period(self):
+        for _ in range(40):
+            self.assertEqual(self.client.get('/api/profits/?period=overall').status_code, 200)
+        self.assertThrottled(self.client.get('/api/profits/?period=overall'), 20)
+
+        throttling.memory_buckets.clear()
+        for _ in range(2):
+            self.assertEqual(self.client.get('/api/profits/csv/?period=daily').status_code, 200)
+        # The bucket is empty: 20 tokens at 0.05/s
+        self.assertThrottled(self.client.get('/api/profits/?period=daily'), 400)
+        self.assertThrottled(self.client.get('/api/monthly-sales/'), 60)
+
+    def test_clients_have_their_own_buckets(self):
+        for _ in range(2):
+            self.client.get('/api/profits/?period=weekly')
+        # 53 tokens, capped at the 40 a bucket holds
+        self.assertThrottled(self.client.get('/api/financial-reports/current_period/'), 800)
+
+        user = CustomUser.objects.create_user(username="owner", email="o@example.com", password="secret123")
+        self.client.force_authenticate(user)
+        self.assertEqual(self.client.get('/api/financial-reports/current_period/').status_code, 200)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/profits/?period=overall', REMOTE_ADDR='10.0.0.9').status_code, 200)
+
+    @override_settings(REPORT_THROTTLE_CAPACITY=60)
+    def test_financial_reports_cost_their_periods(self):
+        for _ in range(60):
+            self.assertEqual(self.client.get('/api/profits/?period=overall').status_code, 200)
+        self.assertThrottled(self.client.get('/api/profits/?period=overall'), 20)
+
+        throttling.memory_buckets.clear()
+        # Weekly, monthly and yearly: 20 + 18 + 15 tokens, leaving 7
+        self.assertEqual(self.client.get('/api/financial-reports/current_period/').status_code, 200)
+        for _ in range(7):
+            self.assertEqual(self.client.get('/api/profits/?period=overall').status_code, 200)
+        self.assertThrottled(self.client.get('/api/profits/?period=overall'), 20)
+        self.assertThrottled(self.client.get('/api/financial-reports/monthly_report/'), 360)
+
+    @override_settings(REPORT_THROTTLE_CACHE='default')
+    def test_shared_cache_buckets(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        for _ in range(2):
+            self.assertEqual(self.client.get('/api/profits/?period=monthly').status_code, 200)
+        self.assertThrottled(self.client.get('/api/profits/?period=monthly'), 280)
+        self.assertEqual(throttling.memory_buckets.buckets, {})
+
+    @override_settings(REPORT_THROTTLE_CAPACITY=0)
+    def test_capacity_zero_turns_throttling_off(self):
+        for _ in range(5):
+            self.assertEqual(self.client.get('/api/profits/?period=daily').status_code, 200)
@@ -0,0 +1,111 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from .. import inventory
+from ..financial_service import FinancialService
+from ..models import Product, ProductMonthlySales, Sale
+from ..reports import get_overall_profits, get_sales_heatmap
+from ..voids import void_sales
+
+
+class SaleVoidTests(APITestCase):
+    def make_product(self, name, stock=100):
+        return Product.objects.create(name=name, brand="Test", stock=stock,
+                                      buying_price=Decimal("10.00"), selling_price=Decimal("15.00"))
+
+    def setUp(self):
+        self.sugar = self.make_product("Sugar")
+        self.salt = self.make_product("Salt")
+        self.sales = [Sale.objects.create(product=self.sugar, quantity=q) for q in (2, 3, 4)]
+        self.salt_sale = Sale.objects.create(product=self.salt, quantity=5)
+
+    def test_bulk_void_restores_stock_with_one_update_per_product(self):
+        ids = [sale.pk for sale in self.sales] + [self.salt_sale.pk]
+        # Lock + read, closed-period check, mark, product lock, one stock
+        # UPDATE per product, one rollup UPDATE per product-month, savepoints
+        with self.assertNumQueries(10):
+            voided = void_sales(ids, reason="Returned")
+        self.assertEqual(sorted(voided), sorted(ids))
+        self.sugar.refresh_from_db()
+        self.salt.refresh_from_db()
+        self.assertEqual((self.sugar.stock, self.salt.stock), (100, 100))
+        self.assertAlmostEqual(self.sugar.sales_velocity, 0)
+        self.assertEqual(Sale.objects.filter(pk__in=ids, voided=True, void_reason="Returned").count(), 4)
+        self.assertEqual(list(ProductMonthlySales.objects.values_list('quantity', flat=True)), [0, 0])
+
+        # Voiding again is a no-op
+        self.assertEqual(void_sales(ids), [])
+        self.sugar.refresh_from_db()
+        self.assertEqual(self.sugar.stock, 100)
+
+    def test_partial_void_matches_a_rebuild(self):
+        void_sales([self.sales[0].pk])
+        self.sugar.refresh_from_db()
+        incremental = self.sugar.sales_velocity
+        self.assertEqual(self.sugar.stock, 93)
+        self.assertAlmostEqual(self.sugar.days_of_cover, 93 / incremental)
+        inventory.rebuild_velocities(product_ids=[self.sugar.pk])
+        self.sugar.refresh_from_db()
+        # Rebuild buckets by day, so allow for the hours since midnight
+        self.assertAlmostEqual(self.sugar.sales_velocity, incremental, delta=incremental * 0.05)
+
+    def test_voided_sales_leave_reports(self):
+        void_sales([self.sales[0].pk])
+        self.assertEqual(get_overall_profits()['revenue'], Decimal("180.00"))
+        now = timezone.now()
+        report = FinancialService.calculate_sales_revenue(now - timedelta(days=1), now + timedelta(days=1))
+        self.assertEqual(report['total_price'], Decimal("180.00"))
+        heatmap = get_sales_heatmap(timezone.localdate(), timezone.localdate())
+        self.assertEqual(sum(map(sum, heatmap['units'])), 12)
+        self.assertEqual(self.sugar.total_sales, Decimal("105.00"))
+
+    def test_sharded_product(self):
+        sugar = inventory.shard_stock(self.sugar, 4)
+        void_sales([sale.pk for sale in self.sales])
+        self.assertEqual(inventory.available_stock(sugar), 100)
+
+    def test_api(self):
+        sale = self.sales[0]
+        response = self.client.post(f'/api/sales/{sale.pk}/void/', {'reason': "Damaged"}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['voided'], response.data['void_reason']), (True, "Damaged"))
+        self.assertEqual(self.client.post(f'/api/sales/{sale.pk}/void/').status_code, 409)
+        self.assertEqual(self.client.patch(f'/api/sales/{sale.pk}/', {'quantity': 1}, format='json').status_code, 400)
+
+        response = self.client.post('/api/sales/void/', {'ids': [sale.pk, self.sales[1].pk, 999999]}, format='json')
+        self.assertEqual(response.data, {'voided': [self.sales[1].pk], 'skipped': [sale.pk, 999999]})
+        self.assertEqual(self.client.post('/api/sales/void/', {'ids': 'all'}, format='json').status_code, 400)
+
+        # DELETE voids instead of removing the row
+        self.assertEqual(self.client.delete(f'/api/sales/{self.salt_sale.pk}/').status_code, 204)
+        self.salt.refresh_from_db()
+        self.assertEqual(self.salt.stock, 100)
+        self.assertEqual(len(self.client.get('/api/sales/?voided=false').data), 1)
+        self.assertEqual(len(self.client.get('/api/sales/?voided=true').data), 3)
+        self.assertEqual(len(self.client.get('/api/sales/?voided=all').data), 4)
+        self.assertEqual(self.client.get('/api/sales/?voided=yes').status_code, 400)
+
+    def test_deleted_sale_leaves_the_default_list(self):
+        self.assertEqual(self.client.delete(f'/api/sales/{self.salt_sale.pk}/').status_code, 204)
+        listed = [sale['id'] for sale in self.client.get('/api/sales/').data]
+        self.assertEqual(sorted(listed), sorted(sale.pk for sale in self.sales))
+        # Still there by id, marked voided
+        self.assertTrue(self.client.get(f'/api/sales/{self.salt_sale.pk}/').data['voided'])
+
+    def test_voided_sale_is_read_only(self):
+        sale = self.salt_sale
+        self.assertEqual(self.client.delete(f'/api/sales/{sale.pk}/').status_code, 204)
+        response = self.client.patch(f'/api/sales/{sale.pk}/', {'quantity': 1}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['non_field_errors'], ["A voided sale cannot be changed."])
+        response = self.client.put(f'/api/sales/{sale.pk}/', {'product': self.salt.pk, 'quantity': 1}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.post(f'/api/sales/{sale.pk}/void/').status_code, 409)
+        # Deleting again is a no-op: the stock is not given back twice
+        self.assertEqual(self.client.delete(f'/api/sales/{sale.pk}/').status_code, 204)
+        sale.refresh_from_db()
+        self.salt.refresh_from_db()
+        self.assertEqual((sale.voided, sale.quantity, self.salt.stock), (True, self.salt_sale.quantity, 100))
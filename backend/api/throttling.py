@@ -0,0 +1,131 @@
+"""
+Admission control for the expensive report endpoints.
+
+Every client (the user, or the IP address for anonymous callers) has a
+token bucket holding up to REPORT_THROTTLE_CAPACITY tokens, refilled at
+REPORT_THROTTLE_REFILL_PER_SECOND. A request takes as many tokens as its
+view's throttle_cost says it is worth, so a daily profit report over the
+whole history weighs as much as twenty `overall` ones. A client without
+enough tokens gets 429 with Retry-After set to the seconds until it has.
+
+Buckets live in process memory, so each worker throttles on its own. Set
+REPORT_THROTTLE_CACHE to a CACHES alias (Redis, Memcached) to share them
+between workers.
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+# Tokens per report period, about one per 100 ms of database time with
+# 200k sales (seed_dataset): `overall` is one aggregate, the others group
+# the whole history by period.
+PERIOD_COSTS = {
+    'overall': 1,
+    'yearly': 15,
+    'monthly': 18,
+    'weekly': 20,
+    'daily': 20,
+}
+# In-memory buckets kept before the full (idle) ones are dropped
+MAX_BUCKETS = 10_000
+
+
+def period_cost(period):
+    # An unknown period is rejected by the view, cheaply
+    return PERIOD_COSTS.get(period, 1)
+
+
+def take(state, cost, now, capacity, rate):
+    """
+    Take `cost` tokens from a bucket in `state`, (tokens, updated) or None
+    for a new, full bucket. Returns (new state, seconds to wait), the wait
+    being 0 when the tokens were taken.
+    """
+    tokens, updated = state or (capacity, now)
+    tokens = min(capacity, tokens + max(now - updated, 0) * rate)
+    if tokens >= cost:
+        return (tokens - cost, now), 0
+    return (tokens, now), (cost - tokens) / rate
+
+
+class MemoryBuckets:
+    def __init__(self):
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.limit = MAX_BUCKETS
+
+    def take(self, key, cost, capacity, rate):
+        now = time.monotonic()
+        with self.lock:
+            self.buckets[key], wait = take(self.buckets.get(key), cost, now, capacity, rate)
+            if len(self.buckets) > self.limit:
+                self.prune(now, capacity, rate)
+        return wait
+
+    def prune(self, now, capacity, rate):
+        # A bucket that has filled up again is no different from a missing one
+        self.buckets = {
+            key: (tokens, updated) for key, (tokens, updated) in self.buckets.items()
+            if tokens + (now - updated) * rate < capacity
+        }
+        self.limit = max(MAX_BUCKETS, 2 * len(self.buckets))
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class CacheBuckets:
+    """
+    Buckets in a cache shared by all workers. Like DRF's own throttles this
+    is a read-modify-write, so concurrent requests of one client may both
+    get through; close enough for admission control.
+    """
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def take(self, key, cost, capacity, rate):
+        # Wall clock: the state is compared across processes and hosts
+        state, wait = take(self.cache.get(key), cost, time.time(), capacity, rate)
+        self.cache.set(key, state, timeout=math.ceil(capacity / rate) + 1)
+        return wait
+
+
+memory_buckets = MemoryBuckets()
+
+
+def buckets():
+    alias = settings.REPORT_THROTTLE_CACHE
+    return CacheBuckets(alias) if alias else memory_buckets
+
+
+class ReportThrottle(BaseThrottle):
+    """
+    Token-bucket throttle weighted by the view's `throttle_cost`: a number,
+    or a method taking the request. Views without one cost a token.
+    """
+    scope = 'reports'
+
+    def allow_request(self, request, view):
+        capacity = settings.REPORT_THROTTLE_CAPACITY
+        if capacity <= 0:
+            return True
+        cost = getattr(view, 'throttle_cost', 1)
+        if callable(cost):
+            cost = cost(request)
+        user = request.user
+        ident = f"user:{user.pk}" if user and user.is_authenticated else f"ip:{self.get_ident(request)}"
+        # Nothing may cost more than a full bucket, or it could never run
+        self.wait_seconds = buckets().take(
+            f"throttle:{self.scope}:{ident}", min(cost, capacity), capacity,
+            settings.REPORT_THROTTLE_REFILL_PER_SECOND,
+        )
+        return self.wait_seconds == 0
+
+    def wait(self):
+        return self.wait_seconds
@@ -12,7 +12,11 @@ router.register(r'products', ProductViewSet, basename='product')
 router.register(r'sales', SaleViewSet, basename='sale')
 router.register(r'purchases', PurchaseViewSet, basename='purchase')
 router.register(r'expenses',ExpenseViewSet)
+router.register(r'expense-categories', ExpenseCategoryViewSet, basename='expense-category')
 router.register(r'financial-reports', FinancialReportsViewSet, basename='financial-reports')
+router.register(r'jobs', JobViewSet, basename='job')
+router.register(r'audit-log', AuditLogViewSet, basename='audit-log')
+router.register(r'periods', ClosedPeriodViewSet, basename='period')
 
 
 
@@ -22,6 +26,12 @@ urlpatterns = [
     path('profits/', ProfitReportView.as_view(), name='profit-report'),
     path('profits/csv/', ProfitReportCSVView.as_view(), name='profit-report-csv'),
     path("monthly-sales/", MonthlySalesReportView.as_view(), name="monthly-sales-report"),
+    path('inventory/reorder/', ReorderReportView.as_view(), name='inventory-reorder'),
+    path('analytics/heatmap/', SalesHeatmapView.as_view(), name='sales-heatmap'),
+    path('inventory/forecasts/', DemandForecastView.as_view(), name='inventory-forecasts'),
+    path('dashboard/summary/', DashboardSummaryView.as_view(), name='dashboard-summary'),
+    path('exports/parquet/', ParquetExportView.as_view(), name='parquet-export'),
+    path('batch/', BatchView.as_view(), name='batch'),
     path('', include(router.urls)),
 
     path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),  # Login
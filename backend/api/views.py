@@ -45,19 +45,135 @@ class LoginAPIView(APIView):
 
 
 from rest_framework import viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
-from .models import Product
+from django.db import connection
+from django.db.models import Q
+from .models import Product, normalize_search_text
 from .serializers import ProductSerializer
+from .fieldsets import SparseFieldsMixin
+from . import inventory, product_bulk
+
+
+def _prefix_filter(field, prefix):
+    """
+    Index-friendly "starts with" filter on a normalized column.
+    SQLite cannot use an index for LIKE ... ESCAPE, so use a range there;
+    PostgreSQL gets LIKE 'x%' served by Django's varchar_pattern_ops index.
+    """
+    if connection.vendor == 'sqlite':
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return Q(**{f'{field}__gte': prefix, f'{field}__lt': upper})
+    return Q(**{f'{field}__startswith': prefix})
+
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """
     A viewset for viewing and editing Product instances.
     Provides standard CRUD operations: list, retrieve, create, update, and delete.
+    - GET /products/?fields=id,name,stock (only those fields and columns)
+    - GET /products/?stock__lte=5 (low-stock filter, uses the stock index)
+    - GET /products/search/?q=sug (typeahead)
+    - PATCH /products/bulk/ (many products in one transaction)
     """
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     #permission_classes = [IsAuthenticatedOrReadOnly]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            queryset = inventory.with_available_stock(queryset)
+        stock_lte = self.request.query_params.get('stock__lte')
+        if stock_lte is not None:
+            try:
+                queryset = queryset.filter(stock__lte=int(stock_lte)).order_by('stock', 'id')
+            except ValueError:
+                raise serializers.ValidationError({"stock__lte": "Must be an integer."})
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Typeahead search on product name and brand.
+        Usage: GET /products/search/?q=sug&match=prefix|contains&limit=20
+        'prefix' (default) is served from the name_search/brand_search indexes;
+        'contains' uses trigram indexes on PostgreSQL and a scan elsewhere.
+        """
+        q = normalize_search_text(request.query_params.get('q'))
+        match = request.query_params.get('match', 'prefix')
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        if match not in ('prefix', 'contains'):
+            return Response({"error": "match must be 'prefix' or 'contains'"}, status=status.HTTP_400_BAD_REQUEST)
+        if not q:
+            return Response([])
+
+        fields = ('id', 'name', 'brand', 'stock', 'selling_price', 'buying_price')
+        if match == 'contains':
+            results = (
+                Product.objects.filter(Q(name_search__contains=q) | Q(brand_search__contains=q))
+                .order_by('name_search', 'id')
+                .values(*fields)[:limit]
+            )
+            return Response(list(results))
+
+        # Name matches first, then brand matches. Each query walks its own
+        # index in order and stops at `limit`, so no sort over a big brand.
+        name_match = _prefix_filter('name_search', q)
+        results = list(
+            Product.objects.filter(name_match).order_by('name_search', 'id').values(*fields)[:limit]
+        )
+        if len(results) < limit:
+            results += list(
+                Product.objects.filter(_prefix_filter('brand_search', q))
+                .exclude(name_match)
+                .order_by('brand_search', 'id')
+                .values(*fields)[:limit - len(results)]
+            )
+        return Response(results)
+
+    @action(detail=False, methods=['patch'])
+    def bulk(self, request):
+        """
+        Update many products at once.
+        Usage: PATCH /products/bulk/ with either
+          {"updates": [{"id": 1, "selling_price": "3200", "stock": 40}, ...]}
+          {"filter": {"brand": "Kakira"}, "adjust": {"selling_price": 10}}  (percent)
+        plus optional "atomic": false to apply the valid rows when some fail.
+        Returns {"updated": n, "errors": [{"id", "errors"}, ...]}.
+        """
+        data = request.data
+        atomic = data.get('atomic', True)
+        if not isinstance(atomic, bool):
+            return Response({"error": "atomic must be true or false"}, status=status.HTTP_400_BAD_REQUEST)
+        if ('updates' in data) == ('filter' in data):
+            return Response({"error": "Send either 'updates' or 'filter' with 'adjust'"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        errors = []
+        if 'updates' in data:
+            if not isinstance(data['updates'], list):
+                return Response({"error": "updates must be a list"}, status=status.HTTP_400_BAD_REQUEST)
+            changes, errors = product_bulk.parse_updates(data['updates'])
+        else:
+            try:
+                changes = product_bulk.parse_adjustment(data['filter'], data.get('adjust'))
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if len(changes) + len(errors) > product_bulk.MAX_ROWS:
+            return Response({"error": f"At most {product_bulk.MAX_ROWS} products per request"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if errors and atomic:
+            return Response({"updated": 0, "errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+        updated, apply_errors = product_bulk.apply_updates(changes, atomic=atomic)
+        errors += apply_errors
+        code = status.HTTP_400_BAD_REQUEST if errors and atomic else status.HTTP_200_OK
+        return Response({"updated": len(updated), "errors": errors}, status=code)
+
     def perform_create(self, serializer):
         """
         Save the product instance with validated data.
@@ -80,15 +196,70 @@ class ProductViewSet(viewsets.ModelViewSet):
 
 
 
-class SaleViewSet(viewsets.ModelViewSet):
+from .idempotency import IdempotentCreateMixin
+from . import voids
+
+
+class SaleViewSet(SparseFieldsMixin, IdempotentCreateMixin, viewsets.ModelViewSet):
     """
     A viewset for viewing and editing Sale instances.
     Provides standard CRUD operations: list, retrieve, create, update, and delete.
+    POST accepts an Idempotency-Key header; retries with the same key replay the first response.
+    - GET /sales/ lists sales that are not voided; ?voided=true lists the voided ones, ?voided=all both
+    - GET /sales/?fields=id,quantity,product&expand=product (product details joined in)
+    - POST /sales/{id}/void/ {"reason": "..."} and POST /sales/void/ {"ids": [...], "reason": "..."}
+    DELETE voids the sale too: the units go back into stock and the row is kept.
+    A voided sale is read-only: GET /sales/{id}/ still returns it, PUT/PATCH get 400,
+    void gets 409 and DELETE changes nothing.
     """
     queryset = Sale.objects.all()
     serializer_class = SaleSerializer
+    expandable_fields = {'product': ProductSerializer}
     #permission_classes = [IsAuthenticatedOrReadOnly]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # A voided sale is gone from the list, but can still be fetched (not changed) by id
+        voided = self.request.query_params.get('voided', 'false' if self.action == 'list' else 'all')
+        if voided not in ('true', 'false', 'all'):
+            raise serializers.ValidationError({"voided": "Must be 'true', 'false' or 'all'."})
+        if voided != 'all':
+            queryset = queryset.filter(voided=voided == 'true')
+        return queryset
+
+    @action(detail=True, methods=['post'])
+    def void(self, request, pk=None):
+        sale = self.get_object()
+        if sale.voided:
+            return Response({"error": "Sale is already voided"}, status=status.HTTP_409_CONFLICT)
+        try:
+            voids.void_sales([sale.pk], reason=str(request.data.get('reason', ''))[:255])
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        sale.refresh_from_db()
+        return Response(SaleSerializer(sale).data)
+
+    @action(detail=False, methods=['post'], url_path='void')
+    def void_many(self, request):
+        ids = request.data.get('ids')
+        if not isinstance(ids, list) or not ids or not all(isinstance(pk, int) for pk in ids):
+            return Response({"error": "ids must be a non-empty list of integers"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > voids.MAX_SALES:
+            return Response({"error": f"At most {voids.MAX_SALES} sales per request"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            voided = voids.void_sales(ids, reason=str(request.data.get('reason', ''))[:255])
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        # Whatever was asked for but not voided now was missing or voided before
+        return Response({"voided": voided, "skipped": sorted(set(ids) - set(voided))})
+
+    def perform_destroy(self, instance):
+        try:
+            voids.void_sales([instance.pk])
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+
     def perform_create(self, serializer):
         """
         Save the sale instance with validated data, triggering the model's save method.
@@ -108,18 +279,22 @@ class SaleViewSet(viewsets.ModelViewSet):
 
 
 
-class PurchaseViewSet(viewsets.ModelViewSet):
+from django.core.exceptions import ValidationError
+
+
+class PurchaseViewSet(SparseFieldsMixin, IdempotentCreateMixin, viewsets.ModelViewSet):
     """
     Simple ModelViewSet for Purchase model
     Provides all CRUD operations:
-    - GET /purchases/ (list all)
-    - POST /purchases/ (create new)
+    - GET /purchases/ (list all, ?fields=... to trim, ?expand=product for the full product)
+    - POST /purchases/ (create new, honours the Idempotency-Key header)
     - GET /purchases/{id}/ (get one)
     - PUT/PATCH /purchases/{id}/ (update)
     - DELETE /purchases/{id}/ (delete)
     """
     queryset = Purchase.objects.select_related('product').all()
     serializer_class = PurchaseSerializer
+    expandable_fields = {'product': ProductSerializer}
     #permission_classes = [IsAuthenticatedOrReadOnly]
 
     def perform_create(self, serializer):
@@ -140,19 +315,32 @@ class PurchaseViewSet(viewsets.ModelViewSet):
         else:
             raise serializers.ValidationError(serializer.errors)
 
+    def perform_destroy(self, instance):
+        # Purchases and expenses dated in a closed period cannot be deleted
+        try:
+            instance.delete()
+        except ValidationError as e:
+            raise serializers.ValidationError(e.messages)
+
 
-class ExpenseViewSet(viewsets.ModelViewSet):
+from datetime import datetime
+from .reports import get_expense_summary
+
+
+class ExpenseViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """
     Simple ModelViewSet for Expense model
     Provides all CRUD operations:
-    - GET /expenses/ (list all)
+    - GET /expenses/ (list all, ?fields=... to trim, ?expand=category)
     - POST /expenses/ (create new)
     - GET /expenses/{id}/ (get one)
     - PUT/PATCH /expenses/{id}/ (update)
     - DELETE /expenses/{id}/ (delete)
+    - GET /expenses/summary/ (totals per category)
     """
-    queryset = Expense.objects.all()
+    queryset = Expense.objects.select_related('category').all()
     serializer_class = ExpenseSerializer
+    expandable_fields = {'category': ExpenseCategorySerializer}
     #permission_classes = [IsAuthenticatedOrReadOnly]
 
     def perform_create(self, serializer):
@@ -166,6 +354,43 @@ class ExpenseViewSet(viewsets.ModelViewSet):
             serializer.save()
         else:
             raise serializers.ValidationError(serializer.errors)
+
+    def perform_destroy(self, instance):
+        try:
+            instance.delete()
+        except ValidationError as e:
+            raise serializers.ValidationError(e.messages)
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """
+        Expense totals per category.
+        Usage: GET /expenses/summary/?group_by=category&period=<daily|weekly|monthly|yearly|overall>&start=YYYY-MM-DD&end=YYYY-MM-DD
+        """
+        if request.query_params.get('group_by', 'category') != 'category':
+            return Response({"error": "group_by must be 'category'"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            start, end = (
+                datetime.strptime(value, '%Y-%m-%d').date() if value else None
+                for value in (request.query_params.get('start'), request.query_params.get('end'))
+            )
+        except ValueError:
+            return Response({"error": "start and end must be YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            return Response(get_expense_summary(request.query_params.get('period', 'overall'), start, end))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ExpenseCategoryViewSet(viewsets.ModelViewSet):
+    """
+    CRUD for expense categories.
+    - GET/POST /expense-categories/
+    - GET/PUT/PATCH/DELETE /expense-categories/{id}/
+    Deleting a category leaves its expenses uncategorised.
+    """
+    queryset = ExpenseCategory.objects.all()
+    serializer_class = ExpenseCategorySerializer
         
 
 
@@ -175,12 +400,25 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
 from .financial_service import FinancialService
+from .throttling import ReportThrottle, period_cost
 
 
 class FinancialReportsViewSet(viewsets.ViewSet):
     """
     ViewSet for financial reports and calculations
     """
+    throttle_classes = [ReportThrottle]
+    # Each report costs what its period costs on /api/profits/;
+    # current_period runs all three
+    report_periods = {
+        'weekly_report': ['weekly'],
+        'monthly_report': ['monthly'],
+        'yearly_report': ['yearly'],
+        'current_period': ['weekly', 'monthly', 'yearly'],
+    }
+
+    def throttle_cost(self, request):
+        return sum(period_cost(period) for period in self.report_periods.get(self.action, ['overall']))
     
     @action(detail=False, methods=['get'])
     def weekly_report(self, request):
@@ -288,7 +526,7 @@ class FinancialReportsViewSet(viewsets.ViewSet):
             )
 
 
-from .reports import get_profit_calculations, get_overall_profits
+from .reports import get_profit_calculations, get_overall_profits, write_profit_csv
 
 
 class ProfitReportView(APIView):
@@ -296,6 +534,11 @@ class ProfitReportView(APIView):
     API endpoint to retrieve profit reports by period (daily, weekly, monthly, yearly) or overall.
     - GET /api/profits/?period=<daily|weekly|monthly|yearly|overall>
     """
+    throttle_classes = [ReportThrottle]
+
+    def throttle_cost(self, request):
+        return period_cost(request.query_params.get('period', 'daily'))
+
     def get(self, request):
         # Check user role (optional: restrict to admin or viewer)
         '''
@@ -325,6 +568,11 @@ class ProfitReportCSVView(APIView):
     API endpoint to download profit reports as CSV.
     - GET /api/profits/csv/?period=<daily|weekly|monthly|yearly|overall>
     """
+    throttle_classes = [ReportThrottle]
+
+    def throttle_cost(self, request):
+        return period_cost(request.query_params.get('period', 'daily'))
+
     def get(self, request):
         # Check user role (optional: restrict to admin)
         '''
@@ -335,21 +583,10 @@ class ProfitReportCSVView(APIView):
         period = request.query_params.get('period', 'daily')
 
         try:
-            if period == 'overall':
-                data = [get_overall_profits()]
-            else:
-                data = get_profit_calculations(period)
-
             # Create CSV response
             response = HttpResponse(content_type='text/csv')
             response['Content-Disposition'] = f'attachment; filename="{period}_profits.csv"'
-
-            writer = csv.writer(response)
-            writer.writerow(['Period', 'Revenue', 'COGS', 'Expenses', 'Profit'])  # Header
-
-            for row in data:
-                period_str = row.get('period', 'Overall') or 'Overall'
-                writer.writerow([period_str, row['revenue'], row['cogs'], row['expenses'], row['profit']])
+            write_profit_csv(response, period)
 
             return response
         except ValueError as e:
@@ -358,20 +595,334 @@ class ProfitReportCSVView(APIView):
 
 
 
-from django.db.models.functions import TruncMonth
+from .pagination import AlwaysPageNumberPagination, OptionalPageNumberPagination
+
+
 class MonthlySalesReportView(APIView):
+    """
+    Units and revenue per product per month, read from the ProductMonthlySales rollup.
+    - GET /api/monthly-sales/?year=2024&product=<id>&brand=<brand>&page=1&page_size=100
+    Pagination is only applied when page or page_size is given.
+    """
+    throttle_classes = [ReportThrottle]
+    # Groups the whole rollup table
+    throttle_cost = 3
+
     def get(self, request):
+        qs = ProductMonthlySales.objects.all()
+
+        year = request.query_params.get('year')
+        product = request.query_params.get('product')
+        brand = request.query_params.get('brand')
+        try:
+            if year:
+                qs = qs.filter(month__year=int(year))
+            if product:
+                qs = qs.filter(product_id=int(product))
+        except ValueError:
+            return Response({"error": "year and product must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+        if brand:
+            qs = qs.filter(product__brand__iexact=brand)
+
+        # Products sharing a name are reported together, as before
         qs = (
-            Sale.objects
-            .annotate(month=TruncMonth("date"))
-            .values("product__name", "month")
+            qs.values("product__name", "month")
             .annotate(
-                total_sales=Sum("total_price"),
+                total_sales=Sum("revenue"),
                 total_quantity=Sum("quantity")
             )
+            .filter(total_quantity__gt=0)
             .order_by("month", "product__name")
         )
+
+        paginator = OptionalPageNumberPagination()
+        page = paginator.paginate_queryset(qs, request, view=self)
+        if page is not None:
+            serializer = MonthlySalesSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+
         serializer = MonthlySalesSerializer(qs, many=True)
         return Response(serializer.data)
 
 
+
+import math
+
+from django.conf import settings
+from .inventory import reorder_candidates
+
+
+class ReorderReportView(APIView):
+    """
+    Products that will run out within the supplier lead time.
+    - GET /api/inventory/reorder/?lead_time=<days>&target_days=<days>
+    lead_time defaults to REORDER_LEAD_TIME_DAYS; reorder_quantity tops
+    stock up to target_days (REORDER_TARGET_DAYS) of expected sales.
+    """
+    def get(self, request):
+        try:
+            lead_time = float(request.query_params.get('lead_time', settings.REORDER_LEAD_TIME_DAYS))
+            target_days = float(request.query_params.get('target_days', settings.REORDER_TARGET_DAYS))
+        except ValueError:
+            return Response({"error": "lead_time and target_days must be numbers"}, status=status.HTTP_400_BAD_REQUEST)
+        # float() accepts 'nan' and 'inf', which no comparison below would catch
+        if not (math.isfinite(lead_time) and math.isfinite(target_days)):
+            return Response({"error": "lead_time and target_days must be finite"}, status=status.HTTP_400_BAD_REQUEST)
+        if lead_time < 0 or target_days < 0:
+            return Response({"error": "lead_time and target_days cannot be negative"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(reorder_candidates(lead_time, target_days))
+
+
+class DemandForecastView(APIView):
+    """
+    Stored demand forecasts, highest expected demand first.
+    - GET /api/inventory/forecasts/?product=<id>&page=<n>&page_size=<n>
+    Always paginated. Refreshed by `manage.py forecast_demand`.
+    """
+    def get(self, request):
+        queryset = DemandForecast.objects.select_related('product').order_by('-units', 'product_id')
+        product = request.query_params.get('product')
+        if product:
+            if not product.isdigit():
+                return Response({"error": "product must be an id"}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(product_id=product)
+
+        # One row per product: always paginated, like the audit log
+        paginator = AlwaysPageNumberPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = DemandForecastSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+
+from django.http import FileResponse
+from . import jobs
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Background jobs for long reports and exports.
+    - POST /api/jobs/ {"kind": "profit_csv", "params": {"period": "daily"}} -> 202 with the queued job
+    - GET /api/jobs/ and /api/jobs/{id}/ to poll status
+    - GET /api/jobs/{id}/download/ for the result once status is "done"
+    Kinds: financial_report, profit_csv, sales_csv, parquet_export. Run `manage.py run_workers` to process them.
+    """
+    queryset = Job.objects.order_by('-created_at')
+    serializer_class = JobSerializer
+    pagination_class = OptionalPageNumberPagination
+
+    def create(self, request):
+        params = request.data.get('params') or {}
+        if not isinstance(params, dict):
+            return Response({"error": "params must be an object"}, status=status.HTTP_400_BAD_REQUEST)
+        user = request.user if request.user.is_authenticated else None
+        try:
+            job = jobs.enqueue(request.data.get('kind'), params, user=user)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if job.status != Job.DONE:
+            return Response({"error": f"Job is {job.status}", "status": job.status}, status=status.HTTP_409_CONFLICT)
+        if not job.result_filename:
+            return Response(job.result)
+        try:
+            file = open(jobs.result_path(job), 'rb')
+        except FileNotFoundError:
+            return Response({"error": "The result file is no longer available"}, status=status.HTTP_410_GONE)
+        return FileResponse(file, as_attachment=True, filename=job.result_filename,
+                            content_type=job.result_content_type)
+
+
+
+from datetime import timedelta
+from . import business_time
+from .reports import get_sales_heatmap
+
+
+class SalesHeatmapView(APIView):
+    """
+    Revenue and units by weekday x hour in the business timezone.
+    - GET /api/analytics/heatmap/?start=YYYY-MM-DD&end=YYYY-MM-DD
+    Defaults to the last 365 days. revenue[0][9] is Monday 09:00-09:59.
+    """
+    def get(self, request):
+        try:
+            end = request.query_params.get('end')
+            end = datetime.strptime(end, '%Y-%m-%d').date() if end else business_time.localdate()
+            start = request.query_params.get('start')
+            start = datetime.strptime(start, '%Y-%m-%d').date() if start else end - timedelta(days=364)
+        except ValueError:
+            return Response({"error": "start and end must be YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+        if start > end:
+            return Response({"error": "start must not be after end"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(get_sales_heatmap(start, end))
+
+
+
+from . import parquet_export
+
+
+class ParquetExportView(APIView):
+    """
+    Partitioned Parquet files of the sales, purchases and expenses history.
+    - GET /api/exports/parquet/ -> how far each table has been exported, and its directory in the export
+    - POST /api/exports/parquet/ {"tables": ["sale"], "full": false} -> 202 with the queued job
+    New rows are appended on each run; "full" rewrites the tables from scratch.
+    """
+    def get(self, request):
+        cursors = {cursor.table: cursor for cursor in ExportCursor.objects.all()}
+        # Paths are relative to PARQUET_EXPORT_DIR: where that is on the server stays private
+        return Response({
+            'tables': [
+                {
+                    'table': table,
+                    'path': f'{table}/',
+                    'last_id': cursors[table].last_id if table in cursors else 0,
+                    'rows': cursors[table].rows if table in cursors else 0,
+                    'exported_at': cursors[table].exported_at if table in cursors else None,
+                }
+                for table in parquet_export.TABLES
+            ],
+        })
+
+    def post(self, request):
+        params = {key: request.data[key] for key in ('tables', 'full') if key in request.data}
+        user = request.user if request.user.is_authenticated else None
+        try:
+            job = jobs.enqueue('parquet_export', params, user=user)
+        except (ValueError, RuntimeError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+
+from . import audit
+from .permissions import IsAdminRole
+
+
+class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Who changed which sale, purchase, expense or product price, newest first.
+    - GET /api/audit-log/?object_type=sale&object_id=<id>
+    - GET /api/audit-log/?user=<id>&start=YYYY-MM-DD&end=YYYY-MM-DD
+    Admins only. Always paginated (page, page_size). Entries appear a few
+    seconds after the write (AUDIT_FLUSH_INTERVAL_SECONDS).
+    """
+    serializer_class = AuditLogSerializer
+    pagination_class = AlwaysPageNumberPagination
+    permission_classes = [IsAdminRole]
+
+    def get_queryset(self):
+        queryset = AuditLog.objects.select_related('user').order_by('-created_at', '-pk')
+        params = self.request.query_params
+        object_type = params.get('object_type')
+        if object_type is not None:
+            if object_type not in [name.lower() for name in audit.TRACKED_FIELDS]:
+                raise serializers.ValidationError({"object_type": "Unknown object type."})
+            queryset = queryset.filter(object_type=object_type)
+        try:
+            if params.get('object_id'):
+                if object_type is None:
+                    raise serializers.ValidationError({"object_id": "Needs object_type."})
+                queryset = queryset.filter(object_id=int(params['object_id']))
+            if params.get('user'):
+                queryset = queryset.filter(user_id=int(params['user']))
+        except ValueError:
+            raise serializers.ValidationError({"error": "object_id and user must be integers"})
+        try:
+            if params.get('start'):
+                start = datetime.strptime(params['start'], '%Y-%m-%d')
+                queryset = queryset.filter(created_at__gte=timezone.make_aware(start))
+            if params.get('end'):
+                end = datetime.strptime(params['end'], '%Y-%m-%d') + timedelta(days=1)
+                queryset = queryset.filter(created_at__lt=timezone.make_aware(end))
+        except ValueError:
+            raise serializers.ValidationError({"error": "start and end must be YYYY-MM-DD"})
+        return queryset
+
+
+
+from django.db import IntegrityError
+from . import periods
+
+
+class ClosedPeriodViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Month-end close. Transactions dated in a closed month can no longer be
+    changed, voided or deleted, and the reports read it from snapshots.
+    - GET /api/periods/ and GET /api/periods/{id}/ (with per-product figures)
+    - POST /api/periods/close/ {"month": "YYYY-MM"} closes every open month up to that one (admins only)
+    """
+    queryset = ClosedPeriod.objects.select_related('closed_by')
+    serializer_class = ClosedPeriodSerializer
+
+    def retrieve(self, request, *args, **kwargs):
+        period = self.get_object()
+        data = self.get_serializer(period).data
+        data['products'] = PeriodProductSnapshotSerializer(
+            period.products.order_by('-revenue_cents', 'product_name'), many=True
+        ).data
+        return Response(data)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminRole])
+    def close(self, request):
+        try:
+            month = datetime.strptime(str(request.data.get('month', '')), '%Y-%m').date()
+        except ValueError:
+            return Response({"error": "month must be YYYY-MM"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            closed = periods.close_through(month, request.user)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except IntegrityError:
+            return Response({"error": "Another close of the same month got there first"},
+                            status=status.HTTP_409_CONFLICT)
+        return Response(self.get_serializer(closed, many=True).data, status=status.HTTP_201_CREATED)
+
+
+
+from . import dashboard
+
+
+class DashboardSummaryView(APIView):
+    """
+    Everything the admin dashboard shows, in one request.
+    - GET /api/dashboard/summary/
+    Today's sales, week / month / year profit, stock value, low-stock count,
+    the month's top products and the latest expenses. Cached until the next
+    write (see dashboard.py).
+    """
+    throttle_classes = [ReportThrottle]
+
+    def get(self, request):
+        return Response(dashboard.get_summary())
+
+
+
+from . import batch
+
+
+class BatchView(APIView):
+    """
+    Several API calls in one round trip.
+    - POST /api/batch/ {"requests": [{"method": "GET", "path": "/api/products/"}, ...], "atomic": false}
+    Returns {"responses": [{"status", "headers", "body"}, ...]} in request order.
+    GET-only batches run concurrently; see batch.py.
+    """
+
+    def post(self, request):
+        try:
+            entries, atomic = batch.parse(request.data)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        answers, failed = batch.run(request, entries, atomic=atomic)
+        if failed is not None:
+            return Response({"error": f"Request {failed} failed, nothing was saved", "responses": answers},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({"responses": answers})
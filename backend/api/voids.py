@@ -0,0 +1,85 @@
+"""
+Voiding (returning) sales.
+
+A voided sale stays in the Sale table with voided=True and is left out of
+the reports, FinancialService, the monthly rollup and the velocities. Its
+units go back on the shelf with set-based updates: one
+UPDATE ... SET stock = stock + n per affected product (or per product's
+shard when its stock is sharded), however many of its sales are voided.
+The same statement takes the voided units out of the sales velocity.
+"""
+import math
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import ExpressionWrapper, F, FloatField
+from django.utils import timezone
+
+from . import audit, dashboard, inventory
+from .models import CLOSED_PERIOD_MESSAGE, ClosedPeriod, Product, ProductMonthlySales, Sale
+
+MAX_SALES = 10_000
+
+
+def void_sales(sale_ids, reason=''):
+    """
+    Void the given sales and restock their products. Sales that do not
+    exist or are already voided are skipped. Returns the ids voided.
+    Raises ValueError if any of them is dated in a closed period.
+    """
+    with transaction.atomic():
+        sales = list(
+            Sale.objects.select_for_update()
+            .filter(pk__in=sale_ids, voided=False)
+            .values_list('pk', 'product_id', 'quantity', 'total_price', 'date')
+        )
+        if not sales:
+            return []
+        if ClosedPeriod.is_closed(min(date for *_, date in sales)):
+            raise ValueError(CLOSED_PERIOD_MESSAGE)
+        now = timezone.now()
+        voided = [pk for pk, *_ in sales]
+        Sale.objects.filter(pk__in=voided).update(voided=True, voided_at=now, void_reason=reason)
+        dashboard.changed()
+        audit.record_many('sale', audit.VOID, [(pk, {'voided': [False, True], 'void_reason': ['', reason]}) for pk in voided])
+
+        tau = inventory.velocity_tau()
+        units = defaultdict(int)
+        # What the voided sales still add to each product's velocity now
+        demand = defaultdict(float)
+        # (product, month) -> [units, revenue, a date in that month]
+        rollup = defaultdict(lambda: [0, Decimal('0'), None])
+        for _, product_id, quantity, total_price, date in sales:
+            units[product_id] += quantity
+            age_days = max((now - date).total_seconds(), 0) / inventory.SECONDS_PER_DAY
+            demand[product_id] += quantity * math.exp(-age_days / tau) / tau
+            entry = rollup[(product_id, ProductMonthlySales.month_of(date))]
+            entry[0] += quantity
+            entry[1] += total_price
+            entry[2] = date
+
+        products = Product.objects.select_for_update().only(
+            'stock_shards', 'sales_velocity', 'velocity_updated_at'
+        ).in_bulk(list(units))
+        for product_id, quantity in units.items():
+            product = products[product_id]
+            if product.stock_shards:
+                # Velocity of sharded products is refreshed by sync_sharded_stock()
+                inventory.return_stock(product, quantity)
+                continue
+            velocity = inventory.decayed_velocity(product.sales_velocity, product.velocity_updated_at, now)
+            velocity = max(velocity - demand[product_id], 0.0)
+            stock = F('stock') + quantity
+            Product.objects.filter(pk=product_id).update(
+                stock=stock,
+                sales_velocity=velocity,
+                velocity_updated_at=now,
+                days_of_cover=(
+                    ExpressionWrapper(stock * 1.0 / velocity, output_field=FloatField()) if velocity > 0 else None
+                ),
+            )
+
+        for (product_id, _), (quantity, revenue, date) in rollup.items():
+            ProductMonthlySales.add(product_id, date, -quantity, -revenue)
+    return voided
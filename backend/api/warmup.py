@@ -0,0 +1,57 @@
+"""
+Start-up work for a new server process (called from wsgi.py).
+
+Django imports the URLconf, and with it every view, serializer and DRF
+module, when the first request comes in, and opens the database
+connection then too. On a platform that sleeps idle instances that first
+request pays for all of it. warm_up() does the same work as the process
+starts instead:
+- imports the URLconf and compiles every URL pattern's regex, and builds
+  the reverse() lookup tables,
+- opens the database connection, which the first request then reuses when
+  CONN_MAX_AGE keeps connections open.
+
+See the profile_startup command for where a cold start spends its time.
+"""
+import logging
+import time
+
+from django.db import connections
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def compile_urls(resolver=None):
+    """Import every view and compile every URL pattern. Returns how many there are."""
+    resolver = resolver or get_resolver()
+    count = 0
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex  # compiled on first access
+        count += 1
+        if hasattr(pattern, 'url_patterns'):
+            count += compile_urls(pattern)
+    return count
+
+
+def open_connections():
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+def warm_up():
+    """Returns {step: milliseconds}. A database that is down is logged, not raised."""
+    timings = {}
+    started = time.perf_counter()
+    compile_urls()
+    get_resolver().reverse_dict
+    timings['urls_ms'] = round((time.perf_counter() - started) * 1000, 2)
+
+    started = time.perf_counter()
+    try:
+        open_connections()
+    except Exception:
+        # The first request will try again and report the error properly
+        logger.warning("Could not open the database connection during warm-up", exc_info=True)
+    timings['db_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return timings
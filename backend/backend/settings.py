@@ -40,6 +40,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.CompressionMiddleware',
+    'api.middleware.QueryInstrumentationMiddleware',
+    'api.middleware.AuditContextMiddleware',
     "corsheaders.middleware.CorsMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -52,6 +55,11 @@ MIDDLEWARE = [
 
 CORS_ALLOW_ALL_ORIGINS = True
 
+# Response compression (gzip, or brotli when the package is installed).
+# Off by default, set RESPONSE_COMPRESSION=1 to turn it on.
+COMPRESSION_ENABLED = os.environ.get('RESPONSE_COMPRESSION', '0') == '1'
+COMPRESSION_MIN_SIZE = int(os.environ.get('RESPONSE_COMPRESSION_MIN_SIZE', 8192))
+
 
 
 ROOT_URLCONF = 'backend.urls'
@@ -81,7 +89,11 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 
 DATABASES = {
     'default': dj_database_url.config(
-        default=os.environ.get('DATABASE_URL')  # we’ll keep it in env var
+        default=os.environ.get('DATABASE_URL'),  # we’ll keep it in env var
+        # Keep connections between requests (checked before reuse), so the
+        # one opened at start-up (api/warmup.py) serves the first request
+        conn_max_age=int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        conn_health_checks=True,
     )
 }
 
@@ -111,6 +123,11 @@ LANGUAGE_CODE = 'en-us'
 
 TIME_ZONE = 'UTC'
 
+# Local time of the shop: the days, months and years of the reports, rollups,
+# month-end close and archive, and the hours of the sales heatmap
+# (see api/business_time.py)
+BUSINESS_TIME_ZONE = os.environ.get('BUSINESS_TIME_ZONE', TIME_ZONE)
+
 USE_I18N = True
 
 USE_TZ = True
@@ -133,8 +150,84 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+}
+
+# Per-request query count / DB time, sent as Server-Timing and logged to 'api.queries'
+QUERY_INSTRUMENTATION_ENABLED = os.environ.get('QUERY_INSTRUMENTATION', '1') == '1'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api.queries': {
+            'handlers': ['console'],
+            'level': os.environ.get('QUERY_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
 }
 
+# Reorder engine (api/inventory.py)
+SALES_VELOCITY_HALF_LIFE_DAYS = 14
+REORDER_LEAD_TIME_DAYS = 7
+REORDER_TARGET_DAYS = 30
+
+# Stored responses for Idempotency-Key retries (api/idempotency.py)
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.environ.get('IDEMPOTENCY_KEY_TTL_HOURS', 24))
+
+# Background jobs (api/jobs.py, manage.py run_workers)
+JOB_WORKER_PROCESSES = int(os.environ.get('JOB_WORKER_PROCESSES', 2))
+JOB_POLL_INTERVAL_SECONDS = float(os.environ.get('JOB_POLL_INTERVAL_SECONDS', 2))
+# A running job's worker sends a heartbeat every JOB_HEARTBEAT_SECONDS; a job
+# without one for JOB_STALE_AFTER_MINUTES is requeued
+JOB_HEARTBEAT_SECONDS = float(os.environ.get('JOB_HEARTBEAT_SECONDS', 30))
+JOB_STALE_AFTER_MINUTES = int(os.environ.get('JOB_STALE_AFTER_MINUTES', 5))
+JOB_MAX_ATTEMPTS = 3
+# Files written by report and export jobs; downloads stream from here
+JOB_FILES_DIR = os.environ.get('JOB_FILES_DIR', str(BASE_DIR / 'exports' / 'jobs'))
+# Finished jobs and their files are deleted after this many days
+JOB_RESULT_TTL_DAYS = int(os.environ.get('JOB_RESULT_TTL_DAYS', 7))
+
+# Token-bucket throttle of the report endpoints (api/throttling.py). A token
+# is about 100 ms of database time; a capacity of 0 turns throttling off.
+REPORT_THROTTLE_CAPACITY = int(os.environ.get('REPORT_THROTTLE_CAPACITY', 60))
+REPORT_THROTTLE_REFILL_PER_SECOND = float(os.environ.get('REPORT_THROTTLE_REFILL_PER_SECOND', 1))
+# A CACHES alias to share the buckets between workers; empty keeps them per process
+REPORT_THROTTLE_CACHE = os.environ.get('REPORT_THROTTLE_CACHE', '')
+
+# Cache of GET /api/dashboard/summary/ (api/dashboard.py), keyed by a data
+# version bumped on every write. With several workers use a shared CACHES
+# alias; otherwise the timeout bounds how stale other workers' copies get.
+DASHBOARD_CACHE = os.environ.get('DASHBOARD_CACHE', 'default')
+DASHBOARD_CACHE_SECONDS = int(os.environ.get('DASHBOARD_CACHE_SECONDS', 60))
+
+# POST /api/batch/ (api/batch.py): threads running the GETs of a batch
+# concurrently, each with its own DB connection; 1 runs them in order
+BATCH_MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', 4))
+
+# Import the views and open the DB connection when a server process starts
+# rather than on its first request (api/warmup.py, called from wsgi.py)
+WARM_UP_ON_START = os.environ.get('WARM_UP_ON_START', '1') == '1'
+
+# Audit log buffer (api/audit.py): flushed every N seconds by a thread in
+# WSGI processes, or as soon as it holds AUDIT_BUFFER_SIZE entries
+AUDIT_FLUSH_INTERVAL_SECONDS = float(os.environ.get('AUDIT_FLUSH_INTERVAL_SECONDS', 2))
+AUDIT_BUFFER_SIZE = int(os.environ.get('AUDIT_BUFFER_SIZE', 500))
+
+# Parquet export of the transaction history (api/parquet_export.py)
+PARQUET_EXPORT_DIR = os.environ.get('PARQUET_EXPORT_DIR', str(BASE_DIR / 'exports' / 'parquet'))
+
+# Decimals in API responses: 'number' keeps them as exact JSON numbers,
+# 'string' quotes them. Either way they never go through float.
+FAST_JSON_DECIMALS = 'number'
+
 from datetime import timedelta
 
 SIMPLE_JWT = {
@@ -14,3 +14,14 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+# Audit entries are written by a background thread in server processes
+from api import audit  # noqa: E402
+audit.enable_background_flush()
+
+# Pay for importing the views and connecting to the database before the
+# first request rather than during it
+from django.conf import settings  # noqa: E402
+from api import warmup  # noqa: E402
+if settings.WARM_UP_ON_START:
+    warmup.warm_up()